@@ -1,14 +1,19 @@
+import logging
 from typing import List, Dict, Set, Tuple, FrozenSet
 import pandas as pd
 from fd_modified import minimize_fds, project_fds_on_schema
 from key_utils import find_candidate_keys, get_table_keys
 from cleanModify import normalize_columns
 from collections import defaultdict
+from metrics import CLOSURE_CALLS
 
 FD = Tuple[FrozenSet[str], FrozenSet[str]]
 
+logger = logging.getLogger(__name__)
+
 
 def closure(attrs: Set[str], fds: List[FD]) -> Set[str]:
+    CLOSURE_CALLS.inc(module="Normalize_1_2_3NF")
     result = set(attrs)
     changed = True
     while changed:
@@ -107,65 +112,113 @@ def normalize_to_3nf(
     return tables, remaining_fds, removed_fds
 
 
-def full_normalization(
-    df: pd.DataFrame, raw_fds: List[FD], global_candidate_keys: List[Set[str]]
-) -> Dict:
-    df.columns = normalize_columns(df.columns)
-    global_candidate_keys = [
-        set(normalize_columns(list(key))) for key in global_candidate_keys
-    ]
-
-    minimized_fds = minimize_fds(raw_fds)
-    all_attributes = set(df.columns)
-
-    result_tables = {}
-    projected_fds_per_table = {}
-    primary_keys_per_table = {}
-    foreign_keys_per_table = {}
-
-    used_attributes = set()
+def _synthesis_schemas(
+    columns: List[str], minimized_fds: List[FD], global_candidate_keys: List[Set[str]]
+) -> Dict[str, Tuple[Set[str], List[FD]]]:
+    """
+    Steps 1 and 2 of the 3NF synthesis: one schema (with its FD) per
+    minimized FD, plus the smallest candidate key when no schema holds a key.
+    """
+    schemas = {}
     table_index = 1
 
     # --- STEP 1: Synthesize 3NF Tables using FD Groups ---
     for lhs, rhs in minimized_fds:
         schema = lhs.union(rhs)
-        missing_cols = [col for col in schema if col not in df.columns]
+        missing_cols = [col for col in schema if col not in columns]
         if missing_cols:
             raise ValueError(
                 f"Missing columns in df for table {table_index}: {missing_cols}"
             )
-
-        table_name = f"3NF_Table{table_index}"
-        table_df = df[list(schema)].drop_duplicates().reset_index(drop=True)
-
-        result_tables[table_name] = table_df
-        projected_fds_per_table[table_name] = [(lhs, rhs)]
-
-        used_attributes.update(schema)
+        schemas[f"3NF_Table{table_index}"] = (schema, [(lhs, rhs)])
         table_index += 1
 
     # --- STEP 2: Ensure at least one table contains a Candidate Key ---
     key_covered = any(
-        any(key.issubset(set(t.columns)) for t in result_tables.values())
+        any(key.issubset(schema) for schema, _ in schemas.values())
         for key in global_candidate_keys
     )
 
     if not key_covered and global_candidate_keys:
         smallest_key = min(global_candidate_keys, key=len)
-        missing_cols = [col for col in smallest_key if col not in df.columns]
+        missing_cols = [col for col in smallest_key if col not in columns]
         if missing_cols:
-            print(
-                f"Warning: Candidate key {sorted(smallest_key)} not present in df.columns. Skipping Key Table creation."
+            logger.warning(
+                "Candidate key not present in the columns; skipping key table",
+                extra={"candidate_key": sorted(smallest_key)},
             )
         else:
-            table_name = "3NF_KeyTable"
-            key_df = df[list(smallest_key)].drop_duplicates().reset_index(drop=True)
-            result_tables[table_name] = key_df
-            projected_fds_per_table[table_name] = []
+            schemas["3NF_KeyTable"] = (smallest_key, [])
+    return schemas
+
 
-    # --- DEBUG PRINTS ---
-    print(f"DataFrame Columns: {df.columns.tolist()}")
-    print(f"Candidate Keys: {[sorted(list(k)) for k in global_candidate_keys]}")
+def _subsumed_tables(table_schemas: Dict[str, Set[str]]) -> Set[str]:
+    """
+    Step 4: tables whose schema is contained in another table's schema.
+    """
+    tables_to_remove = set()
+    for name1, schema1 in table_schemas.items():
+        for name2, schema2 in table_schemas.items():
+            if name1 != name2 and schema1.issubset(schema2):
+                tables_to_remove.add(name1)
+                break
+    return tables_to_remove
+
+
+def predict_3nf_schemas(
+    columns: List[str], raw_fds: List[FD], global_candidate_keys: List[Set[str]]
+) -> Dict[str, Set[str]]:
+    """
+    The schemas of the tables full_normalization followed by
+    merge_normalized_tables produces, with their final names, computed from
+    the FDs and keys alone without projecting any data.
+    """
+    columns = normalize_columns(list(columns))
+    global_candidate_keys = [
+        set(normalize_columns(list(key))) for key in global_candidate_keys
+    ]
+    schemas = _synthesis_schemas(columns, minimize_fds(raw_fds), global_candidate_keys)
+    removed = _subsumed_tables({name: schema for name, (schema, _) in schemas.items()})
+
+    merged = {}
+    for name, (schema, _) in schemas.items():
+        if name not in removed:
+            merged.setdefault(tuple(sorted(normalize_columns(list(schema)))), schema)
+    return {f"3NF_table{i}": set(schema) for i, schema in enumerate(merged.values(), 1)}
+
+
+def full_normalization(
+    df: pd.DataFrame, raw_fds: List[FD], global_candidate_keys: List[Set[str]]
+) -> Dict:
+    df.columns = normalize_columns(df.columns)
+    global_candidate_keys = [
+        set(normalize_columns(list(key))) for key in global_candidate_keys
+    ]
+
+    minimized_fds = minimize_fds(raw_fds)
+
+    result_tables = {}
+    projected_fds_per_table = {}
+    primary_keys_per_table = {}
+    foreign_keys_per_table = {}
+
+    # --- STEPS 1-2: Synthesize the schemas, then project the data on them ---
+    schemas = _synthesis_schemas(
+        df.columns.tolist(), minimized_fds, global_candidate_keys
+    )
+    for table_name, (schema, table_fds) in schemas.items():
+        table_df = df[list(schema)].drop_duplicates().reset_index(drop=True)
+        result_tables[table_name] = table_df
+        projected_fds_per_table[table_name] = table_fds
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Normalizing",
+            extra={
+                "columns": df.columns.tolist(),
+                "candidate_keys": [sorted(list(k)) for k in global_candidate_keys],
+            },
+        )
 
     # --- STEP 3: Per-Table Key Detection (PK, CK, SK, FK) ---
     all_primary_keys_global = {}  # Used for FK Detection across tables
@@ -201,14 +254,9 @@ def full_normalization(
         primary_keys_per_table[table_name] = keys_info["primary_keys"]
 
     # --- STEP 4: Remove Redundant Tables ---
-    tables_to_remove = set()
-    table_schemas = {name: set(table.columns) for name, table in result_tables.items()}
-
-    for name1, schema1 in table_schemas.items():
-        for name2, schema2 in table_schemas.items():
-            if name1 != name2 and schema1.issubset(schema2):
-                tables_to_remove.add(name1)
-                break
+    tables_to_remove = _subsumed_tables(
+        {name: set(table.columns) for name, table in result_tables.items()}
+    )
 
     for table_name in tables_to_remove:
         del result_tables[table_name]
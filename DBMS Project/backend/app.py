@@ -1,396 +1,711 @@
 import os
+import math
+import gzip
 import json
-import re
-from flask import Flask, request, jsonify, send_file
+import hashlib
+import importlib
+import logging
+import functools
+from flask import Flask, Response, g, request, jsonify, make_response, send_file
 from werkzeug.utils import secure_filename
 from flask_cors import CORS
-import pandas as pd
 from io import BytesIO
-from typing import List, Dict, Set, Tuple, FrozenSet
-
-from convert_to_csv import convert_to_csv
-from cleanModify import clean_dataset, normalize_columns
-from fd_modified import (
-    detect_functional_dependencies,
-    minimize_fds,
-    project_fds_on_schema,
-)
-from Normalize_1_2_3NF import (
-    full_normalization,
-    normalize_to_1nf,
-    normalize_to_2nf,
-    merge_normalized_tables,
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+import metrics
+import profiling
+from logging_config import configure_logging
+from manifest import artifact_hash, combined_hash
+from jobs import JobNotFound, job_queue
+from workspace import (
+    DEFAULT_UPLOAD_FOLDER,
+    DEFAULT_PROCESSED_FOLDER,
+    WorkspaceNotFound,
+    create_workspace,
+    get_workspace,
+    delete_workspace,
+    start_cleaner,
 )
-from key_utils import get_table_keys, detect_keys, find_candidate_keys
-from dependency_preservation import is_dependency_preserved
-from lossless_check import is_lossless_decomposition
-from er_diagram import generate_er_diagram_from_keymap
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
 app.secret_key = "your-secret-key"
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
-PROCESSED_FOLDER = os.path.join(BASE_DIR, "processed")
+# Folders of the default workspace; other workspaces live under workspaces/<id>/
+UPLOAD_FOLDER = DEFAULT_UPLOAD_FOLDER
+PROCESSED_FOLDER = DEFAULT_PROCESSED_FOLDER
 CODE_FOLDER = BASE_DIR
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(PROCESSED_FOLDER, exist_ok=True)
 
+# Remove idle workspaces and enforce the workspace disk quota in the background
+start_cleaner()
+
+# Pipeline modules (pandas, pyarrow, graphviz, ...) are imported by the endpoints
+# on first use, keeping `import app` cheap. serve.py preloads them before forking.
+PIPELINE_MODULES = (
+    "stages",
+    "streaming",
+    "table_pages",
+    "dataset_cache",
+    "artifact_store",
+    "dependency_preservation",
+    "result_cache",
+    "er_diagram",
+    "er_clusters",
+    "sketches",
+    "sql_export",
+    "index_advisor",
+)
+
+
+def preload_pipeline_modules():
+    for name in PIPELINE_MODULES:
+        importlib.import_module(name)
+
+
+# JSON bodies at least this large are gzip/brotli compressed when accepted
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "2048"))
+# Clients may keep artifact responses but must revalidate them with the ETag
+ARTIFACT_CACHE_CONTROL = "private, no-cache"
+_ENCODING_SUFFIXES = ("", "-gzip", "-br")
 
-def merge_numbered_columns(df: pd.DataFrame, join_delimiter: str = ",") -> pd.DataFrame:
+
+def conditional_response(etag, build):
+    """
+    Answer 304 when the client already holds etag (If-None-Match), otherwise
+    call build() for the response. Either way ETag and Cache-Control are set.
     """
-    Merge columns that have the same base name plus a numeric suffix (like .1, _2) into a single column.
-    If the merged column ends up all empty/NaN, remove it.
+    for suffix in _ENCODING_SUFFIXES if etag else ():
+        if request.if_none_match.contains(etag + suffix):
+            response = app.response_class(status=304)
+            response.set_etag(etag + suffix)
+            response.headers["Cache-Control"] = ARTIFACT_CACHE_CONTROL
+            return response
+
+    response = app.make_response(build())
+    if etag and response.status_code == 200:
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = ARTIFACT_CACHE_CONTROL
+    return response
+
+
+@app.before_request
+def start_request_metrics():
+    g.request_measure = metrics.start_measure()
+
+
+def _record_request_metrics(status: int):
+    started = g.pop("request_measure", None)
+    if started is None:
+        return
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.record_request(
+        request.method, endpoint, status, metrics.stop_measure(started)
+    )
+
 
-    Parameters:
-    - df: input DataFrame
-    - join_delimiter: string to join multiple values in a row (default ',')
+@app.after_request
+def record_request_metrics(response):
+    _record_request_metrics(response.status_code)
+    return response
 
-    Returns:
-    - DataFrame with merged columns
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    # Requests that ended in an unhandled exception never reach after_request
+    _record_request_metrics(500)
+
+
+@app.route("/metrics", methods=["GET"])
+def api_metrics():
+    return Response(metrics.render(), mimetype=None, content_type=metrics.CONTENT_TYPE)
+
+
+@app.after_request
+def compress_json(response):
+    """
+    Compress large JSON bodies with brotli or gzip, whichever the client accepts.
+    The ETag gets an encoding suffix so each variant has its own strong tag.
+    """
+    if (
+        response.status_code != 200
+        or response.mimetype != "application/json"
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        encoding, body = "br", brotli.compress(data, quality=5)
+    elif accepted["gzip"]:
+        encoding, body = "gzip", gzip.compress(data, compresslevel=6)
+    else:
+        return response
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    etag, _ = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}")
+    return response
+
+
+def _requested_workspace_id():
+    """
+    Workspace ID sent with the request: X-Workspace-Id header, workspace_id
+    query/form field or JSON body key. None selects the default workspace.
     """
-    pattern = re.compile(r"^(.*?)(?:\.|_)(\d+)$")
-    grouped_cols = {}
+    body = request.get_json(silent=True) if request.is_json else None
+    return (
+        request.headers.get("X-Workspace-Id")
+        or request.args.get("workspace_id")
+        or request.form.get("workspace_id")
+        or (body or {}).get("workspace_id")
+    )
+
+
+def workspace_route(exclusive: bool = False):
+    """
+    Resolve the request's workspace and pass it to the view as first argument.
+    The workspace lock is held for the whole request: exclusively for steps
+    that write artifacts, shared for readers.
+    Requests with X-Profile: 1 (or ?profile=1) are profiled and the profile is
+    saved in the workspace; its ID is returned in the X-Profile-Id header.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            workspace = get_workspace(_requested_workspace_id())
+            workspace.touch()
+            with workspace.lock(shared=not exclusive):
+                if not profiling.is_requested(request.headers, request.args):
+                    return view(workspace, *args, **kwargs)
+
+                with profiling.profile_request(
+                    workspace.profile_folder, request.url_rule.rule, request.method
+                ) as profile:
+                    response = make_response(view(workspace, *args, **kwargs))
+                response.headers["X-Profile-Id"] = profile["id"]
+                return response
+
+        return wrapper
 
-    # Group columns by their base name (without numeric suffix)
-    for col in df.columns:
-        m = pattern.match(col)
-        if m:
-            base = m.group(1).strip()
-            grouped_cols.setdefault(base, []).append(col)
+    return decorator
 
-    # Merge columns for each group that has more than 1 column
-    for base, cols in grouped_cols.items():
-        if len(cols) <= 1:
-            continue  # no merge needed
 
-        base_col_name = base.replace(" ", "_")
+@app.errorhandler(WorkspaceNotFound)
+def handle_workspace_not_found(e):
+    return jsonify({"message": str(e)}), 404
 
-        def merge_row_values(row):
-            values = []
-            for c in cols:
-                val = row.get(c)
-                if pd.notna(val):
-                    val_str = str(val).strip()
-                    if val_str != "":
-                        values.append(val_str)
-            return join_delimiter.join(values) if values else ""
 
-        df[base_col_name] = df.apply(merge_row_values, axis=1)
+@app.errorhandler(profiling.ProfileNotFound)
+def handle_profile_not_found(e):
+    return jsonify({"message": str(e)}), 404
 
-        # Check if merged column is all empty (empty string or NaN)
-        if df[base_col_name].apply(lambda x: x == "" or pd.isna(x)).all():
-            df.drop(columns=[base_col_name], inplace=True)
 
-        # Drop the original numbered columns regardless
-        df.drop(columns=cols, inplace=True)
+@app.errorhandler(profiling.ProfilerBusy)
+def handle_profiler_busy(e):
+    return jsonify({"message": str(e)}), 409
 
-    return df
+
+@app.route("/api/workspaces", methods=["POST"])
+def api_create_workspace():
+    workspace = create_workspace()
+    return jsonify({"workspace_id": workspace.id}), 201
+
+
+@app.route("/api/workspaces/<workspace_id>", methods=["GET"])
+def api_get_workspace(workspace_id):
+    return jsonify(get_workspace(workspace_id).info())
+
+
+@app.route("/api/workspaces/<workspace_id>", methods=["DELETE"])
+def api_delete_workspace(workspace_id):
+    try:
+        delete_workspace(workspace_id)
+        return jsonify({"message": f"Workspace '{workspace_id}' deleted"})
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+
+@app.errorhandler(JobNotFound)
+def handle_job_not_found(e):
+    return jsonify({"message": str(e)}), 404
+
+
+def _stage_response(stage, workspace, error_prefix=""):
+    """
+    Run a pipeline stage in the request thread and turn its result into a response.
+    """
+    from stages import StageError
+
+    try:
+        return jsonify(stage(workspace))
+    except StageError as e:
+        return jsonify({"message": str(e)}), e.status
+    except Exception as e:
+        return jsonify({"message": f"{error_prefix}{str(e)}"}), 500
 
 
 @app.route("/api/upload", methods=["POST"])
-def upload_file():
+@workspace_route(exclusive=True)
+def upload_file(workspace):
     file = request.files.get("file")
     if file:
         filename = secure_filename(file.filename)
-        file.save(os.path.join(UPLOAD_FOLDER, filename))
+        file.save(os.path.join(workspace.upload_folder, filename))
         return jsonify({"message": "File uploaded successfully"})
     return jsonify({"message": "No file uploaded"}), 400
 
 
 @app.route("/api/convert_to_csv", methods=["POST"])
-def api_convert_to_csv():
-    try:
-        files = os.listdir(UPLOAD_FOLDER)
-        if not files:
-            return jsonify({"message": "No uploaded files found"}), 400
+@workspace_route(exclusive=True)
+def api_convert_to_csv(workspace):
+    from stages import run_convert
 
-        file_path = os.path.join(UPLOAD_FOLDER, files[0])
-        convert_to_csv(file_path)
-
-        return jsonify({"message": "File converted to CSV"})
-    except Exception as e:
-        return jsonify({"message": str(e)}), 500
+    return _stage_response(run_convert, workspace)
 
 
 @app.route("/api/clean_modify", methods=["POST"])
-def api_clean_modify():
-    try:
-        files = [f for f in os.listdir(PROCESSED_FOLDER) if f.endswith(".csv")]
-        if not files:
-            return jsonify({"message": "No CSV files found to clean"}), 400
+@workspace_route(exclusive=True)
+def api_clean_modify(workspace):
+    from stages import run_clean
 
-        file_path = os.path.join(PROCESSED_FOLDER, files[0])
-        df = pd.read_csv(file_path, encoding="utf-8")
-        cleaned_df = clean_dataset(df)
+    return _stage_response(run_clean, workspace)
 
-        # **Merge numbered columns here**
-        cleaned_df = merge_numbered_columns(cleaned_df)
 
-        cleaned_path = os.path.join(PROCESSED_FOLDER, f"cleaned_{files[0]}")
-        cleaned_df.to_csv(cleaned_path, index=False, encoding="utf-8")
-
-        return jsonify({"message": "Data cleaned, merged numbered columns, and saved"})
-    except Exception as e:
-        return jsonify({"message": str(e)}), 500
+def _fd_search_options(data: dict) -> dict:
+    """
+    Anytime FD search options from a JSON body or the query string:
+    time_budget (seconds) and restart. Raises ValueError for a bad budget.
+    """
+    options = {}
+    budget = data.get("time_budget", request.args.get("time_budget"))
+    if budget is not None:
+        try:
+            options["time_budget"] = float(budget)
+        except (TypeError, ValueError):
+            raise ValueError("time_budget must be a number of seconds")
+        # NaN would pass a plain "<= 0" check and never expire
+        if not (math.isfinite(options["time_budget"]) and options["time_budget"] > 0):
+            raise ValueError("time_budget must be a positive number of seconds")
+    restart = data.get("restart", request.args.get("restart"))
+    if restart is not None:
+        options["restart"] = str(restart).lower() in ("1", "true", "yes")
+    return options
 
 
 @app.route("/api/fd_modified", methods=["POST"])
-def api_fd_modified():
+@workspace_route(exclusive=True)
+def api_fd_modified(workspace):
+    """
+    Detect FDs. Body or query: {"time_budget": seconds} returns the FDs found
+    within the budget with the search's completeness; calling again resumes
+    it, {"restart": true} starts over.
+    """
+    from stages import run_fd_detection
+
     try:
-        files = [
-            f
-            for f in os.listdir(PROCESSED_FOLDER)
-            if f.startswith("cleaned_") and f.endswith(".csv")
-        ]
-        if not files:
-            return (
-                jsonify({"message": "No cleaned CSV file found for FD detection"}),
-                400,
-            )
+        options = _fd_search_options(request.get_json(silent=True) or {})
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+    return _stage_response(lambda ws: run_fd_detection(ws, **options), workspace)
 
-        file_path = os.path.join(PROCESSED_FOLDER, files[0])
-        df = pd.read_csv(file_path, encoding="utf-8")
 
-        fds = detect_functional_dependencies(df)
-        fd_file_path = os.path.join(PROCESSED_FOLDER, "detected_fds.json")
-        with open(fd_file_path, "w", encoding="utf-8") as f:
-            json.dump([{"lhs": list(lhs), "rhs": list(rhs)} for lhs, rhs in fds], f)
+@app.route("/api/key_detection", methods=["POST"])
+@workspace_route(exclusive=True)
+def api_key_detection(workspace):
+    from stages import run_key_detection
 
-        return jsonify({"message": "Functional Dependencies detected"})
-    except Exception as e:
-        return jsonify({"message": str(e)}), 500
+    return _stage_response(run_key_detection, workspace)
 
 
-@app.route("/api/key_detection", methods=["POST"])
-def api_key_detection():
-    try:
-        files = [
-            f
-            for f in os.listdir(PROCESSED_FOLDER)
-            if f.startswith("cleaned_") and f.endswith(".csv")
-        ]
-        if not files:
+@app.route("/api/normalize_table", methods=["POST"])
+@workspace_route(exclusive=True)
+def api_normalize_table(workspace):
+    from stages import run_normalization
+
+    return _stage_response(run_normalization, workspace)
+
+
+@app.route("/api/pipeline", methods=["POST"])
+@workspace_route(exclusive=True)
+def api_pipeline(workspace):
+    """
+    Run the whole chain on the uploaded file in one call.
+    Body: {"checkpoints": false, "er_diagram": true}.
+    """
+    from stages import run_full_pipeline
+
+    data = request.get_json(silent=True) or {}
+    return _stage_response(
+        lambda ws: run_full_pipeline(
+            ws,
+            checkpoints=bool(data.get("checkpoints", False)),
+            er_diagram=bool(data.get("er_diagram", True)),
+        ),
+        workspace,
+    )
+
+
+@app.route("/api/jobs", methods=["POST"])
+def api_submit_job():
+    """
+    Run fd_modified, key_detection, normalize_table, pipeline or index_advisor
+    in the background.
+    Body: {"stage": ..., "timeout": seconds}. Poll /api/jobs/<id> for the outcome.
+    fd_modified also takes "time_budget" and "restart" (see /api/fd_modified).
+    """
+    from stages import JOB_STAGES
+
+    data = request.get_json(silent=True) or {}
+    stage_name = data.get("stage") or request.args.get("stage")
+    stage = JOB_STAGES.get(stage_name)
+    if stage is None:
+        return (
+            jsonify(
+                {
+                    "message": f"Unknown stage: {stage_name}",
+                    "stages": sorted(JOB_STAGES),
+                }
+            ),
+            400,
+        )
+    timeout = data.get("timeout", request.args.get("timeout"))
+    if timeout in (None, ""):
+        timeout = None
+    else:
+        try:
+            timeout = float(timeout)
+        except (TypeError, ValueError):
+            return jsonify({"message": "timeout must be a number of seconds"}), 400
+        # NaN would pass min() against the cap and never expire
+        if not (math.isfinite(timeout) and timeout > 0):
             return (
-                jsonify({"message": "No cleaned CSV file found for key detection"}),
+                jsonify({"message": "timeout must be a positive number of seconds"}),
                 400,
             )
+    options = {}
+    if stage_name == "fd_modified":
+        try:
+            options = _fd_search_options(data)
+        except (TypeError, ValueError) as e:
+            return jsonify({"message": str(e)}), 400
 
-        file_path = os.path.join(PROCESSED_FOLDER, files[0])
-        df = pd.read_csv(file_path, encoding="utf-8")
+    workspace = get_workspace(_requested_workspace_id())
+    workspace.touch()
 
-        with open(
-            os.path.join(PROCESSED_FOLDER, "detected_fds.json"), "r", encoding="utf-8"
-        ) as f:
-            raw_fds = [
-                (frozenset(fd["lhs"]), frozenset(fd["rhs"])) for fd in json.load(f)
-            ]
+    def work(job):
+        # The exclusive lock is taken by the worker, so queued jobs and
+        # synchronous requests on the same workspace run one at a time
+        with workspace.lock():
+            job.check()
+            return stage(workspace, progress=job.report, **options)
 
-        keys = detect_keys(df, raw_fds)
+    job = job_queue.submit(stage_name, work, workspace.id, timeout=timeout)
+    return jsonify({"job_id": job.id, "status": job.status}), 202
 
-        with open(
-            os.path.join(PROCESSED_FOLDER, "candidate_keys.json"), "w", encoding="utf-8"
-        ) as f:
-            json.dump(keys["candidate_keys"], f)
 
-        return jsonify({"message": "Keys detected", "keys": keys})
+@app.route("/api/jobs", methods=["GET"])
+def api_list_jobs():
+    workspace_id = request.args.get("workspace_id")
+    return jsonify({"jobs": [job.info() for job in job_queue.list(workspace_id)]})
 
-    except Exception as e:
-        return jsonify({"message": str(e)}), 500
 
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def api_get_job(job_id):
+    return jsonify(job_queue.get(job_id).info())
 
-FD = Tuple[FrozenSet[str], FrozenSet[str]]
 
+@app.route("/api/jobs/<job_id>", methods=["DELETE"])
+def api_cancel_job(job_id):
+    return jsonify(job_queue.cancel(job_id).info())
 
-@app.route("/api/normalize_table", methods=["POST"])
-def api_normalize_table():
-    try:
-        files = [
-            f
-            for f in os.listdir(PROCESSED_FOLDER)
-            if f.startswith("cleaned_") and f.endswith(".csv")
-        ]
-        if not files:
-            return (
-                jsonify({"message": "No cleaned CSV file found for normalization"}),
-                400,
-            )
-        filename = files[0]
 
-        cleaned_df = pd.read_csv(
-            os.path.join(PROCESSED_FOLDER, filename), encoding="utf-8"
+@app.route("/api/stream", methods=["GET", "POST"])
+def api_stream():
+    """
+    Run stages (default: fd_modified, key_detection, normalize_table) and stream
+    every FD, candidate key and normalized table as soon as it is found, with
+    periodic progress events. format=sse (default) or format=ndjson.
+    """
+    from stages import JOB_STAGES
+    from streaming import DEFAULT_STAGES, stage_events, format_sse, format_ndjson
+
+    data = request.get_json(silent=True) or {}
+    stages = (
+        data.get("stages") or request.args.get("stages") or ",".join(DEFAULT_STAGES)
+    )
+    if isinstance(stages, str):
+        stages = [name.strip() for name in stages.split(",") if name.strip()]
+    unknown = [name for name in stages if name not in JOB_STAGES]
+    if unknown or not stages:
+        return (
+            jsonify(
+                {
+                    "message": f"Unknown stage: {', '.join(unknown)}",
+                    "stages": sorted(JOB_STAGES),
+                }
+            ),
+            400,
         )
 
-        fd_path = os.path.join(PROCESSED_FOLDER, "detected_fds.json")
-        if not os.path.exists(fd_path):
-            return jsonify({"message": "Detected FDs not found"}), 400
-        with open(fd_path, "r", encoding="utf-8") as f:
-            raw_fds = [
-                (frozenset(fd["lhs"]), frozenset(fd["rhs"])) for fd in json.load(f)
-            ]
-
-        attributes = list(cleaned_df.columns)
-        candidate_keys = find_candidate_keys(attributes, raw_fds, max_comb_size=4)
-        if not candidate_keys:
-            return jsonify({"message": "No candidate keys found"}), 400
-
-        # 1NF normalization
-        df_1nf = normalize_to_1nf(cleaned_df)
-        path_1nf = os.path.join(PROCESSED_FOLDER, "1NF_table.csv")
-        df_1nf.to_csv(path_1nf, index=False)
-
-        minimized_fds = minimize_fds(raw_fds)
-        # 2NF normalization
-        tables_2nf, remaining_fds_2nf, _ = normalize_to_2nf(
-            df_1nf, minimized_fds, candidate_keys
-        )
-        for i, tbl in enumerate(tables_2nf, start=1):
-            path_2nf = os.path.join(PROCESSED_FOLDER, f"2NF_table{i}.csv")
-            tbl.to_csv(path_2nf, index=False)
-
-        norm_result = full_normalization(cleaned_df, raw_fds, candidate_keys)
-        original_3nf_tables = norm_result["3NF_tables"]
-
-        tables_to_merge = [(name, df) for name, df in original_3nf_tables.items()]
-        merged_tables = merge_normalized_tables(tables_to_merge)
-
-        existing_primary_keys = {}
-        keymap = {}
-
-        # First pass: Detect primary keys (and others), but skip foreign keys for now
-        for table_name, table_df in merged_tables.items():
-            attrs = set(table_df.columns)
-            projected_fds = project_fds_on_schema(raw_fds, attrs)
-            keys_info = get_table_keys(table_df, projected_fds, {}, table_name)
-            existing_primary_keys[table_name] = keys_info["primary_keys"]
-            keymap[table_name] = {
-                "primary_keys": keys_info["primary_keys"],
-                "candidate_keys": keys_info["candidate_keys"],
-                "superkeys": keys_info["superkeys"],
-                "foreign_keys": {},  # empty for now
-                "attributes": list(attrs),
-            }
+    fmt = data.get("format") or request.args.get("format", "sse")
+    if fmt not in ("sse", "ndjson"):
+        return jsonify({"message": "format must be 'sse' or 'ndjson'"}), 400
+    formatter = format_sse if fmt == "sse" else format_ndjson
 
-        # Second pass: Detect foreign keys now that all PKs are known
-        for table_name, info in keymap.items():
-            info["foreign_keys"] = get_foreign_keys(
-                table_name, info["attributes"], existing_primary_keys
-            )
+    workspace = get_workspace(_requested_workspace_id())
+    workspace.touch()
+    events = stage_events(workspace, stages)
 
-        # Save each normalized table CSV
-        for table_name, table_df in merged_tables.items():
-            path = os.path.join(PROCESSED_FOLDER, f"{table_name}.csv")
-            table_df.to_csv(path, index=False)
+    return Response(
+        (formatter(kind, event) for kind, event in events),
+        mimetype="text/event-stream" if fmt == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-        # Save the keymap with updated foreign keys
-        keymap_path = os.path.join(PROCESSED_FOLDER, "keymap.json")
-        with open(keymap_path, "w", encoding="utf-8") as f:
-            json.dump(keymap, f, indent=2)
 
-        return jsonify(
-            {
-                "message": "Normalization (1NF, 2NF, 3NF) done; keys detected and saved",
-                "3nf_tables": list(merged_tables.keys()),
-            }
-        )
+@app.route("/api/normalization_estimate", methods=["GET"])
+@workspace_route()
+def api_normalization_estimate(workspace):
+    from stages import estimate_normalization
+
+    return _stage_response(
+        estimate_normalization,
+        workspace,
+        error_prefix="Error estimating normalization: ",
+    )
+
+
+@app.route("/api/export_sqlite", methods=["POST"])
+@workspace_route(exclusive=True)
+def api_export_sqlite(workspace):
+    from stages import run_sql_export
 
+    return _stage_response(
+        run_sql_export, workspace, error_prefix="Error exporting to SQLite: "
+    )
+
+
+@app.route("/api/export_sqlite", methods=["GET"])
+@workspace_route()
+def api_download_sqlite(workspace):
+    from stages import SQLITE_EXPORT
+
+    db_path = os.path.join(workspace.processed_folder, SQLITE_EXPORT)
+    if not os.path.exists(db_path):
+        return jsonify({"message": "SQLite export not found"}), 404
+    return send_file(
+        db_path,
+        mimetype="application/vnd.sqlite3",
+        as_attachment=True,
+        download_name=SQLITE_EXPORT,
+    )
+
+
+@app.route("/api/schema_ddl", methods=["GET"])
+@workspace_route()
+def api_schema_ddl(workspace):
+    """
+    DDL of the 3NF tables; ?dialect=sqlite (default) or postgresql.
+    """
+    from stages import StageError, normalized_schema_ddl
+
+    try:
+        ddl = normalized_schema_ddl(workspace, request.args.get("dialect", "sqlite"))
+        return Response(ddl, mimetype="application/sql")
+    except StageError as e:
+        return jsonify({"message": str(e)}), e.status
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
-        return jsonify({"message": str(e)}), 500
+        return jsonify({"message": f"Error generating DDL: {str(e)}"}), 500
 
 
-def get_foreign_keys(current_table, current_columns, all_primary_keys):
-    foreign_keys = {}
-    curr_cols_lower = {col.lower(): col for col in current_columns}
-
-    for other_table, pk_list in all_primary_keys.items():
-        if other_table == current_table or not pk_list:
-            continue
-        pk_set = set(pk_list)
-        # Only proceed if all PK attrs of other_table are present in current_columns
-        if not pk_set.issubset(set(current_columns)):
-            continue
-
-        for pk_attr in pk_list:
-            pk_lower = pk_attr.lower()
-            for col_lower, col_original in curr_cols_lower.items():
-                if (
-                    col_lower == pk_lower
-                    or col_lower.endswith(pk_lower)
-                    or pk_lower in col_lower
-                    or (col_lower.endswith("_id") and pk_lower in col_lower)
-                ):
-                    foreign_keys[col_original] = {
-                        "ref_table": other_table,
-                        "ref_column": pk_attr,
-                    }
-    return foreign_keys
+@app.route("/api/index_advisor", methods=["POST"])
+@workspace_route(exclusive=True)
+def api_index_advisor(workspace):
+    from stages import run_index_advisor
+
+    return _stage_response(
+        run_index_advisor, workspace, error_prefix="Error in index advisor: "
+    )
 
 
 @app.route("/api/generate_er_diagram", methods=["POST"])
-def api_generate_er_diagram():
+@workspace_route(exclusive=True)
+def api_generate_er_diagram(workspace):
+    from stages import run_er_diagram
+
+    return _stage_response(
+        run_er_diagram, workspace, error_prefix="Error in ER Diagram generation: "
+    )
+
+
+def _er_diagram_response(workspace, render):
+    """
+    Render the workspace's keymap with render(keymap, fmt, style), which
+    returns (etag, bytes). ?format= and layout options come from the query.
+    """
+    from er_diagram import DEFAULT_STYLE, ER_FORMATS
+
+    fmt = request.args.get("format", "png")
+    if fmt not in ER_FORMATS:
+        return jsonify({"message": f"Unknown ER diagram format '{fmt}'"}), 400
+    style = {k: v for k, v in request.args.items() if k in DEFAULT_STYLE}
+
+    keymap_path = os.path.join(workspace.processed_folder, "keymap.json")
+    if not os.path.exists(keymap_path):
+        return jsonify({"message": "ER Diagram image not found"}), 400
+    with open(keymap_path, "r", encoding="utf-8") as f:
+        keymap = json.load(f)
     try:
-        keymap_path = os.path.join(PROCESSED_FOLDER, "keymap.json")
-        if not os.path.exists(keymap_path):
-            return jsonify({"message": "Keymap JSON file not found"}), 400
+        etag, data = render(keymap, fmt, style)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except KeyError as e:
+        return jsonify({"message": f"'{e.args[0]}' not found"}), 404
+    return conditional_response(etag, lambda: Response(data, mimetype=ER_FORMATS[fmt]))
 
-        with open(keymap_path, "r", encoding="utf-8") as f:
-            keymap = json.load(f)
 
-        base_name = "ER_Diagram"
-        image_data = generate_er_diagram_from_keymap(base_name, keymap)
+@app.route("/api/get_er_diagram_image", methods=["GET"])
+@workspace_route()
+def get_er_diagram_image(workspace):
+    """
+    The ER diagram as ?format=png (default), svg or json (nodes and edges for
+    client-side rendering). Layout options (rankdir, splines, nodesep,
+    ranksep, dpi) may be given as query parameters.
+    """
+    try:
+        from er_diagram import DEFAULT_STYLE, render_diagram
+
+        er_image_path = os.path.join(workspace.processed_folder, "ER_Diagram.png")
+        custom = any(k in request.args for k in ("format", *DEFAULT_STYLE))
+        if not custom and os.path.exists(er_image_path):
+            return conditional_response(
+                artifact_hash(er_image_path),
+                lambda: send_file(
+                    er_image_path, mimetype="image/png", etag=False, conditional=False
+                ),
+            )
+        return _er_diagram_response(workspace, render_diagram)
+    except Exception as e:
+        return jsonify({"message": f"Error fetching ER Diagram image: {str(e)}"}), 500
 
-        er_image_path = os.path.join(PROCESSED_FOLDER, f"{base_name}.png")
-        with open(er_image_path, "wb") as img_file:
-            img_file.write(image_data)
 
-        return jsonify({"message": "ER Diagram generated successfully"})
+@app.route("/api/er_diagram/overview", methods=["GET"])
+@workspace_route()
+def get_er_overview(workspace):
+    """
+    The schema's subject areas (FK-connected groups of tables) and the
+    foreign keys between them. format=json lists each area's tables.
+    """
+    try:
+        from er_diagram import render_overview
+
+        return _er_diagram_response(workspace, render_overview)
     except Exception as e:
-        return jsonify({"message": f"Error in ER Diagram generation: {str(e)}"}), 500
+        return jsonify({"message": f"Error fetching ER overview: {str(e)}"}), 500
 
 
-@app.route("/api/get_er_diagram_image", methods=["GET"])
-def get_er_diagram_image():
+@app.route("/api/er_diagram/areas/<area>", methods=["GET"])
+@workspace_route()
+def get_er_area(workspace, area):
     try:
-        er_image_path = os.path.join(PROCESSED_FOLDER, "ER_Diagram.png")
-        if not os.path.exists(er_image_path):
-            return jsonify({"message": "ER Diagram image not found"}), 400
-        return send_file(er_image_path, mimetype="image/png")
+        from er_diagram import render_area
+
+        return _er_diagram_response(
+            workspace, lambda keymap, fmt, style: render_area(keymap, area, fmt, style)
+        )
     except Exception as e:
-        return jsonify({"message": f"Error fetching ER Diagram image: {str(e)}"}), 500
+        return jsonify({"message": f"Error fetching ER area: {str(e)}"}), 500
+
+
+@app.route("/api/er_diagram/tables/<table>", methods=["GET"])
+@workspace_route()
+def get_er_neighborhood(workspace, table):
+    """
+    ER diagram of one table and its neighbours within ?depth= FK hops (1-3).
+    """
+    try:
+        from er_diagram import render_neighborhood
+
+        depth = request.args.get("depth", 1, type=int)
+        if not 1 <= depth <= 3:
+            return jsonify({"message": "depth must be between 1 and 3"}), 400
+        return _er_diagram_response(
+            workspace,
+            lambda keymap, fmt, style: render_neighborhood(
+                keymap, table, depth, fmt, style
+            ),
+        )
+    except Exception as e:
+        return jsonify({"message": f"Error fetching ER neighborhood: {str(e)}"}), 500
 
 
 @app.route("/api/detected_fds", methods=["GET"])
-def api_get_detected_fds():
+@workspace_route()
+def api_get_detected_fds(workspace):
     try:
-        fd_file = os.path.join(PROCESSED_FOLDER, "detected_fds.json")
+        fd_file = os.path.join(workspace.processed_folder, "detected_fds.json")
         if not os.path.exists(fd_file):
             return jsonify({"fds": []})
-        with open(fd_file, "r", encoding="utf-8") as f:
-            fds = json.load(f)
-        return jsonify({"fds": fds})
+
+        def build():
+            with open(fd_file, "r", encoding="utf-8") as f:
+                fds = json.load(f)
+            return jsonify({"fds": fds})
+
+        return conditional_response(artifact_hash(fd_file), build)
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
 
 @app.route("/api/decomposed_schemas", methods=["GET"])
-def api_get_decomposed_schemas():
+@workspace_route()
+def api_get_decomposed_schemas(workspace):
+    from artifact_store import read_columns, list_tables, table_path
+
     try:
-        schemas = []
-        for f in os.listdir(PROCESSED_FOLDER):
-            if f.endswith(".csv") and not f.startswith("cleaned_"):
-                schema = pd.read_csv(
-                    os.path.join(PROCESSED_FOLDER, f), nrows=0
-                ).columns.tolist()
-                schemas.append(schema)
-        return jsonify({"schemas": schemas})
+        tables = [
+            f
+            for f in list_tables(workspace.processed_folder)
+            if not f.startswith("cleaned_")
+        ]
+        etag = combined_hash(table_path(workspace.processed_folder, f) for f in tables)
+
+        def build():
+            schemas = [read_columns(workspace.processed_folder, f) for f in tables]
+            return jsonify({"schemas": schemas})
+
+        return conditional_response(etag, build)
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
 
 @app.route("/api/dependency_preservation", methods=["POST"])
 def api_dependency_preservation():
+    from dependency_preservation import is_dependency_preserved
+
     try:
         data = request.get_json()
         original_fds = data.get("originalFDs", [])
@@ -422,60 +737,13 @@ def api_dependency_preservation():
 
 
 @app.route("/api/lossless_check", methods=["POST"])
-def api_lossless_check():
-    try:
-        files = [
-            f
-            for f in os.listdir(PROCESSED_FOLDER)
-            if f.endswith(".csv") and f.startswith("cleaned_")
-        ]
-        if not files:
-            return (
-                jsonify({"message": "No cleaned CSV file found for Lossless Check"}),
-                400,
-            )
-
-        cleaned_file_path = os.path.join(PROCESSED_FOLDER, files[0])
-        df = pd.read_csv(cleaned_file_path, encoding="utf-8")
-        original_attrs = set(df.columns)
-
-        decomposed_schemas = []
-        for f in os.listdir(PROCESSED_FOLDER):
-            if (
-                f.endswith(".csv")
-                and "_keys" not in f
-                and "_cleaned" not in f
-                and "_converted" not in f
-                and "_1NF" not in f
-                and "_2NF" not in f
-            ):
-                table_df = pd.read_csv(
-                    os.path.join(PROCESSED_FOLDER, f), encoding="utf-8"
-                )
-                decomposed_schemas.append(set(table_df.columns))
-
-        if not decomposed_schemas:
-            return (
-                jsonify({"message": "No normalized tables found for Lossless Check"}),
-                400,
-            )
-
-        fds_path = os.path.join(PROCESSED_FOLDER, "detected_fds.json")
-        if not os.path.exists(fds_path):
-            return jsonify({"message": "Functional Dependencies not found"}), 400
-
-        with open(fds_path, "r", encoding="utf-8") as f:
-            raw_fds = [(frozenset(lhs), frozenset(rhs)) for lhs, rhs in json.load(f)]
-
-        is_lossless = is_lossless_decomposition(
-            original_attrs, decomposed_schemas, raw_fds
-        )
-
-        message = "Lossless Decomposition: PASSED"
-        return jsonify({"message": message})
+@workspace_route()
+def api_lossless_check(workspace):
+    from stages import run_lossless_check
 
-    except Exception as e:
-        return jsonify({"message": f"Error in Lossless Check: {str(e)}"}), 500
+    return _stage_response(
+        run_lossless_check, workspace, error_prefix="Error in Lossless Check: "
+    )
 
 
 @app.route("/api/code/<step_name>", methods=["GET"])
@@ -504,7 +772,10 @@ def api_get_code(step_name):
 
 
 @app.route("/api/normalized_tables")
-def get_normalized_tables():
+@workspace_route()
+def get_normalized_tables(workspace):
+    from artifact_store import list_tables
+
     try:
         excluded_tables = {
             "cleaned_sampleInformation_converted",
@@ -515,9 +786,9 @@ def get_normalized_tables():
         }
 
         tables = [
-            f.replace(".csv", "")
-            for f in os.listdir(PROCESSED_FOLDER)
-            if f.endswith(".csv") and f.replace(".csv", "") not in excluded_tables
+            f
+            for f in list_tables(workspace.processed_folder)
+            if f not in excluded_tables
         ]
         return jsonify({"tables": tables})
     except Exception as e:
@@ -525,7 +796,11 @@ def get_normalized_tables():
 
 
 @app.route("/api/get_normalized_table/<table_name>")
-def get_normalized_table(table_name):
+@workspace_route()
+def get_normalized_table(workspace, table_name):
+    from artifact_store import table_path
+    from dataset_cache import load_table
+
     try:
         excluded_tables = {
             "cleaned_sampleInformation_converted",
@@ -546,28 +821,32 @@ def get_normalized_table(table_name):
                 403,
             )
 
-        if not table_name.endswith(".csv"):
-            table_name += ".csv"
+        table_name = os.path.splitext(table_name)[0]
+        path = table_path(workspace.processed_folder, table_name)
+        if path is None:
+            raise FileNotFoundError(f"Table '{table_name}' not found")
 
-        file_path = os.path.join(PROCESSED_FOLDER, table_name)
-        df = pd.read_csv(file_path)
+        def build():
+            df = load_table(workspace.processed_folder, table_name)
 
-        df = df.dropna()
-        df = df.astype(str)
+            df = df.dropna()
+            df = df.astype(str)
 
-        return jsonify(
-            {
-                "name": table_name.replace(".csv", ""),
-                "headers": list(df.columns),
-                "rows": df.values.tolist(),
-            }
-        )
+            return jsonify(
+                {
+                    "name": table_name,
+                    "headers": list(df.columns),
+                    "rows": df.values.tolist(),
+                }
+            )
+
+        return conditional_response(artifact_hash(path), build)
     except Exception as e:
         return (
             jsonify(
                 {
                     "error": str(e),
-                    "name": table_name.replace(".csv", ""),
+                    "name": table_name,
                     "headers": [],
                     "rows": [],
                 }
@@ -576,5 +855,190 @@ def get_normalized_table(table_name):
         )
 
 
+@app.route("/api/tables/<table_name>/rows", methods=["GET"])
+@workspace_route()
+def api_table_rows(workspace, table_name):
+    """
+    One page of a stored table.
+    Query: offset, limit, columns=a,b, sort=a,-b, filter=col:op:value (repeatable),
+    cursor (from next_cursor, replaces the other parameters) and
+    format=json|ndjson|arrow.
+    """
+    from artifact_store import table_path
+    from table_pages import (
+        QueryError,
+        DEFAULT_PAGE_SIZE,
+        query_table,
+        decode_cursor,
+        page_records,
+        page_ndjson,
+        page_arrow,
+    )
+
+    try:
+        table_name = os.path.splitext(table_name)[0]
+        path = table_path(workspace.processed_folder, table_name)
+        if path is None:
+            raise FileNotFoundError(f"Table '{table_name}' not found")
+        # A page is determined by the table content and the query string
+        etag = hashlib.sha256(
+            f"{artifact_hash(path)}?{request.query_string.decode()}".encode("utf-8")
+        ).hexdigest()
+
+        if request.args.get("cursor"):
+            params = decode_cursor(request.args["cursor"])
+        else:
+            columns = request.args.get("columns")
+            params = {
+                "offset": request.args.get("offset", 0),
+                "limit": request.args.get("limit", DEFAULT_PAGE_SIZE),
+                "columns": columns.split(",") if columns else None,
+                "sort": request.args.get("sort"),
+                "filters": request.args.getlist("filter"),
+            }
+
+        def build():
+            result = query_table(
+                workspace.processed_folder,
+                table_name,
+                columns=params.get("columns"),
+                offset=int(params.get("offset", 0)),
+                limit=int(params.get("limit", DEFAULT_PAGE_SIZE)),
+                sort=params.get("sort"),
+                filters=params.get("filters"),
+            )
+            page = result.pop("page")
+            paging_headers = {
+                "X-Total-Count": str(result["total"]),
+                "X-Next-Cursor": result["next_cursor"] or "",
+            }
+
+            fmt = request.args.get("format", "json")
+            if fmt == "ndjson":
+                return Response(
+                    page_ndjson(page),
+                    mimetype="application/x-ndjson",
+                    headers=paging_headers,
+                )
+            if fmt == "arrow":
+                return Response(
+                    page_arrow(page),
+                    mimetype="application/vnd.apache.arrow.stream",
+                    headers=paging_headers,
+                )
+            return jsonify(
+                {
+                    "name": table_name,
+                    "headers": list(page.columns),
+                    "rows": page_records(page),
+                    **result,
+                }
+            )
+
+        return conditional_response(etag, build)
+    except FileNotFoundError as e:
+        return jsonify({"message": str(e)}), 404
+    except (QueryError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+@app.route("/api/cache_stats", methods=["GET"])
+def api_cache_stats():
+    from dataset_cache import dataset_cache
+
+    return jsonify(dataset_cache.stats())
+
+
+@app.route("/api/result_cache", methods=["GET"])
+def api_result_cache():
+    from result_cache import result_cache
+
+    return jsonify({**result_cache.stats(), "items": result_cache.entries()})
+
+
+@app.route("/api/result_cache", methods=["DELETE"])
+def api_purge_result_cache():
+    from result_cache import result_cache
+
+    return jsonify({"purged": result_cache.purge()})
+
+
+@app.route("/api/result_cache/<key>", methods=["DELETE"])
+def api_purge_result_cache_entry(key):
+    from result_cache import InvalidCacheKey, result_cache
+
+    try:
+        purged = result_cache.purge(key)
+    except InvalidCacheKey as e:
+        return jsonify({"message": str(e)}), 400
+    if not purged:
+        return jsonify({"message": f"No cache entry '{key}'"}), 404
+    return jsonify({"purged": purged})
+
+
+@app.route("/api/profiles", methods=["GET"])
+@workspace_route()
+def api_list_profiles(workspace):
+    return jsonify({"profiles": profiling.list_profiles(workspace.profile_folder)})
+
+
+@app.route("/api/profiles/<profile_id>", methods=["GET"])
+@workspace_route()
+def api_get_profile(workspace, profile_id):
+    """
+    format=summary (default, top functions as JSON), pstats (for snakeviz or
+    pstats.Stats) or collapsed (for flamegraph.pl or speedscope).
+    """
+    fmt = request.args.get("format", "summary")
+    try:
+        if fmt == "summary":
+            return jsonify(
+                profiling.profile_summary(
+                    workspace.profile_folder,
+                    profile_id,
+                    limit=request.args.get("limit", 30, type=int),
+                    sort=request.args.get("sort", "cumulative"),
+                )
+            )
+        path = profiling.profile_file(workspace.profile_folder, profile_id, fmt)
+        return send_file(
+            path,
+            mimetype="text/plain" if fmt == "collapsed" else "application/octet-stream",
+            as_attachment=True,
+            download_name=os.path.basename(path),
+        )
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+
+@app.route("/api/profiles/<profile_id>", methods=["DELETE"])
+@workspace_route(exclusive=True)
+def api_delete_profile(workspace, profile_id):
+    profiling.delete_profile(workspace.profile_folder, profile_id)
+    return jsonify({"message": f"Profile '{profile_id}' deleted"})
+
+
+@app.route("/api/export/<table_name>", methods=["GET"])
+@workspace_route()
+def api_export_table(workspace, table_name):
+    from artifact_store import export_csv
+
+    try:
+        table_name = os.path.splitext(table_name)[0]
+        csv_bytes = export_csv(workspace.processed_folder, table_name)
+        return send_file(
+            BytesIO(csv_bytes),
+            mimetype="text/csv",
+            as_attachment=True,
+            download_name=f"{table_name}.csv",
+        )
+    except FileNotFoundError as e:
+        return jsonify({"message": str(e)}), 404
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=5000)
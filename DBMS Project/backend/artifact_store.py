@@ -0,0 +1,128 @@
+import os
+from typing import List, Optional
+import pandas as pd
+
+from manifest import record_artifact, forget_artifact
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet support is optional; fall back to CSV artifacts
+    pq = None
+
+# Intermediate tables (cleaned, 1NF, 2NF, 3NF) are stored as Parquet when
+# pyarrow is available. CSV is only produced by export_csv().
+ARTIFACT_EXT = ".parquet" if pq is not None else ".csv"
+TABLE_EXTS = (".parquet", ".csv")
+
+# infer_dtype kinds that pyarrow can store without coercion
+_ARROW_SAFE_KINDS = {
+    "string",
+    "empty",
+    "integer",
+    "floating",
+    "mixed-integer-float",
+    "boolean",
+    "datetime",
+    "datetime64",
+    "date",
+    "bytes",
+    "decimal",
+}
+
+
+def table_path(folder: str, name: str) -> Optional[str]:
+    """
+    Path of the stored artifact for name, preferring Parquet over legacy CSV.
+    """
+    for ext in TABLE_EXTS:
+        path = os.path.join(folder, name + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def to_storable(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Stringify mixed-type object columns (e.g. numbers mixed with "unknown"),
+    which is exactly what a CSV round trip used to do to them.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == "object":
+            kind = pd.api.types.infer_dtype(df[col], skipna=True)
+            if kind not in _ARROW_SAFE_KINDS:
+                df[col] = df[col].map(str, na_action="ignore")
+    return df
+
+
+def write_table(df: pd.DataFrame, folder: str, name: str) -> str:
+    """
+    Store a pipeline table under folder as name + ARTIFACT_EXT.
+    String columns are dictionary-encoded in Parquet.
+    """
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, name + ARTIFACT_EXT)
+
+    if ARTIFACT_EXT == ".parquet":
+        to_storable(df).to_parquet(
+            path, index=False, engine="pyarrow", use_dictionary=True
+        )
+    else:
+        df.to_csv(path, index=False, encoding="utf-8")
+    record_artifact(path)
+
+    # Drop a stale copy in the other format so readers never see two versions
+    for ext in TABLE_EXTS:
+        stale = os.path.join(folder, name + ext)
+        if ext != ARTIFACT_EXT and os.path.exists(stale):
+            os.remove(stale)
+            forget_artifact(stale)
+
+    return path
+
+
+def read_table(
+    folder: str, name: str, columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Load a stored table, optionally reading only the given columns.
+    """
+    path = table_path(folder, name)
+    if path is None:
+        raise FileNotFoundError(f"Table '{name}' not found")
+
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns, encoding="utf-8")
+
+
+def read_columns(folder: str, name: str) -> List[str]:
+    """
+    Column names of a stored table, without loading its rows.
+    """
+    path = table_path(folder, name)
+    if path is None:
+        raise FileNotFoundError(f"Table '{name}' not found")
+
+    if path.endswith(".parquet"):
+        return pq.read_schema(path).names
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def list_tables(folder: str) -> List[str]:
+    """
+    Names (without extension) of all tables stored in folder.
+    """
+    names = []
+    for f in sorted(os.listdir(folder)):
+        stem, ext = os.path.splitext(f)
+        if ext in TABLE_EXTS and stem not in names:
+            names.append(stem)
+    return names
+
+
+def export_csv(folder: str, name: str) -> bytes:
+    """
+    Render a stored table as CSV bytes for download.
+    """
+    return read_table(folder, name).to_csv(index=False).encode("utf-8")
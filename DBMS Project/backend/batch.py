@@ -0,0 +1,348 @@
+# Batch normalization: python batch.py legacy_extracts/ "more/*.csv" --workers 4
+#
+# Every dataset runs the full pipeline (convert, clean, FDs, keys, 1NF-3NF,
+# lossless and dependency preservation checks, ER diagram) in its own worker process, so a dataset that
+# hangs or runs out of memory is killed without affecting the others. Results
+# go to <output-dir>/<dataset name>/ and an aggregate report with per-stage
+# timings to <output-dir>/batch_report.json.
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import multiprocessing
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows; memory limits are skipped there
+    resource = None
+
+DATASET_EXTENSIONS = (
+    ".xlsx",
+    ".xls",
+    ".csv",
+    ".tsv",
+    ".txt",
+    ".json",
+    ".ndjson",
+    ".jsonl",
+)
+
+DEFAULT_WORKERS = int(
+    os.environ.get("BATCH_WORKERS", str(max(1, multiprocessing.cpu_count() - 1)))
+)
+# Per-dataset limits; 0 means no limit
+DEFAULT_TIMEOUT = int(os.environ.get("BATCH_TIMEOUT_SECONDS", "1800"))
+DEFAULT_MEMORY_MB = int(os.environ.get("BATCH_MEMORY_MB", "4096"))
+
+# Per-dataset check results counted in the aggregate report
+CHECKS = ("lossless", "dependency_preserved")
+
+# Seconds between checks for finished or overdue workers
+_POLL_SECONDS = 0.1
+
+# JSON files the pipeline and this script write next to their results; never
+# datasets, even when an earlier run's output sits inside an input directory
+RESULT_FILES = {
+    "batch_report.json",
+    "candidate_keys.json",
+    "detected_fds.json",
+    "fd_search_state.json",
+    "index_advice.json",
+    "keymap.json",
+    "sqlite_export.json",
+}
+SCHEMA_SUFFIX = ".schema.json"
+
+
+def _is_result_file(path: str) -> bool:
+    name = os.path.basename(path).lower()
+    return name in RESULT_FILES or name.endswith(SCHEMA_SUFFIX)
+
+
+def _is_excluded(path: str, exclude: List[str]) -> bool:
+    path = os.path.abspath(path)
+    return any(
+        path == root or path.startswith(root + os.sep)
+        for root in (os.path.abspath(e) for e in exclude)
+    )
+
+
+def find_datasets(inputs: List[str], exclude: Optional[List[str]] = None) -> List[str]:
+    """
+    Expand directories (searched recursively) and glob patterns to the
+    dataset files they contain, in a stable order without duplicates.
+    Files under any path in exclude (e.g. the output directory) and result
+    files of earlier runs are skipped.
+    """
+    exclude = exclude or []
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, "**", "*"), recursive=True)
+        else:
+            matches = glob.glob(item, recursive=True) or [item]
+        paths.extend(
+            p
+            for p in sorted(matches)
+            if os.path.isfile(p)
+            and os.path.splitext(p)[1].lower() in DATASET_EXTENSIONS
+            and not _is_result_file(p)
+            and not _is_excluded(p, exclude)
+        )
+
+    seen = set()
+    unique = []
+    for path in paths:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def output_folders(paths: List[str], output_dir: str) -> List[str]:
+    """
+    One output folder per dataset, named after the file; datasets with the
+    same name (e.g. from different directories) get a numbered suffix.
+    """
+    folders = []
+    used = set()
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        candidate, n = name, 2
+        while candidate in used:
+            candidate = f"{name}_{n}"
+            n += 1
+        used.add(candidate)
+        folders.append(os.path.join(output_dir, candidate))
+    return folders
+
+
+def _peak_memory_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _worker(file_path, output_folder, options, memory_mb, conn):
+    """
+    Run the pipeline on one dataset inside a worker process and send the
+    outcome back through conn.
+    """
+    if memory_mb and resource is not None:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    # Imported here so the parent process stays light
+    from stages import run_pipeline
+
+    try:
+        result = run_pipeline(file_path, output_folder, **options)
+        outcome = {"status": "succeeded", **result}
+    except MemoryError:
+        outcome = {"status": "memory_exceeded", "message": "Memory limit exceeded"}
+    except Exception as e:
+        outcome = {"status": "failed", "message": str(e)}
+    outcome["peak_memory_mb"] = _peak_memory_mb()
+    conn.send(outcome)
+    conn.close()
+
+
+def run_batch(
+    paths: List[str],
+    output_dir: str,
+    workers: int = DEFAULT_WORKERS,
+    timeout: int = DEFAULT_TIMEOUT,
+    memory_mb: int = DEFAULT_MEMORY_MB,
+    checkpoints: bool = False,
+    er_diagram: bool = True,
+    on_result=None,
+) -> List[Dict]:
+    """
+    Normalize every dataset in paths with up to `workers` processes at a time.
+    A dataset still running after `timeout` seconds is killed. Returns one
+    result per dataset, in the order of paths.
+    """
+    options = {"checkpoints": checkpoints, "er_diagram": er_diagram}
+    folders = output_folders(paths, output_dir)
+    pending = list(range(len(paths)))
+    running = {}
+    results: List[Optional[Dict]] = [None] * len(paths)
+
+    def finish(index: int, outcome: Dict):
+        results[index] = {
+            "dataset": paths[index],
+            "output_folder": folders[index],
+            **outcome,
+        }
+        if on_result:
+            on_result(results[index])
+
+    while pending or running:
+        while pending and len(running) < workers:
+            index = pending.pop(0)
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=_worker,
+                args=(paths[index], folders[index], options, memory_mb, sender),
+                daemon=True,
+            )
+            process.start()
+            sender.close()
+            running[index] = (process, receiver, time.monotonic())
+
+        time.sleep(_POLL_SECONDS)
+        for index, (process, receiver, started) in list(running.items()):
+            elapsed = round(time.monotonic() - started, 4)
+            if receiver.poll():
+                try:
+                    outcome = receiver.recv()
+                except EOFError:
+                    outcome = None
+                process.join()
+            elif not process.is_alive():
+                outcome = None
+            elif timeout and elapsed > timeout:
+                process.kill()
+                process.join()
+                outcome = {
+                    "status": "timed_out",
+                    "message": f"Timed out after {timeout}s",
+                }
+            else:
+                continue
+
+            if outcome is None:
+                # Killed before it could report, e.g. by the OOM killer
+                outcome = {
+                    "status": "crashed",
+                    "message": f"Worker exited with code {process.exitcode}",
+                }
+            outcome["elapsed"] = elapsed
+            receiver.close()
+            del running[index]
+            finish(index, outcome)
+
+    return results
+
+
+def aggregate_report(results: List[Dict], wall_seconds: float) -> Dict:
+    """
+    Summary of a batch run: counts by status, passed/failed counts of each
+    check and total/mean/max per-stage timings over the datasets that
+    succeeded, plus every dataset's result.
+    """
+    by_status: Dict[str, int] = {}
+    for result in results:
+        by_status[result["status"]] = by_status.get(result["status"], 0) + 1
+
+    checks = {check: {"passed": 0, "failed": 0} for check in CHECKS}
+    for result in results:
+        for check in CHECKS:
+            if check in result:
+                checks[check]["passed" if result[check] else "failed"] += 1
+
+    stage_times: Dict[str, List[float]] = {}
+    for result in results:
+        for stage, seconds in result.get("timings", {}).items():
+            stage_times.setdefault(stage, []).append(seconds)
+
+    return {
+        "datasets": len(results),
+        "by_status": by_status,
+        "checks": checks,
+        "wall_seconds": round(wall_seconds, 4),
+        "stage_timings": {
+            stage: {
+                "total": round(sum(times), 4),
+                "mean": round(sum(times) / len(times), 4),
+                "max": max(times),
+            }
+            for stage, times in stage_times.items()
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Normalize a directory (or glob) of datasets in parallel"
+    )
+    parser.add_argument("inputs", nargs="+", help="Dataset files, directories or globs")
+    parser.add_argument("--output-dir", default="batch_output")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        default=DEFAULT_TIMEOUT,
+        help="Seconds allowed per dataset (0 for no limit)",
+    )
+    parser.add_argument(
+        "--memory-mb",
+        type=int,
+        default=DEFAULT_MEMORY_MB,
+        help="Address space limit per worker in MB (0 for no limit)",
+    )
+    parser.add_argument(
+        "--checkpoints",
+        action="store_true",
+        help="Also store the converted CSV and cleaned table",
+    )
+    parser.add_argument("--no-er-diagram", action="store_true")
+    parser.add_argument(
+        "--report", help="Report path (default <output-dir>/batch_report.json)"
+    )
+    args = parser.parse_args()
+
+    from logging_config import configure_logging
+
+    configure_logging()
+    report_path = args.report or os.path.join(args.output_dir, "batch_report.json")
+    paths = find_datasets(args.inputs, exclude=[args.output_dir, report_path])
+    if not paths:
+        parser.error("No datasets found")
+
+    def on_result(result):
+        line = f"[{result['status']}] {result['dataset']} in {result['elapsed']:.1f}s"
+        if result.get("message") and result["status"] != "succeeded":
+            line += f": {result['message']}"
+        failed = [check for check in CHECKS if result.get(check) is False]
+        if failed:
+            line += f" (failed checks: {', '.join(failed)})"
+        print(line, flush=True)
+
+    start = time.perf_counter()
+    results = run_batch(
+        paths,
+        args.output_dir,
+        workers=max(1, args.workers),
+        timeout=args.timeout,
+        memory_mb=args.memory_mb,
+        checkpoints=args.checkpoints,
+        er_diagram=not args.no_er_diagram,
+        on_result=on_result,
+    )
+    report = aggregate_report(results, time.perf_counter() - start)
+
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(
+        f"{report['datasets']} datasets in {report['wall_seconds']:.1f}s: "
+        + ", ".join(
+            f"{n} {status}" for status, n in sorted(report["by_status"].items())
+        )
+    )
+    print(f"Report written to {report_path}")
+    sys.exit(0 if report["by_status"].get("succeeded") == len(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Benchmarks of the pipeline algorithms on synthetic datasets with planted FDs.
+"""
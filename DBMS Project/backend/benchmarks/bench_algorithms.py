@@ -0,0 +1,274 @@
+# Algorithm benchmarks on synthetic data with planted FDs:
+#
+#   python -m benchmarks.bench_algorithms [--quick] [--repeat 3] [--output bench.json]
+#                                         [--only fd_detection_rows,candidate_keys]
+#
+# Run from DBMS Project/backend. Each suite times one pipeline function over a
+# range of input sizes (a scaling curve) and, where the answer is known from the
+# planted structure, checks it. The exit code is 1 if any check fails.
+
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import statistics
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from logging_config import configure_logging
+from cleanModify import clean_dataset
+from fd_modified import detect_functional_dependencies, minimize_fds
+from key_utils import find_candidate_keys
+from Normalize_1_2_3NF import full_normalization
+from dependency_preservation import is_dependency_preserved
+from lossless_check import is_lossless_decomposition
+from er_diagram import generate_er_diagram_from_keymap
+from er_clusters import cluster_tables
+from benchmarks.synthetic import (
+    generate_relation,
+    check_recovery,
+    planted_fds,
+    random_fds,
+    synthetic_keymap,
+)
+
+
+class Suite:
+    """
+    setup(size) builds the inputs outside the timed region; run(inputs)
+    is timed; check(inputs, result), if given, returns a dict with an "ok" flag.
+    """
+
+    def __init__(
+        self,
+        parameter: str,
+        sizes: List[int],
+        quick_sizes: List[int],
+        setup: Callable,
+        run: Callable,
+        check: Callable = None,
+    ):
+        self.parameter = parameter
+        self.sizes = sizes
+        self.quick_sizes = quick_sizes
+        self.setup = setup
+        self.run = run
+        self.check = check
+
+
+def _relation(rows: int, **options):
+    options.setdefault("multivalued_columns", 0)
+    return generate_relation(rows=rows, **options)
+
+
+def _detected(rows: int, **options):
+    df, info = _relation(rows, **options)
+    return df, info, detect_functional_dependencies(df.copy(), verbose=False)
+
+
+def _check_fds(inputs, fds) -> Dict:
+    recovery = check_recovery(inputs[1], fds)
+    return {"ok": not recovery["missing"], **recovery}
+
+
+def _normalization_inputs(rows: int):
+    df, info, fds = _detected(rows, key_columns=2, fd_count=4, free_columns=0)
+    keys = find_candidate_keys(list(df.columns), fds, max_comb_size=4)
+    return df, fds, keys
+
+
+def _decomposition_inputs(fd_count: int):
+    df, info = _relation(5000, key_columns=3, fd_count=fd_count, free_columns=0)
+    fds = planted_fds(info)
+    keys = find_candidate_keys(list(df.columns), fds, max_comb_size=4)
+    tables = full_normalization(df, fds, keys)["3NF_tables"]
+    return set(df.columns), [set(t.columns) for t in tables.values()], fds
+
+
+def _timed_copy(run: Callable) -> Callable:
+    # Functions that modify their DataFrame get a fresh copy each repetition
+    return lambda inputs: run(inputs[0].copy(), *inputs[1:])
+
+
+SUITES: Dict[str, Suite] = {
+    "clean_dataset": Suite(
+        "rows",
+        [1_000, 10_000, 50_000, 200_000],
+        [1_000, 5_000, 20_000],
+        lambda n: (_relation(n, multivalued_columns=1)[0],),
+        _timed_copy(clean_dataset),
+    ),
+    "fd_detection_rows": Suite(
+        "rows",
+        [1_000, 5_000, 20_000, 50_000],
+        [1_000, 5_000, 10_000],
+        # Three key columns keep every column under the RHS cardinality cut-off
+        lambda n: _relation(n, key_columns=3, fd_count=4),
+        lambda inputs: detect_functional_dependencies(inputs[0].copy(), verbose=False),
+        _check_fds,
+    ),
+    "fd_detection_columns": Suite(
+        "planted_fds",
+        [2, 4, 6, 8],
+        [2, 4, 6],
+        lambda n: _relation(5_000, key_columns=3, fd_count=n),
+        lambda inputs: detect_functional_dependencies(inputs[0].copy(), verbose=False),
+        _check_fds,
+    ),
+    "minimize_fds": Suite(
+        "fds",
+        [25, 50, 100, 200],
+        [25, 50, 100],
+        lambda n: random_fds(20, n, seed=n)[1:],
+        lambda inputs: minimize_fds(inputs[0]),
+    ),
+    "candidate_keys": Suite(
+        "attributes",
+        [6, 8, 10, 12],
+        [6, 8, 10],
+        lambda n: _relation(1_000, key_columns=3, fd_count=n - 3, free_columns=0),
+        lambda inputs: find_candidate_keys(
+            list(inputs[0].columns), planted_fds(inputs[1])
+        ),
+        lambda inputs, keys: {
+            "ok": set(inputs[1]["key"]) in keys,
+            "keys_found": len(keys),
+        },
+    ),
+    "full_normalization": Suite(
+        "rows",
+        [1_000, 5_000, 20_000, 50_000],
+        [1_000, 5_000, 10_000],
+        _normalization_inputs,
+        _timed_copy(full_normalization),
+        lambda inputs, result: {
+            "ok": bool(result["3NF_tables"]),
+            "tables": len(result["3NF_tables"]),
+        },
+    ),
+    "dependency_preservation": Suite(
+        "planted_fds",
+        [4, 8, 12, 16],
+        [4, 8],
+        _decomposition_inputs,
+        lambda inputs: is_dependency_preserved(inputs[2], inputs[1]),
+    ),
+    "lossless_check": Suite(
+        "planted_fds",
+        [4, 8, 12, 16],
+        [4, 8],
+        _decomposition_inputs,
+        lambda inputs: is_lossless_decomposition(*inputs),
+        # A 3NF synthesis that contains a key of the relation is always lossless
+        lambda inputs, lossless: {"ok": bool(lossless)},
+    ),
+    "er_diagram": Suite(
+        "tables",
+        [5, 10, 20, 40],
+        [5, 10],
+        lambda n: (synthetic_keymap(n),),
+        lambda inputs: generate_er_diagram_from_keymap(inputs[0]),
+    ),
+    "er_clusters": Suite(
+        "tables",
+        [50, 100, 200, 400],
+        [50, 100],
+        lambda n: (synthetic_keymap(n),),
+        lambda inputs: cluster_tables(inputs[0]),
+    ),
+}
+
+
+def _scaling_exponent(points: List[Dict]) -> float:
+    """
+    Slope of log(time) over log(size): ~1 for linear, ~2 for quadratic.
+    """
+    xs = [math.log(p["size"]) for p in points if p["median"] > 0]
+    ys = [math.log(p["median"]) for p in points if p["median"] > 0]
+    if len(xs) < 2:
+        return None
+    mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    if spread == 0:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread
+    return round(slope, 2)
+
+
+def run_suite(suite: Suite, sizes: List[int], repeat: int) -> Dict:
+    points = []
+    for size in sizes:
+        inputs = suite.setup(size)
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = suite.run(inputs)
+            samples.append(time.perf_counter() - start)
+        point = {
+            "size": size,
+            "median": round(statistics.median(samples), 6),
+            "min": round(min(samples), 6),
+        }
+        if suite.check is not None:
+            point["check"] = suite.check(inputs, result)
+        points.append(point)
+        print(f"  {suite.parameter}={size}: {point['median']:.4f}s", flush=True)
+    return {
+        "parameter": suite.parameter,
+        "points": points,
+        "scaling_exponent": _scaling_exponent(points),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline algorithms")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", help="Comma-separated suite names")
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    configure_logging(level="WARNING")
+    names = args.only.split(",") if args.only else list(SUITES)
+    unknown = [n for n in names if n not in SUITES]
+    if unknown:
+        parser.error(f"Unknown suite(s): {', '.join(unknown)}")
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+        },
+        "suites": {},
+    }
+    failed = []
+    for name in names:
+        suite = SUITES[name]
+        print(name, flush=True)
+        try:
+            result = run_suite(
+                suite, suite.quick_sizes if args.quick else suite.sizes, args.repeat
+            )
+        except Exception as e:
+            # e.g. the Graphviz executable is missing for er_diagram
+            print(f"  skipped: {e}", flush=True)
+            report["suites"][name] = {"skipped": str(e)}
+            continue
+        report["suites"][name] = result
+        if any(not p.get("check", {"ok": True})["ok"] for p in result["points"]):
+            failed.append(name)
+
+    report["failed_checks"] = failed
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
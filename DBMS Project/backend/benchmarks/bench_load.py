@@ -0,0 +1,440 @@
+# HTTP load test of the API with synthetic datasets:
+#
+#   python -m benchmarks.bench_load --clients 1,4,16 --iterations 3 --output load.json
+#   python -m benchmarks.bench_load --url http://127.0.0.1:5000 --clients 8
+#   python -m benchmarks.bench_load --compare old_load.json
+#
+# Run from DBMS Project/backend. Unless --url is given, a server is started with
+# serve.py on a free local port, with its workspaces and result cache in a
+# temporary folder. Each simulated client repeatedly walks through the
+# frontend's sequence on its own workspace: upload, convert, clean, FDs, keys,
+# normalize, lossless check and the artifact reads. For every concurrency level
+# the report has throughput, p50/p95/p99 latency and error rate per endpoint,
+# and the server's resident memory.
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.synthetic import generate_relation
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Seconds allowed for the server to start answering
+_STARTUP_TIMEOUT = 60
+_MEMORY_POLL_SECONDS = 0.5
+
+
+class Client:
+    """
+    Minimal JSON/multipart HTTP client on urllib, one workspace per client.
+    """
+
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.workspace_id: Optional[str] = None
+
+    def request(
+        self, method: str, path: str, body: bytes = None, content_type: str = None
+    ) -> Tuple[int, bytes]:
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        if content_type:
+            req.add_header("Content-Type", content_type)
+        if self.workspace_id:
+            req.add_header("X-Workspace-Id", self.workspace_id)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def upload(self, filename: str, data: bytes) -> Tuple[int, bytes]:
+        boundary = uuid.uuid4().hex
+        body = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            "Content-Type: text/csv\r\n\r\n"
+        ).encode("utf-8")
+        body += data + f"\r\n--{boundary}--\r\n".encode("utf-8")
+        return self.request(
+            "POST", "/api/upload", body, f"multipart/form-data; boundary={boundary}"
+        )
+
+
+class Recorder:
+    """
+    Thread-safe latency and error log, keyed by endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.error_samples: List[str] = []
+
+    def record(self, endpoint: str, seconds: float, ok: bool, detail: str = ""):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+                if len(self.error_samples) < 20:
+                    self.error_samples.append(f"{endpoint}: {detail[:200]}")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of values.
+    """
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def run_scenario(client: Client, recorder: Recorder, dataset: bytes, name: str):
+    """
+    One pass through the pipeline on a fresh workspace.
+    """
+
+    def call(endpoint: str, method: str, path: str, **kwargs) -> Optional[bytes]:
+        start = time.perf_counter()
+        try:
+            if endpoint == "upload":
+                status, body = client.upload(name, dataset)
+            else:
+                status, body = client.request(method, path, **kwargs)
+            ok, detail = status < 400, f"HTTP {status} {body[:200]!r}"
+        except (OSError, urllib.error.URLError) as e:
+            body, ok, detail = None, False, str(e)
+        recorder.record(endpoint, time.perf_counter() - start, ok, detail)
+        return body if ok else None
+
+    client.workspace_id = None
+    created = call("create_workspace", "POST", "/api/workspaces")
+    if created is None:
+        return
+    client.workspace_id = json.loads(created)["workspace_id"]
+    try:
+        steps = [
+            ("upload", "POST", "/api/upload"),
+            ("convert_to_csv", "POST", "/api/convert_to_csv"),
+            ("clean_modify", "POST", "/api/clean_modify"),
+            ("fd_modified", "POST", "/api/fd_modified"),
+            ("key_detection", "POST", "/api/key_detection"),
+            ("normalize_table", "POST", "/api/normalize_table"),
+            ("lossless_check", "POST", "/api/lossless_check"),
+            ("detected_fds", "GET", "/api/detected_fds"),
+            ("decomposed_schemas", "GET", "/api/decomposed_schemas"),
+        ]
+        for endpoint, method, path in steps:
+            if call(endpoint, method, path) is None:
+                return
+
+        tables = call("normalized_tables", "GET", "/api/normalized_tables")
+        names = json.loads(tables).get("tables", []) if tables else []
+        names = sorted(n for n in names if n.startswith("3NF_table"))
+        if names:
+            table = names[0]
+            call("get_normalized_table", "GET", f"/api/get_normalized_table/{table}")
+            call("table_rows", "GET", f"/api/tables/{table}/rows?limit=100")
+    finally:
+        call("delete_workspace", "DELETE", f"/api/workspaces/{client.workspace_id}")
+
+
+def run_level(
+    base_url: str,
+    clients: int,
+    iterations: int,
+    rows: int,
+    timeout: float,
+    same_dataset: bool,
+    memory: "MemorySampler",
+) -> Dict:
+    recorder = Recorder()
+
+    # Datasets are generated up front so the clients only measure the server
+    datasets = {}
+    for index in range(clients):
+        for iteration in range(iterations):
+            seed = 0 if same_dataset else index * 1000 + iteration
+            if seed not in datasets:
+                df, _ = generate_relation(
+                    rows=rows, key_columns=2, fd_count=4, seed=seed
+                )
+                datasets[seed] = df.to_csv(index=False).encode("utf-8")
+
+    def user(index: int):
+        client = Client(base_url, timeout)
+        for iteration in range(iterations):
+            seed = 0 if same_dataset else index * 1000 + iteration
+            run_scenario(client, recorder, datasets[seed], f"load_{seed}.csv")
+
+    memory.reset()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    endpoints = {}
+    for endpoint, values in recorder.latencies.items():
+        errors = recorder.errors.get(endpoint, 0)
+        endpoints[endpoint] = {
+            "requests": len(values),
+            "throughput": round(len(values) / wall, 3),
+            "p50": round(percentile(values, 50), 4),
+            "p95": round(percentile(values, 95), 4),
+            "p99": round(percentile(values, 99), 4),
+            "max": round(max(values), 4),
+            "error_rate": round(errors / len(values), 4),
+        }
+    total = sum(len(v) for v in recorder.latencies.values())
+    all_latencies = [x for v in recorder.latencies.values() for x in v]
+    return {
+        "clients": clients,
+        "wall_seconds": round(wall, 3),
+        "requests": total,
+        "throughput": round(total / wall, 3),
+        "scenarios_per_second": round(clients * iterations / wall, 3),
+        "p50": round(percentile(all_latencies, 50), 4) if all_latencies else None,
+        "p95": round(percentile(all_latencies, 95), 4) if all_latencies else None,
+        "p99": round(percentile(all_latencies, 99), 4) if all_latencies else None,
+        "error_rate": round(sum(recorder.errors.values()) / total, 4) if total else 0,
+        "server_memory_mb": memory.summary(),
+        "endpoints": endpoints,
+        "error_samples": recorder.error_samples,
+    }
+
+
+class MemorySampler:
+    """
+    Polls the resident memory of the server process and its children (gunicorn
+    workers) from /proc. Reports nothing when the server is remote or /proc
+    is not available.
+    """
+
+    def __init__(self, pid: Optional[int]):
+        self.pid = pid
+        self.samples: List[int] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _rss(self) -> Optional[int]:
+        try:
+            children: Dict[int, List[int]] = {}
+            for entry in os.listdir("/proc"):
+                if entry.isdigit():
+                    with open(f"/proc/{entry}/stat") as f:
+                        ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+                    children.setdefault(ppid, []).append(int(entry))
+            total, pending = 0, [self.pid]
+            while pending:
+                pid = pending.pop()
+                with open(f"/proc/{pid}/status") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            total += int(line.split()[1]) * 1024
+                pending.extend(children.get(pid, []))
+            return total
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def _run(self):
+        while not self._stop.wait(_MEMORY_POLL_SECONDS):
+            rss = self._rss()
+            if rss is not None:
+                self.samples.append(rss)
+
+    def start(self):
+        if self.pid is not None and os.path.isdir("/proc"):
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def reset(self):
+        self.samples = []
+
+    def summary(self) -> Optional[Dict]:
+        samples = list(self.samples)
+        if not samples:
+            return None
+        mb = 1024 * 1024
+        return {
+            "peak": round(max(samples) / mb, 1),
+            "mean": round(sum(samples) / len(samples) / mb, 1),
+        }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, threads: int, result_cache: bool):
+    """
+    Start serve.py on a free port with scratch workspace and cache folders.
+    Returns the process, its base URL and the scratch folder.
+    """
+    scratch = tempfile.mkdtemp(prefix="bench_load_")
+    port = _free_port()
+    env = dict(
+        os.environ,
+        WORKSPACES_ROOT=os.path.join(scratch, "workspaces"),
+        RESULT_CACHE_DIR=os.path.join(scratch, "result_cache"),
+        LOG_LEVEL="WARNING",
+    )
+    if not result_cache:
+        env["RESULT_CACHE_MB"] = "0"
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "serve.py",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--threads",
+            str(threads),
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + _STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            urllib.request.urlopen(base_url + "/api/jobs", timeout=1).read()
+            return process, base_url, scratch
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Server did not start in time")
+
+
+def compare(report: Dict, baseline: Dict) -> List[str]:
+    """
+    p95 and throughput of each level and endpoint relative to a previous report.
+    """
+    lines = []
+    old_levels = {level["clients"]: level for level in baseline.get("levels", [])}
+    for level in report["levels"]:
+        old = old_levels.get(level["clients"])
+        if old is None:
+            continue
+        lines.append(
+            f"clients={level['clients']}: throughput "
+            f"{old['throughput']} -> {level['throughput']} req/s, "
+            f"p95 {old['p95']} -> {level['p95']} s"
+        )
+        for endpoint, stats in sorted(level["endpoints"].items()):
+            before = old["endpoints"].get(endpoint)
+            if before and before["p95"]:
+                ratio = stats["p95"] / before["p95"]
+                lines.append(f"  {endpoint}: p95 x{ratio:.2f}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the backend API")
+    parser.add_argument("--url", help="Test a running server instead of starting one")
+    parser.add_argument(
+        "--clients", default="1,4,16", help="Comma-separated concurrency levels"
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=2, help="Scenarios per client"
+    )
+    parser.add_argument("--rows", type=int, default=2000, help="Rows per dataset")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--workers", type=int, default=2, help="Server processes")
+    parser.add_argument("--threads", type=int, default=8, help="Threads per process")
+    parser.add_argument(
+        "--same-dataset",
+        action="store_true",
+        help="Every client uploads the same data (exercises the result cache)",
+    )
+    parser.add_argument(
+        "--no-result-cache", action="store_true", help="Start the server without it"
+    )
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    parser.add_argument("--compare", help="Previous report to compare against")
+    args = parser.parse_args()
+
+    process, scratch = None, None
+    if args.url:
+        base_url = args.url
+    else:
+        process, base_url, scratch = start_server(
+            args.workers, args.threads, not args.no_result_cache
+        )
+    memory = MemorySampler(process.pid if process else None)
+    memory.start()
+
+    report = {
+        "config": {
+            "url": args.url,
+            "workers": None if args.url else args.workers,
+            "threads": None if args.url else args.threads,
+            "iterations": args.iterations,
+            "rows": args.rows,
+            "same_dataset": args.same_dataset,
+            "result_cache": not args.no_result_cache,
+        },
+        "levels": [],
+    }
+    try:
+        for clients in [int(c) for c in args.clients.split(",")]:
+            print(f"clients={clients}", flush=True)
+            level = run_level(
+                base_url,
+                clients,
+                args.iterations,
+                args.rows,
+                args.timeout,
+                args.same_dataset,
+                memory,
+            )
+            report["levels"].append(level)
+            print(
+                f"  {level['throughput']} req/s, p50 {level['p50']}s, "
+                f"p95 {level['p95']}s, p99 {level['p99']}s, "
+                f"errors {level['error_rate']:.1%}, memory {level['server_memory_mb']}",
+                flush=True,
+            )
+    finally:
+        memory.stop()
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print("\n".join(compare(report, json.load(f))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# Memory of several worker processes holding the same dataset (Linux only):
+#
+#   python -m benchmarks.bench_memory [--rows 500000] [--workers 1,4] [--output mem.json]
+#
+# Run from DBMS Project/backend. A synthetic relation with text columns is
+# stored as a cleaned table in a temporary folder. For each worker count, that
+# many fresh processes each load the table and its integer codes through
+# dataset_cache, the way FD detection, key detection and table paging do, and
+# touch every value. Once all of them hold the data, each reports its private
+# (anonymous) and proportional (PSS) resident memory. This is done with the
+# memory-mapped column store and again with COLUMN_STORE=0.
+
+import os
+import json
+import argparse
+import tempfile
+import multiprocessing
+from typing import Dict, List
+
+from benchmarks.synthetic import generate_relation
+
+_MB = 1024 * 1024
+
+
+def _memory() -> Dict[str, float]:
+    """
+    RssAnon and RssFile from /proc/self/status and Pss from smaps_rollup, in MB.
+    """
+    memory = {}
+    with open("/proc/self/status", "r", encoding="utf-8") as f:
+        for line in f:
+            field, _, value = line.partition(":")
+            if field in ("RssAnon", "RssFile"):
+                memory[field] = int(value.split()[0]) * 1024 / _MB
+    with open("/proc/self/smaps_rollup", "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                memory["Pss"] = int(line.split()[1]) * 1024 / _MB
+    return memory
+
+
+def _worker(folder: str, name: str, barrier, results):
+    # Imported here, after the parent set COLUMN_STORE for this run
+    from dataset_cache import load_encoded, load_table
+
+    before = _memory()
+    values = load_table(folder, name)
+    codes = load_encoded(folder, name)
+    # Read every value, as a full scan during FD or key detection would
+    touched = sum(int(values[col].str.len().sum()) for col in values.columns)
+    touched += sum(int(codes[col].max()) for col in codes.columns)
+
+    barrier.wait()  # every worker holds the data now
+    after = _memory()
+    results.put(
+        {
+            "private_mb": round(after["RssAnon"] - before["RssAnon"], 1),
+            "pss_mb": round(after["Pss"] - before["Pss"], 1),
+            "file_mb": round(after["RssFile"] - before["RssFile"], 1),
+            "touched": touched,
+        }
+    )
+    barrier.wait()  # stay alive until the last worker has measured
+
+
+def measure(folder: str, name: str, workers: int, column_store: bool) -> Dict:
+    os.environ["COLUMN_STORE"] = "1" if column_store else "0"
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(folder, name, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    reports: List[Dict] = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return {
+        "workers": workers,
+        "column_store": column_store,
+        "private_mb_total": round(sum(r["private_mb"] for r in reports), 1),
+        "pss_mb_total": round(sum(r["pss_mb"] for r in reports), 1),
+        "per_worker": reports,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Resident memory of workers sharing one dataset"
+    )
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--workers", default="1,4", help="Comma-separated counts")
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    # Imported after argument parsing so --help stays fast
+    from artifact_store import write_table
+    from column_store import build_column_store
+
+    df, _ = generate_relation(rows=args.rows, free_columns=3, cardinality=5000)
+    df = df.apply(lambda column: "value_" + column.astype(str))
+
+    with tempfile.TemporaryDirectory(prefix="bench_memory_") as folder:
+        write_table(df, folder, "cleaned_bench")
+        build_column_store(folder, "cleaned_bench")
+        runs = [
+            measure(folder, "cleaned_bench", int(workers), column_store)
+            for workers in args.workers.split(",")
+            for column_store in (False, True)
+        ]
+        for run in runs:
+            print(
+                f"{run['workers']:>3} workers  column_store={run['column_store']!s:<5}"
+                f"  private {run['private_mb_total']:>8.1f} MB"
+                f"  pss {run['pss_mb_total']:>8.1f} MB",
+                flush=True,
+            )
+
+    report = {"rows": args.rows, "columns": len(df.columns), "runs": runs}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# Speedup of the vectorized column merges over the row-wise originals:
+#
+#   python -m benchmarks.bench_merge [--rows 20000,100000] [--columns 10]
+#                                    [--min-speedup 10] [--output merge.json]
+#
+# Run from DBMS Project/backend. For each size, a frame with `columns` numbered
+# text columns (sideeffect_1, sideeffect_2, ...) and a few distinct values each
+# is merged by stages.merge_numbered_columns and
+# cleanModify.flatten_repeating_columns. The same frame is also merged by
+# the per-row df.apply(axis=1) implementations they replaced (kept below as the
+# reference). The outputs must be identical. The exit code is 1 if they
+# differ or if a speedup is below --min-speedup.
+
+import sys
+import json
+import time
+import argparse
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from logging_config import configure_logging
+from cleanModify import flatten_repeating_columns
+from stages import merge_numbered_columns
+
+VALUES = ["nausea", "headache", "Rash ", "", None, "unknown"]
+
+
+def rowwise_merge_numbered_columns(df: pd.DataFrame, join_delimiter: str = ","):
+    """
+    merge_numbered_columns as it was before vectorization.
+    """
+    import re
+
+    pattern = re.compile(r"^(.*?)(?:\.|_)(\d+)$")
+    grouped_cols: Dict[str, List[str]] = {}
+    for col in df.columns:
+        m = pattern.match(col)
+        if m:
+            grouped_cols.setdefault(m.group(1).strip(), []).append(col)
+    for base, cols in grouped_cols.items():
+        if len(cols) <= 1:
+            continue
+        base_col_name = base.replace(" ", "_")
+
+        def merge_row_values(row):
+            values = []
+            for c in cols:
+                val = row.get(c)
+                if pd.notna(val):
+                    val_str = str(val).strip()
+                    if val_str != "":
+                        values.append(val_str)
+            return join_delimiter.join(values) if values else ""
+
+        df[base_col_name] = df.apply(merge_row_values, axis=1)
+        if df[base_col_name].apply(lambda x: x == "" or pd.isna(x)).all():
+            df.drop(columns=[base_col_name], inplace=True)
+        df.drop(columns=cols, inplace=True)
+    return df
+
+
+def rowwise_flatten_repeating_columns(df: pd.DataFrame):
+    """
+    flatten_repeating_columns as it was before vectorization.
+    """
+    import re
+
+    df_flat = df.copy()
+    grouped_cols: Dict[str, List[str]] = {}
+    for col in df_flat.columns:
+        match = re.match(r"^(.*?)(?:_?\d+)?$", col)
+        if match:
+            grouped_cols.setdefault(match.group(1), []).append(col)
+    for base, cols in grouped_cols.items():
+        if len(cols) > 1:
+            df_flat[base] = (
+                df_flat[cols]
+                .astype(str)
+                .fillna("")
+                .apply(
+                    lambda row: ", ".join(
+                        val.strip().lower()
+                        for val in row
+                        if val.strip().lower() not in ["", "nan", "none", "unknown"]
+                    ),
+                    axis=1,
+                )
+            )
+            for col in cols:
+                if col != base:
+                    df_flat.drop(columns=col, inplace=True)
+    return df_flat
+
+
+def make_frame(rows: int, columns: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    frame = {"drug_name": [f"drug{i % 997}" for i in range(rows)]}
+    for i in range(1, columns + 1):
+        frame[f"sideeffect_{i}"] = pd.Series(
+            [VALUES[j] for j in rng.integers(0, len(VALUES), rows)], dtype=object
+        )
+    return pd.DataFrame(frame)
+
+
+def _time(run: Callable[[pd.DataFrame], pd.DataFrame], df: pd.DataFrame):
+    start = time.perf_counter()
+    result = run(df.copy())
+    return time.perf_counter() - start, result
+
+
+def _same(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    if list(a.columns) != list(b.columns):
+        return False
+    return all(list(a[col]) == list(b[col]) for col in a.columns)
+
+
+PAIRS = {
+    "merge_numbered_columns": (
+        merge_numbered_columns,
+        rowwise_merge_numbered_columns,
+    ),
+    "flatten_repeating_columns": (
+        flatten_repeating_columns,
+        rowwise_flatten_repeating_columns,
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Vectorized vs row-wise column merging"
+    )
+    parser.add_argument("--rows", default="20000,100000", help="Comma-separated")
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--min-speedup", type=float, default=10.0)
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    configure_logging(level="WARNING")
+    report = {"columns": args.columns, "min_speedup": args.min_speedup, "runs": []}
+    failed = False
+    for rows in (int(n) for n in args.rows.split(",")):
+        df = make_frame(rows, args.columns)
+        for name, (vectorized, rowwise) in PAIRS.items():
+            fast, fast_result = _time(vectorized, df)
+            slow, slow_result = _time(rowwise, df)
+            run = {
+                "function": name,
+                "rows": rows,
+                "rowwise_seconds": round(slow, 4),
+                "vectorized_seconds": round(fast, 4),
+                "speedup": round(slow / fast, 1) if fast else None,
+                "identical": _same(fast_result, slow_result),
+            }
+            ok = run["identical"] and (run["speedup"] or 0) >= args.min_speedup
+            failed = failed or not ok
+            report["runs"].append(run)
+            print(
+                f"{name:<26} {rows:>8} rows  {slow:8.3f}s -> {fast:7.3f}s"
+                f"  {run['speedup']:>6}x  identical={run['identical']}",
+                flush=True,
+            )
+
+    report["failed"] = failed
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Cold-start benchmark:
+#
+#   python -m benchmarks.bench_startup [--runs 5] [--output startup.json]
+#
+# Run from DBMS Project/backend. Each run starts a fresh interpreter, imports the app (lazily, or with the
+# pipeline modules preloaded as serve.py does) and times the first request to
+# a light endpoint and to one that needs the pipeline modules.
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_RUN = """
+import json, sys, time
+start = time.perf_counter()
+import app
+result = {"import_app": time.perf_counter() - start}
+if sys.argv[1] == "preload":
+    start = time.perf_counter()
+    app.preload_pipeline_modules()
+    result["preload_pipeline"] = time.perf_counter() - start
+client = app.app.test_client()
+for name, url in (("first_light_request", "/api/jobs"),
+                  ("first_pipeline_request", "/api/decomposed_schemas")):
+    start = time.perf_counter()
+    client.get(url)
+    result[name] = time.perf_counter() - start
+result["ready_to_first_pipeline_response"] = sum(result.values())
+print(json.dumps(result))
+"""
+
+
+def run_once(mode: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _RUN, mode],
+        check=True,
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def benchmark(runs: int) -> dict:
+    report = {}
+    for mode in ("lazy", "preload"):
+        samples = [run_once(mode) for _ in range(runs)]
+        report[mode] = {
+            metric: round(statistics.median(s[metric] for s in samples), 4)
+            for metric in samples[0]
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend cold-start latency")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = benchmark(args.runs)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import math
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+from fd_modified import closure
+
+FD = Tuple[frozenset, frozenset]
+
+
+def _group_ids(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """
+    One integer per row identifying its combination of values in columns.
+    """
+    if len(columns) == 1:
+        return pd.factorize(df[columns[0]])[0]
+    return df.groupby(columns, sort=False).ngroup().to_numpy()
+
+
+def generate_relation(
+    rows: int = 1000,
+    key_columns: int = 2,
+    fd_count: int = 3,
+    free_columns: int = 1,
+    multivalued_columns: int = 0,
+    cardinality: int = 20,
+    max_lhs_size: int = 2,
+    noise_rate: float = 0.0,
+    seed: int = 0,
+) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Build a relation with a known structure:
+
+    - key columns k1..kn whose combination is unique (the planted key);
+    - dependent columns d1..dm, each a random function of its LHS: a proper
+      subset of the key (partial dependency) or an earlier dependent column
+      (transitive dependency), with `cardinality` distinct values;
+    - free columns f1.. with random values, determined only by the key;
+    - multi-valued columns m1.. holding comma-separated lists (1NF violations).
+
+    noise_rate is the fraction of rows whose dependent values are replaced by
+    random ones, which breaks the planted FDs. Returns the DataFrame and a
+    description of what was planted.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+
+    # Distinct key combinations: sample codes and split them into digits
+    base = max(2, math.ceil(rows ** (1 / key_columns)) + 1)
+    codes = rng.choice(base**key_columns, size=rows, replace=False)
+    key = [f"k{i + 1}" for i in range(key_columns)]
+    for i, name in enumerate(key):
+        data[name] = (codes // base**i) % base
+    df = pd.DataFrame(data)
+
+    planted: List[FD] = []
+    dependents: List[str] = []
+    for i in range(fd_count):
+        name = f"d{i + 1}"
+        if dependents and i % 2 == 1:
+            lhs = [dependents[rng.integers(len(dependents))]]
+        else:
+            size = int(rng.integers(1, min(max_lhs_size, max(1, key_columns - 1)) + 1))
+            lhs = sorted(rng.choice(key, size=size, replace=False).tolist())
+        groups = _group_ids(df, lhs)
+        lookup = rng.integers(0, cardinality, size=groups.max() + 1)
+        df[name] = lookup[groups]
+        planted.append((frozenset(lhs), frozenset([name])))
+        dependents.append(name)
+
+    for i in range(free_columns):
+        df[f"f{i + 1}"] = rng.integers(0, max(cardinality, rows), size=rows)
+
+    for i in range(multivalued_columns):
+        sizes = rng.integers(1, 4, size=rows)
+        tokens = rng.integers(0, cardinality, size=(rows, 3))
+        df[f"m{i + 1}"] = [
+            ",".join(f"t{t}" for t in row[:n]) for row, n in zip(tokens, sizes)
+        ]
+
+    noisy_rows = int(rows * noise_rate)
+    if noisy_rows and dependents:
+        for name in dependents:
+            positions = rng.choice(rows, size=noisy_rows, replace=False)
+            df.loc[positions, name] = rng.integers(0, cardinality, size=noisy_rows)
+
+    info = {
+        "rows": rows,
+        "key": key,
+        "fds": [[sorted(lhs), sorted(rhs)] for lhs, rhs in planted],
+        "multivalued": [f"m{i + 1}" for i in range(multivalued_columns)],
+        "noise_rate": noise_rate,
+        "seed": seed,
+    }
+    return df, info
+
+
+def planted_fds(info: Dict) -> List[FD]:
+    return [(frozenset(lhs), frozenset(rhs)) for lhs, rhs in info["fds"]]
+
+
+def check_recovery(info: Dict, detected: List[FD]) -> Dict:
+    """
+    Compare detected FDs with the planted ones. The detector reports one
+    minimal LHS per column, which may differ from the planted one (k1 -> d2
+    instead of d1 -> d2 when k1 -> d1), so a planted FD counts as recovered
+    when the detected FDs imply it, or when an FD found for its column has an
+    LHS no larger than the planted one and is implied by the planted FDs. Detected FDs that neither the planted
+    FDs nor the key explain are chance dependencies of the sample.
+    """
+    planted = planted_fds(info)
+    all_columns = set(info["key"]) | {a for _, rhs in planted for a in rhs}
+    structure = planted + [(frozenset(info["key"]), frozenset(all_columns))]
+
+    def explained(lhs, rhs) -> bool:
+        return rhs <= closure(set(lhs), structure)
+
+    recovered, missing = [], []
+    for lhs, rhs in planted:
+        found = rhs <= closure(set(lhs), detected) or any(
+            d_rhs == rhs
+            and len(d_lhs) <= len(lhs)
+            and rhs <= closure(set(d_lhs), planted)
+            for d_lhs, d_rhs in detected
+        )
+        (recovered if found else missing).append([sorted(lhs), sorted(rhs)])
+
+    planted_columns = {a for _, rhs in planted for a in rhs}
+    unexplained = [
+        [sorted(lhs), sorted(rhs)]
+        for lhs, rhs in detected
+        if rhs <= planted_columns and not explained(lhs, rhs)
+    ]
+    return {"recovered": recovered, "missing": missing, "unexplained": unexplained}
+
+
+def write_dataset(path: str, **options) -> Dict:
+    """
+    Generate a relation with generate_relation(**options) and save it as CSV.
+    Returns the description of what was planted.
+    """
+    df, info = generate_relation(**options)
+    df.to_csv(path, index=False)
+    return info
+
+
+def random_fds(
+    attribute_count: int, fd_count: int, max_lhs_size: int = 3, seed: int = 0
+) -> Tuple[List[str], List[FD]]:
+    """
+    Random FDs over attributes a1..an (no data), for the FD algorithms that
+    only work on attribute sets: minimal cover, closure, key search.
+    """
+    rng = np.random.default_rng(seed)
+    attributes = [f"a{i + 1}" for i in range(attribute_count)]
+    fds: List[FD] = []
+    for _ in range(fd_count):
+        size = int(rng.integers(1, max_lhs_size + 1))
+        lhs = rng.choice(attribute_count, size=size, replace=False)
+        rhs = [
+            i
+            for i in rng.choice(attribute_count, size=2, replace=False)
+            if i not in lhs
+        ]
+        if rhs:
+            fds.append(
+                (
+                    frozenset(attributes[i] for i in lhs),
+                    frozenset(attributes[i] for i in rhs),
+                )
+            )
+    return attributes, fds
+
+
+def synthetic_keymap(table_count: int, columns: int = 6, seed: int = 0) -> Dict:
+    """
+    A keymap (as written by normalization) of table_count tables, each with
+    an ID primary key and foreign keys to up to two earlier tables.
+    """
+    rng = np.random.default_rng(seed)
+    keymap = {}
+    for t in range(1, table_count + 1):
+        name = f"table{t}"
+        attributes = [f"{name}_id"] + [f"{name}_c{i}" for i in range(1, columns)]
+        foreign_keys = {}
+        if t > 1:
+            for ref in set(rng.integers(1, t, size=min(2, t - 1)).tolist()):
+                attributes.append(f"table{ref}_id")
+                foreign_keys[f"table{ref}_id"] = {
+                    "ref_table": f"table{ref}",
+                    "ref_column": f"table{ref}_id",
+                }
+        keymap[name] = {
+            "primary_keys": [f"{name}_id"],
+            "candidate_keys": [[f"{name}_id"]],
+            "superkeys": [[f"{name}_id"]],
+            "foreign_keys": foreign_keys,
+            "attributes": attributes,
+        }
+    return keymap
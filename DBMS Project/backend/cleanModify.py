@@ -1,5 +1,10 @@
+import numpy as np
 import pandas as pd
 import re
+import logging
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
 
 
 def normalize_columns(columns):
@@ -15,7 +20,7 @@ def clean_dataset(df: pd.DataFrame) -> pd.DataFrame:
         df_clean.columns.str.strip().str.lower().str.replace(" ", "_", regex=False)
     )
 
-    print("Columns after cleaning:", list(df_clean.columns))  # Debug print
+    logger.debug("Columns after cleaning", extra={"columns": list(df_clean.columns)})
 
     # 2. Remove duplicate rows
     df_clean = df_clean.drop_duplicates()
@@ -54,7 +59,7 @@ def flatten_repeating_columns(df: pd.DataFrame) -> pd.DataFrame:
     df_flat = df.copy()
 
     # NO re-normalization of columns here — use as-is
-    print("Columns before flattening:", list(df_flat.columns))  # Debug print
+    logger.debug("Columns before flattening", extra={"columns": list(df_flat.columns)})
 
     # Group columns by base name (e.g., sideeffect, sideeffect1, sideeffect_2)
     grouped_cols = {}
@@ -70,28 +75,61 @@ def flatten_repeating_columns(df: pd.DataFrame) -> pd.DataFrame:
         if len(cols) > 1:
             merged_name = base  # Keep base name
             # Combine all columns' non-empty values (lowercased)
-            df_flat[merged_name] = (
-                df_flat[cols]
-                .astype(str)
-                .fillna("")
-                .apply(
-                    lambda row: ", ".join(
-                        val.strip().lower()
-                        for val in row
-                        if val.strip().lower() not in ["", "nan", "none", "unknown"]
-                    ),
-                    axis=1,
-                )
+            df_flat[merged_name] = join_column_values(
+                [df_flat[col] for col in cols], ", ", _flattened_text
             )
             # Drop old columns except merged
             for col in cols:
                 if col != merged_name:
                     df_flat.drop(columns=col, inplace=True)
 
-    print("Columns after flattening:", list(df_flat.columns))  # Debug print
+    logger.debug("Columns after flattening", extra={"columns": list(df_flat.columns)})
     return df_flat
 
 
+def join_column_values(
+    columns: List[pd.Series], delimiter: str, to_text: Callable
+) -> np.ndarray:
+    """
+    Join aligned columns row-wise with delimiter, skipping values whose text is empty.
+    Works on dictionary codes: to_text converts each distinct value of a column once
+    and each distinct (joined-so-far, value) pair is joined once, so no per-row
+    Python calls are made. Missing values count as empty.
+    """
+    n_rows = len(columns[0]) if columns else 0
+    result_codes = np.zeros(n_rows, dtype=np.int64)
+    result_texts = np.array([""], dtype=object)
+
+    for column in columns:
+        # Mixed-type objects (1, 1.0, True) hash equal but print differently
+        if column.dtype == "object" and pd.api.types.infer_dtype(
+            column, skipna=True
+        ) not in ("string", "empty"):
+            column = column.map(str, na_action="ignore")
+
+        codes, uniques = pd.factorize(column)
+        texts = np.array(list(to_text(uniques)) + [""], dtype=object)
+        codes = np.where(codes < 0, len(texts) - 1, codes)
+
+        width = len(texts)
+        pair_codes, pairs = pd.factorize(result_codes * width + codes)
+        left = result_texts[pairs // width]
+        right = texts[pairs % width]
+        joined = np.where(
+            right == "", left, np.where(left == "", right, left + delimiter + right)
+        )
+        text_codes, result_texts = pd.factorize(joined)
+        result_texts = np.asarray(result_texts, dtype=object)
+        result_codes = text_codes[pair_codes]
+
+    return result_texts[result_codes]
+
+
+def _flattened_text(values) -> List[str]:
+    texts = pd.Series(values).astype(str).str.strip().str.lower()
+    return ["" if text in ["", "nan", "none", "unknown"] else text for text in texts]
+
+
 def normalize_formats(df: pd.DataFrame) -> pd.DataFrame:
     for col in df.columns:
         if df[col].dtype == "object":
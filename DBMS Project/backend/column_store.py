@@ -0,0 +1,146 @@
+import os
+import json
+import shutil
+import tempfile
+from typing import Dict
+import numpy as np
+import pandas as pd
+
+from artifact_store import read_table, table_path
+
+try:
+    import pyarrow as pa
+    from pyarrow import ipc
+except ImportError:  # Without pyarrow every process parses its own copy
+    pa = ipc = None
+
+# Mapped column files of a stored table live in <folder>/.columns/<name>/.
+# Dot-prefixed, so workspace listings and list_tables() skip them.
+COLUMN_STORE_DIR = ".columns"
+VALUES_FILE = "values.arrow"
+CODES_FILE = "codes.npy"
+SOURCE_FILE = "source.json"
+
+# Set COLUMN_STORE=0 to read tables with read_table() in every process instead
+COLUMN_STORE_ENABLED = pa is not None and os.environ.get("COLUMN_STORE", "1") != "0"
+
+
+def store_dir(folder: str, name: str) -> str:
+    return os.path.join(folder, COLUMN_STORE_DIR, name)
+
+
+def _source(folder: str, name: str) -> Dict:
+    """
+    Identity of the stored artifact the column files were built from.
+    """
+    path = table_path(folder, name)
+    if path is None:
+        raise FileNotFoundError(f"Table '{name}' not found")
+    stat = os.stat(path)
+    return {
+        "file": os.path.basename(path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+    }
+
+
+def _is_current(directory: str, source: Dict) -> bool:
+    try:
+        with open(os.path.join(directory, SOURCE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f) == source
+    except (OSError, ValueError):
+        return False
+
+
+def _write_values(df: pd.DataFrame, path: str):
+    # One uncompressed record batch: every column is a contiguous slice of
+    # the file that readers can map without decoding
+    table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+    with pa.OSFile(path, "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _write_codes(df: pd.DataFrame, path: str):
+    """
+    Integer factorization codes of every column (missing -> -1), as one
+    column-major int32 matrix, so each column is contiguous on disk.
+    """
+    codes = np.lib.format.open_memmap(
+        path,
+        mode="w+",
+        dtype=np.int32,
+        shape=(len(df), len(df.columns)),
+        fortran_order=True,
+    )
+    for i, col in enumerate(df.columns):
+        codes[:, i] = pd.factorize(df[col])[0]
+    codes.flush()
+    del codes
+
+
+def build_column_store(folder: str, name: str) -> str:
+    """
+    Write the mapped value and code files of a stored table, unless they
+    are already current. Built in a scratch directory and renamed into
+    place, so concurrent builders and readers never see partial files.
+    Returns the store directory.
+    """
+    directory = store_dir(folder, name)
+    source = _source(folder, name)
+    if _is_current(directory, source):
+        return directory
+
+    df = read_table(folder, name)
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    scratch = tempfile.mkdtemp(prefix=f".{name}.", dir=parent)
+    try:
+        _write_values(df, os.path.join(scratch, VALUES_FILE))
+        _write_codes(df, os.path.join(scratch, CODES_FILE))
+        with open(os.path.join(scratch, SOURCE_FILE), "w", encoding="utf-8") as f:
+            json.dump(source, f)
+
+        if os.path.exists(directory):
+            # Processes that still map the old files keep them until they unmap
+            stale = tempfile.mkdtemp(prefix=f".{name}.stale.", dir=parent)
+            try:
+                os.replace(directory, os.path.join(stale, "old"))
+            except FileNotFoundError:
+                pass
+            shutil.rmtree(stale, ignore_errors=True)
+        try:
+            os.rename(scratch, directory)
+        except OSError:
+            if not _is_current(directory, source):
+                raise
+            # Another process finished the same build first
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return directory
+
+
+def open_values(folder: str, name: str) -> pd.DataFrame:
+    """
+    The stored table as a DataFrame over the memory-mapped Arrow file.
+    String columns and numeric columns without missing values reference the
+    mapped pages directly, which every process shares through the page cache.
+    """
+    directory = build_column_store(folder, name)
+    source = pa.memory_map(os.path.join(directory, VALUES_FILE), "r")
+    table = ipc.open_file(source).read_all()
+    # split_blocks keeps one block per column instead of copying them together
+    return table.to_pandas(split_blocks=True)
+
+
+def open_codes(folder: str, name: str) -> pd.DataFrame:
+    """
+    The integer codes of the stored table as a read-only DataFrame whose
+    single block is the memory-mapped matrix (no copy).
+    """
+    directory = build_column_store(folder, name)
+    codes = np.load(os.path.join(directory, CODES_FILE), mmap_mode="r")
+    columns = ipc.open_file(
+        pa.memory_map(os.path.join(directory, VALUES_FILE), "r")
+    ).schema.names
+    return pd.DataFrame(codes, columns=columns, copy=False)
@@ -1,41 +1,390 @@
 import os
+import csv
+import json
+import datetime
+import tempfile
+from typing import Dict, List
+import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # The multi-threaded Arrow parser is optional
+    pa = None
+
+# Rows per chunk when re-encoding delimited text, and bytes used to sniff the delimiter
+CHUNK_ROWS = 50_000
+SNIFF_BYTES = 64 * 1024
+# Bytes per block handed to each Arrow parser thread
+ARROW_BLOCK_SIZE = 16 * 1024 * 1024
+
+# Parse text the way pd.read_csv does by default, so both backends agree
+_PANDAS_NA_VALUES = [
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+]
+_PANDAS_TRUE_VALUES = ["True", "TRUE", "true"]
+_PANDAS_FALSE_VALUES = ["False", "FALSE", "false"]
+
+
+def sniff_delimiter(file_path: str, default: str = ",") -> str:
+    """
+    Guess the delimiter of a text file from its first SNIFF_BYTES bytes.
+    """
+    with open(file_path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(SNIFF_BYTES)
+    # Only sniff complete lines so a cut-off last row does not confuse the sniffer
+    if "\n" in sample:
+        sample = sample[: sample.rindex("\n")]
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",\t;|").delimiter
+    except csv.Error:
+        return default
+
+
+def _header_names(file_path: str, delimiter: str) -> List[str]:
+    """
+    Column names of a delimited file, renamed the way pd.read_csv does
+    (blank names become "Unnamed: i", repeats get a ".1", ".2" suffix).
+    """
+    with open(file_path, "r", encoding="utf-8-sig", newline="") as f:
+        header = next(csv.reader(f, delimiter=delimiter), [])
+
+    names, seen = [], set()
+    for i, name in enumerate(header):
+        name = name or f"Unnamed: {i}"
+        candidate, n = name, 0
+        while candidate in seen:
+            n += 1
+            candidate = f"{name}.{n}"
+        seen.add(candidate)
+        names.append(candidate)
+    return names
+
+
+def _arrow_options(
+    names: List[str],
+    delimiter: str,
+    column_types: Dict,
+    block_size: int,
+    strings_can_be_null: bool = True,
+):
+    read_options = pacsv.ReadOptions(
+        use_threads=True,
+        block_size=block_size,
+        column_names=names,
+        skip_rows=1,
+        encoding="utf8",
+    )
+    parse_options = pacsv.ParseOptions(delimiter=delimiter, newlines_in_values=True)
+    convert_options = pacsv.ConvertOptions(
+        column_types=column_types,
+        null_values=_PANDAS_NA_VALUES,
+        true_values=_PANDAS_TRUE_VALUES,
+        false_values=_PANDAS_FALSE_VALUES,
+        strings_can_be_null=strings_can_be_null,
+    )
+    return read_options, parse_options, convert_options
+
+
+def _copy_delimited_arrow(
+    file_path: str, csv_path: str, delimiter: str, block_size: int
+):
+    """
+    Stream a delimited file through the multi-threaded Arrow CSV reader.
+    Every column is read as text, so values are copied unchanged.
+    """
+    names = _header_names(file_path, delimiter)
+    # Empty cells stay empty strings rather than nulls
+    reader = pacsv.open_csv(
+        file_path,
+        *_arrow_options(
+            names,
+            delimiter,
+            {name: pa.string() for name in names},
+            block_size,
+            strings_can_be_null=False,
+        ),
+    )
+    write_options = pacsv.WriteOptions(quoting_style="needed")
+    with pacsv.CSVWriter(
+        csv_path, reader.schema, write_options=write_options
+    ) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+
+
+def _copy_delimited(
+    file_path: str, csv_path: str, delimiter: str, block_size: int = ARROW_BLOCK_SIZE
+):
+    """
+    Re-encode a delimited text file as comma-separated CSV, CHUNK_ROWS rows at a time.
+    Cells are kept as text so every chunk is written the same way.
+    Uses the Arrow reader when available and falls back to pandas if it fails.
+    """
+    if pa is not None:
+        try:
+            _copy_delimited_arrow(file_path, csv_path, delimiter, block_size)
+            return
+        except (pa.ArrowException, UnicodeDecodeError):
+            pass
+
+    reader = pd.read_csv(
+        file_path,
+        sep=delimiter,
+        dtype=str,
+        keep_default_na=False,
+        encoding="utf-8-sig",
+        chunksize=CHUNK_ROWS,
+    )
+    with open(csv_path, "w", encoding="utf-8", newline="") as out:
+        for i, chunk in enumerate(reader):
+            chunk.to_csv(out, index=False, header=(i == 0))
+
+
+def _schema_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + ".schema.json"
+
+
+def infer_csv_schema(csv_path: str, block_size: int = ARROW_BLOCK_SIZE) -> Dict:
+    """
+    Infer column types from the first block of a converted CSV and save them
+    next to it, to be used as type hints by read_converted_csv.
+    Date and time columns are kept as text, matching pd.read_csv.
+    """
+    if pa is None:
+        return {}
+
+    schema = _infer_column_types(csv_path, ",", block_size)
+    with open(_schema_path(csv_path), "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=2)
+    return schema
+
+
+def _infer_column_types(file_path: str, delimiter: str, block_size: int) -> Dict:
+    names = _header_names(file_path, delimiter)
+    reader = pacsv.open_csv(
+        file_path, *_arrow_options(names, delimiter, {}, block_size)
+    )
+    schema = {}
+    for field in reader.schema:
+        kind = field.type
+        if pa.types.is_temporal(kind) or not (
+            pa.types.is_integer(kind)
+            or pa.types.is_floating(kind)
+            or pa.types.is_boolean(kind)
+            or pa.types.is_null(kind)
+        ):
+            kind = pa.string()
+        schema[field.name] = str(kind)
+    return schema
+
+
+def _read_typed(
+    file_path: str, delimiter: str, schema: Dict, block_size: int
+) -> pd.DataFrame:
+    names = _header_names(file_path, delimiter)
+    column_types = {
+        name: pa.type_for_alias(schema.get(name, "string")) for name in names
+    }
+    table = pacsv.read_csv(
+        file_path, *_arrow_options(names, delimiter, column_types, block_size)
+    )
+    df = table.to_pandas()
+    # pandas marks missing values in boolean text columns with NaN, not None
+    for field in table.schema:
+        if pa.types.is_boolean(field.type) and df[field.name].hasnans:
+            df[field.name] = df[field.name].where(df[field.name].notna(), np.nan)
+    return df
+
+
+def read_converted_csv(
+    csv_path: str, block_size: int = ARROW_BLOCK_SIZE
+) -> pd.DataFrame:
+    """
+    Load a converted CSV with the multi-threaded Arrow parser, using the saved
+    schema as explicit column types. Falls back to pd.read_csv when pyarrow is
+    missing or the file does not parse with those types.
+    """
+    if pa is not None:
+        try:
+            schema_path = _schema_path(csv_path)
+            if os.path.exists(schema_path) and os.path.getmtime(
+                schema_path
+            ) >= os.path.getmtime(csv_path):
+                with open(schema_path, "r", encoding="utf-8") as f:
+                    schema = json.load(f)
+            else:
+                schema = infer_csv_schema(csv_path, block_size)
+            return _read_typed(csv_path, ",", schema, block_size)
+        except (pa.ArrowException, ValueError):
+            pass
+
+    return pd.read_csv(csv_path, encoding="utf-8")
+
+
+def _excel_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime):
+        if value.time() == datetime.time(0, 0):
+            return value.date().isoformat()
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def _copy_xlsx(file_path: str, csv_path: str):
+    """
+    Stream the first worksheet of an .xlsx workbook to CSV row by row (read-only mode).
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        while header and header[-1] is None:
+            header.pop()
+        width = len(header)
+
+        with open(csv_path, "w", encoding="utf-8", newline="") as out:
+            writer = csv.writer(out)
+            writer.writerow([_excel_cell(v) for v in header])
+            for row in rows:
+                cells = list(row[:width]) + [None] * (width - len(row))
+                if all(v is None for v in cells):
+                    continue  # Skip blank rows
+                writer.writerow([_excel_cell(v) for v in cells])
+    finally:
+        workbook.close()
+
+
+def _json_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _copy_ndjson(file_path: str, csv_path: str):
+    """
+    Convert newline-delimited JSON records to CSV line by line.
+    The first pass collects the union of keys so the header is known up front.
+    """
+    columns = {}
+    with open(file_path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            if line.strip():
+                columns.update(dict.fromkeys(json.loads(line)))
+
+    with open(file_path, "r", encoding="utf-8-sig") as f, open(
+        csv_path, "w", encoding="utf-8", newline=""
+    ) as out:
+        writer = csv.writer(out)
+        writer.writerow(list(columns))
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                writer.writerow([_json_cell(record.get(col)) for col in columns])
+
+
+def _is_ndjson(file_path: str) -> bool:
+    """
+    A .json file holding one object per line rather than a single JSON document.
+    """
+    with open(file_path, "r", encoding="utf-8-sig") as f:
+        first_line = ""
+        for first_line in f:
+            if first_line.strip():
+                break
+    first_line = first_line.strip()
+    if not first_line.startswith("{"):
+        return False
+    try:
+        json.loads(first_line)
+    except ValueError:
+        return False
+    return True
+
+
 def convert_to_csv(file_path: str, output_folder="processed"):
     """
-    Converts Excel (.xlsx, .xls), CSV, TSV, TXT, and JSON files to CSV.
+    Converts Excel (.xlsx, .xls), CSV, TSV, TXT, JSON and NDJSON files to CSV.
     Saves the converted CSV inside output_folder.
 
+    Conversion streams the input, so peak memory does not grow with the file size.
+    Legacy .xls workbooks and JSON array documents cannot be streamed and are
+    loaded with pandas.
+
     Returns:
         csv_path: path of saved CSV file
-        df: pandas DataFrame loaded from file
     """
-    
+
     base_name = os.path.basename(file_path)
     file_name, ext = os.path.splitext(base_name)
     ext = ext.lower()
 
-    if ext in ['.xlsx', '.xls']:
-        df = pd.read_excel(file_path)
-    elif ext == '.csv':
-        df = pd.read_csv(file_path)
-    elif ext in ['.tsv', '.txt']:
-        try:
-            df = pd.read_csv(file_path, delimiter='\t')
-        except Exception:
-            df = pd.read_csv(file_path)
-    elif ext == '.json':
-        df = pd.read_json(file_path)
-    else:
-        raise ValueError(f"Unsupported file extension: {ext}")
-
     os.makedirs(output_folder, exist_ok=True)
 
     csv_name = f"{file_name}_converted.csv"
     csv_path = os.path.join(output_folder, csv_name)
 
-    df.to_csv(csv_path, index=False)
+    if ext == ".xlsx":
+        _copy_xlsx(file_path, csv_path)
+    elif ext == ".xls":
+        pd.read_excel(file_path).to_csv(csv_path, index=False)
+    elif ext == ".csv":
+        _copy_delimited(file_path, csv_path, sniff_delimiter(file_path, ","))
+    elif ext in [".tsv", ".txt"]:
+        _copy_delimited(file_path, csv_path, sniff_delimiter(file_path, "\t"))
+    elif ext in [".ndjson", ".jsonl"] or (ext == ".json" and _is_ndjson(file_path)):
+        _copy_ndjson(file_path, csv_path)
+    elif ext == ".json":
+        pd.read_json(file_path).to_csv(csv_path, index=False)
+    else:
+        raise ValueError(f"Unsupported file extension: {ext}")
 
-    return csv_path, df
+    # Type hints for the multi-threaded reader used by later steps
+    infer_csv_schema(csv_path)
 
+    return csv_path
+
+
+def load_dataset(file_path: str, block_size: int = ARROW_BLOCK_SIZE) -> pd.DataFrame:
+    """
+    Load an uploaded file straight into a DataFrame, typed the same way as
+    convert_to_csv followed by read_converted_csv but without writing the CSV.
+    Delimited files are parsed in place; other formats still need the
+    conversion and go through a temporary CSV.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in [".csv", ".tsv", ".txt"]:
+        delimiter = sniff_delimiter(file_path, "," if ext == ".csv" else "\t")
+        if pa is not None:
+            try:
+                schema = _infer_column_types(file_path, delimiter, block_size)
+                return _read_typed(file_path, delimiter, schema, block_size)
+            except (pa.ArrowException, UnicodeDecodeError, ValueError):
+                pass
 
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        return read_converted_csv(convert_to_csv(file_path, output_folder=tmp_dir))
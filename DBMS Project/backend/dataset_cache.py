@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple, FrozenSet
+import numpy as np
+import pandas as pd
+
+from artifact_store import read_table, table_path
+from column_store import COLUMN_STORE_ENABLED, open_codes, open_values
+from result_cache import frame_hash
+from metrics import REGISTRY, cache_collector
+
+FD = Tuple[FrozenSet[str], FrozenSet[str]]
+
+# Memory budget for cached datasets, in MB
+DEFAULT_CACHE_MB = int(os.environ.get("DATASET_CACHE_MB", "512"))
+
+
+def _estimate_size(value) -> int:
+    """
+    Approximate memory footprint of a cached value in bytes.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            _estimate_size(k) + _estimate_size(v) for k, v in value.items()
+        )
+    return sys.getsizeof(value)
+
+
+class DatasetCache:
+    """
+    Process-local LRU cache of parsed pipeline data (DataFrames, encoded
+    columns, FD lists). Entries are keyed by file path, mtime and size, so a
+    rewritten file is never served stale, and evicted once the total size
+    exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, Tuple[object, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str, kind: str, loader: Callable[[], object]):
+        """
+        Return the cached value of the given kind for path, loading it on a miss.
+        """
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, kind)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        value = loader()
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return value  # Too large to keep; serve it uncached
+
+        with self._lock:
+            # Drop entries for older versions of the same file
+            for old_key in [
+                k for k in self._entries if k[0] == key[0] and k[3] == kind
+            ]:
+                self._discard(old_key)
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+        return value
+
+    def _discard(self, key):
+        _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+dataset_cache = DatasetCache(DEFAULT_CACHE_MB * 1024 * 1024)
+REGISTRY.add_collector(cache_collector("dataset", dataset_cache.stats))
+
+
+def _resolve(folder: str, name: str) -> str:
+    path = table_path(folder, name)
+    if path is None:
+        raise FileNotFoundError(f"Table '{name}' not found")
+    return path
+
+
+def load_table(
+    folder: str, name: str, columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Cached read_table, over the memory-mapped column store when enabled.
+    Returns a shallow copy so callers can rename columns without touching
+    the cached frame.
+    """
+    path = _resolve(folder, name)
+    if COLUMN_STORE_ENABLED:
+        df = dataset_cache.get(path, "mapped", lambda: open_values(folder, name))
+    else:
+        df = dataset_cache.get(path, "frame", lambda: read_table(folder, name))
+    if columns is not None:
+        return df[columns].copy(deep=False)
+    return df.copy(deep=False)
+
+
+def encode_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Replace every column by its integer factorization codes (missing -> -1).
+    Codes preserve equality, so FDs and key checks give the same answers.
+    """
+    encoded = {}
+    for col in df.columns:
+        encoded[col] = pd.factorize(df[col])[0].astype(np.int32)
+    return pd.DataFrame(encoded, index=df.index)
+
+
+def load_encoded(folder: str, name: str) -> pd.DataFrame:
+    """
+    Cached dictionary-encoded version of a stored table.
+    """
+    path = _resolve(folder, name)
+    if COLUMN_STORE_ENABLED:
+        df = dataset_cache.get(path, "mapped_codes", lambda: open_codes(folder, name))
+    else:
+        df = dataset_cache.get(
+            path, "encoded", lambda: encode_columns(load_table(folder, name))
+        )
+    return df.copy(deep=False)
+
+
+def load_hash(folder: str, name: str) -> str:
+    """
+    Cached content hash of a stored table, used as result cache key.
+    """
+    return dataset_cache.get(
+        _resolve(folder, name), "hash", lambda: frame_hash(load_table(folder, name))
+    )
+
+
+def load_fds(fd_path: str) -> List[FD]:
+    """
+    Cached FDs from a detected_fds.json file.
+    """
+
+    def loader():
+        with open(fd_path, "r", encoding="utf-8") as f:
+            return [(frozenset(fd["lhs"]), frozenset(fd["rhs"])) for fd in json.load(f)]
+
+    return list(dataset_cache.get(fd_path, "fds", loader))
@@ -0,0 +1,192 @@
+import os
+from collections import Counter, deque
+from typing import Dict, List, Set
+
+# Largest subject area; bigger FK-connected groups are split by community
+ER_CLUSTER_SIZE = int(os.environ.get("ER_CLUSTER_SIZE", "25"))
+# Schemas with more tables than this are drawn as an overview plus one
+# diagram per subject area instead of a single diagram
+ER_MAX_TABLES = int(os.environ.get("ER_MAX_TABLES", "40"))
+
+
+def fk_adjacency(keymap: Dict) -> Dict[str, Set[str]]:
+    """
+    Undirected FK graph: each table mapped to the tables it references or
+    is referenced by.
+    """
+    adjacency = {table: set() for table in keymap}
+    for table, key_info in keymap.items():
+        for ref_info in key_info.get("foreign_keys", {}).values():
+            ref_table = ref_info.get("ref_table")
+            if ref_table in adjacency and ref_table != table:
+                adjacency[table].add(ref_table)
+                adjacency[ref_table].add(table)
+    return adjacency
+
+
+def _components(adjacency: Dict[str, Set[str]]) -> List[List[str]]:
+    seen, components = set(), []
+    for start in sorted(adjacency):
+        if start in seen:
+            continue
+        seen.add(start)
+        component, queue = [], deque([start])
+        while queue:
+            table = queue.popleft()
+            component.append(table)
+            for other in sorted(adjacency[table] - seen):
+                seen.add(other)
+                queue.append(other)
+        components.append(component)
+    return components
+
+
+def _communities(tables: List[str], adjacency: Dict[str, Set[str]]) -> List[List[str]]:
+    """
+    Label propagation: every table repeatedly takes the most common label of
+    its neighbours until nothing changes. A table keeps its label when that
+    is among the most common, which stops one label flooding the component;
+    other ties go to the smallest label.
+    Deterministic, so the same schema always gives the same areas.
+    """
+    members = set(tables)
+    label = {table: table for table in tables}
+    for _ in range(50):
+        changed = False
+        for table in sorted(tables):
+            counts = Counter(label[n] for n in adjacency[table] if n in members)
+            if not counts:
+                continue
+            best = max(counts.values())
+            candidates = [lbl for lbl, count in counts.items() if count == best]
+            if label[table] in candidates:
+                continue
+            new = min(candidates)
+            if new != label[table]:
+                label[table] = new
+                changed = True
+        if not changed:
+            break
+    groups: Dict[str, List[str]] = {}
+    for table in tables:
+        groups.setdefault(label[table], []).append(table)
+    return list(groups.values())
+
+
+def _merge(
+    communities: List[List[str]], adjacency: Dict[str, Set[str]], size: int
+) -> List[List[str]]:
+    """
+    Repeatedly merge the smallest community into the one it has most foreign
+    keys to, while the result has at most size tables.
+    """
+    groups = [list(c) for c in communities]
+    while True:
+        group_of = {t: i for i, group in enumerate(groups) for t in group}
+        for i in sorted(range(len(groups)), key=lambda i: (len(groups[i]), i)):
+            links = Counter(
+                group_of[n] for t in groups[i] for n in adjacency[t] if n in group_of
+            )
+            links.pop(i, None)
+            fits = [
+                (count, -j)
+                for j, count in links.items()
+                if len(groups[i]) + len(groups[j]) <= size
+            ]
+            if fits:
+                j = -max(fits)[1]
+                groups[j].extend(groups[i])
+                del groups[i]
+                break
+        else:
+            return groups
+
+
+def _split(tables: List[str], adjacency: Dict[str, Set[str]], size: int):
+    # Consecutive chunks of a breadth-first order keep neighbours together
+    members = set(tables)
+    sub = {t: adjacency[t] & members for t in tables}
+    order = [t for component in _components(sub) for t in component]
+    return [order[i : i + size] for i in range(0, len(order), size)]
+
+
+def cluster_tables(keymap: Dict, max_size: int = ER_CLUSTER_SIZE) -> List[List[str]]:
+    """
+    Group the tables into subject areas of at most max_size tables: the
+    connected components of the FK graph, with large components split into
+    communities. Largest areas first; tables without foreign keys come last,
+    grouped together.
+    """
+    adjacency = fk_adjacency(keymap)
+    clusters, isolated = [], []
+    for component in _components(adjacency):
+        if len(component) == 1:
+            isolated.extend(component)
+        elif len(component) <= max_size:
+            clusters.append(component)
+        else:
+            communities = _communities(component, adjacency)
+            for community in _merge(communities, adjacency, max_size):
+                if len(community) <= max_size:
+                    clusters.append(community)
+                else:
+                    clusters.extend(_split(community, adjacency, max_size))
+
+    # Most connected tables first: they name the area in the overview
+    def ordered(tables):
+        return sorted(tables, key=lambda t: (-len(adjacency[t]), t))
+
+    clusters = sorted((ordered(c) for c in clusters), key=lambda c: (-len(c), min(c)))
+    return clusters + [
+        isolated[i : i + max_size] for i in range(0, len(isolated), max_size)
+    ]
+
+
+def sub_keymap(keymap: Dict, tables) -> Dict:
+    """
+    The keymap entries of the given tables, in keymap order.
+    """
+    tables = set(tables)
+    return {name: info for name, info in keymap.items() if name in tables}
+
+
+def neighborhood(keymap: Dict, table: str, depth: int = 1) -> Dict:
+    """
+    The keymap of table and the tables within depth FK hops of it.
+    """
+    if table not in keymap:
+        raise KeyError(table)
+    adjacency = fk_adjacency(keymap)
+    seen, frontier = {table}, {table}
+    for _ in range(depth):
+        frontier = {n for t in frontier for n in adjacency[t]} - seen
+        if not frontier:
+            break
+        seen |= frontier
+    return sub_keymap(keymap, seen)
+
+
+def overview_graph(keymap: Dict, clusters: List[List[str]]) -> Dict:
+    """
+    The subject areas as a graph: one node per area with its tables, and
+    one edge per pair of areas linked by foreign keys, with their count.
+    """
+    area_of = {
+        table: f"area{i + 1}" for i, tables in enumerate(clusters) for table in tables
+    }
+    links = Counter()
+    for table, key_info in keymap.items():
+        for ref_info in key_info.get("foreign_keys", {}).values():
+            ref_table = ref_info.get("ref_table")
+            if ref_table in area_of and area_of[ref_table] != area_of[table]:
+                links[(area_of[table], area_of[ref_table])] += 1
+    return {
+        "nodes": [
+            {"id": f"area{i + 1}", "tables": tables}
+            for i, tables in enumerate(clusters)
+        ],
+        "edges": [
+            {"source": source, "target": target, "foreign_keys": count}
+            for (source, target), count in sorted(links.items())
+        ],
+    }
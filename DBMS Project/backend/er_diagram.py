@@ -1,177 +1,422 @@
-from graphviz import Digraph
 import os
+import json
+import html
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from graphviz import Digraph
 
-PROCESSED_FOLDER = os.path.join(os.getcwd(), "processed")
-
-
-def generate_er_diagram_from_keymap(base_name: str, keymap: dict) -> bytes:
-    dot = Digraph(comment="ER Diagram", format="png")
-    dot.attr(rankdir="TB", splines="curved", nodesep="0.7", ranksep="0.7")
-    dot.attr("graph", dpi="300")
-    dot.attr("node", shape="plaintext", fontname="Helvetica", fontsize="12")
-
-    table_border_color = "#4b555c"
-
-    for table_name, key_info in keymap.items():
-        attributes = key_info.get("attributes", [])
-        primary_keys = set(key_info.get("primary_keys", []))
-        foreign_keys = key_info.get("foreign_keys", {})
-
-        # Build HTML-like label for the table node
-        label = f"""<
-        <TABLE BORDER="0" CELLBORDER="1" CELLSPACING="2" CELLPADDING="8" COLOR="{table_border_color}" STYLE="ROUNDED">
-            <TR><TD BGCOLOR="{table_border_color}" ALIGN="CENTER">
-                <FONT COLOR="white" POINT-SIZE="16"><B>{table_name}</B></FONT>
-            </TD></TR>
-        """
-
-        for attr in attributes:
-            if attr in primary_keys:
-                attr_label = f"<B>{attr} (PK)</B>"
-            elif attr in foreign_keys:
-                attr_label = f"<I>{attr} (FK)</I>"
-            else:
-                attr_label = attr
-            # Add attribute row with PORT named as attribute for edges
-            label += f'<TR><TD PORT="{attr}" ALIGN="LEFT"><FONT POINT-SIZE="14">{attr_label}</FONT></TD></TR>'
-
-        label += "</TABLE>>"
-        dot.node(table_name, label=label)
-
-    # Draw FK edges: from FK attribute port in current table
-    # to PK attribute port in referenced table (better visualization)
+from er_clusters import (
+    ER_CLUSTER_SIZE,
+    cluster_tables,
+    neighborhood,
+    overview_graph,
+    sub_keymap,
+)
+from result_cache import json_hash
+from metrics import REGISTRY, cache_collector
+
+# Output formats and their MIME types; "json" is the node/edge graph for
+# client-side rendering and needs no Graphviz
+ER_FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "json": "application/json",
+}
+
+# Layout options callers may override; dpi only applies to PNG output
+DEFAULT_STYLE = {
+    "rankdir": "TB",
+    "splines": "curved",
+    "nodesep": "0.3",
+    "ranksep": "0.5",
+    "dpi": "300",
+}
+_STYLE_CHOICES = {
+    "rankdir": ("TB", "LR", "BT", "RL"),
+    "splines": ("curved", "ortho", "spline", "polyline", "line", "true", "false"),
+}
+_STYLE_RANGES = {
+    "nodesep": (0.02, 10.0),
+    "ranksep": (0.02, 10.0),
+    "dpi": (36, 600),
+}
+
+# Rendered diagrams kept in memory, by keymap hash, format and style
+ER_RENDER_CACHE_MB = int(os.environ.get("ER_RENDER_CACHE_MB", "64"))
+# Parallel dot processes when rendering the pages of a large schema
+ER_RENDER_WORKERS = int(
+    os.environ.get("ER_RENDER_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+# Table names listed in an overview node before "..."
+OVERVIEW_TABLES_SHOWN = 8
+
+TABLE_BORDER_COLOR = "#4b555c"
+
+
+def er_style(options: Optional[Dict] = None) -> Dict:
+    """
+    DEFAULT_STYLE with the given overrides, validated. Raises ValueError for
+    unknown options or values out of range.
+    """
+    style = dict(DEFAULT_STYLE)
+    for name, value in (options or {}).items():
+        if name not in DEFAULT_STYLE:
+            raise ValueError(f"Unknown ER diagram option '{name}'")
+        value = str(value)
+        if name in _STYLE_CHOICES:
+            if value not in _STYLE_CHOICES[name]:
+                raise ValueError(
+                    f"{name} must be one of {', '.join(_STYLE_CHOICES[name])}"
+                )
+        else:
+            low, high = _STYLE_RANGES[name]
+            try:
+                number = float(value)
+            except ValueError:
+                raise ValueError(f"{name} must be a number")
+            if not low <= number <= high:
+                raise ValueError(f"{name} must be between {low} and {high}")
+        style[name] = value
+    return style
+
+
+def _fk_edges(keymap: Dict) -> Iterator[Tuple[str, str, str, Optional[str]]]:
+    """
+    (table, fk_column, ref_table, ref_column) for every foreign key whose
+    referenced table is in the keymap. ref_column is the referenced column
+    if it is a primary key, else the first primary key, else None.
+    """
     for table_name, key_info in keymap.items():
-        foreign_keys = key_info.get("foreign_keys", {})
-
-        for fk_attr, ref_info in foreign_keys.items():
-            # FIX: ref_info is a dict with 'ref_table' and 'ref_column'
+        for fk_attr, ref_info in key_info.get("foreign_keys", {}).items():
             ref_table = ref_info.get("ref_table")
             ref_column = ref_info.get("ref_column")
-
-            if ref_table in keymap:
-                pk_attrs = set(keymap[ref_table].get("primary_keys", []))
-                # Use referenced column if it is a PK, else fallback to first PK
-                target_port = (
-                    ref_column
-                    if ref_column in pk_attrs
-                    else (list(pk_attrs)[0] if pk_attrs else "")
-                )
-                if target_port:
-                    dot.edge(
-                        f"{table_name}:{fk_attr}",
-                        f"{ref_table}:{target_port}",
-                        color=table_border_color,
-                        fontsize="10",
-                        arrowhead="normal",
-                    )
-                else:
-                    # fallback edge without ports if no pk attribute found
-                    dot.edge(
-                        table_name, ref_table, color=table_border_color, fontsize="10"
-                    )
-
-    # Render to temporary file in PROCESSED_FOLDER
-    temp_filepath = os.path.join(PROCESSED_FOLDER, f"{base_name}_temp")
-    dot.render(filename=temp_filepath, cleanup=False)  # creates temp_filepath + ".png"
-
-    png_path = temp_filepath + ".png"
-    with open(png_path, "rb") as img_file:
-        image_bytes = img_file.read()
-
-    # Clean up temporary files
-    for ext in [".png", ".gv"]:
-        try:
-            os.remove(temp_filepath + ext)
-        except OSError:
-            pass
-
-    return image_bytes
-
-
-from graphviz import Digraph
-import os
-
-PROCESSED_FOLDER = os.path.join(os.getcwd(), "processed")
-
-
-def generate_er_diagram_from_keymap(base_name: str, keymap: dict) -> bytes:
-    dot = Digraph(comment="ER Diagram", format="png")
-    dot.attr(rankdir="TB", splines="curved", nodesep="0.3", ranksep="0.5")
-    dot.attr("graph", dpi="300")
-    dot.attr("node", shape="plaintext", fontname="Helvetica", fontsize="20")
-
-    table_border_color = "#4b555c"
-
+            if ref_table not in keymap:
+                continue
+            pk_attrs = keymap[ref_table].get("primary_keys", [])
+            if ref_column not in pk_attrs:
+                ref_column = pk_attrs[0] if pk_attrs else None
+            yield table_name, fk_attr, ref_table, ref_column
+
+
+def er_graph(keymap: Dict) -> Dict:
+    """
+    The ER diagram as plain data: one node per table with its columns and
+    one edge per foreign key.
+    """
+    nodes = []
     for table_name, key_info in keymap.items():
-        attributes = key_info.get("attributes", [])
         primary_keys = set(key_info.get("primary_keys", []))
         foreign_keys = key_info.get("foreign_keys", {})
+        nodes.append(
+            {
+                "id": table_name,
+                "columns": [
+                    {
+                        "name": attr,
+                        "primary_key": attr in primary_keys,
+                        "foreign_key": attr in foreign_keys,
+                    }
+                    for attr in key_info.get("attributes", [])
+                ],
+            }
+        )
+    edges = [
+        {
+            "source": table,
+            "source_column": fk_attr,
+            "target": ref_table,
+            "target_column": ref_column,
+        }
+        for table, fk_attr, ref_table, ref_column in _fk_edges(keymap)
+    ]
+    return {"nodes": nodes, "edges": edges}
+
+
+def _table_label(table_name: str, key_info: Dict) -> str:
+    primary_keys = set(key_info.get("primary_keys", []))
+    foreign_keys = key_info.get("foreign_keys", {})
+
+    # HTML-like label with one row (and port, for the edges) per attribute
+    label = f"""<
+    <TABLE BORDER="0" CELLBORDER="1" CELLSPACING="10" CELLPADDING="18" COLOR="{TABLE_BORDER_COLOR}" STYLE="ROUNDED">
+        <TR>
+            <TD BGCOLOR="{TABLE_BORDER_COLOR}" ALIGN="CENTER" WIDTH="320" HEIGHT="20">
+                <FONT COLOR="white" POINT-SIZE="20"><B>{html.escape(table_name)}</B></FONT>
+            </TD>
+        </TR>
+    """
+    for attr in key_info.get("attributes", []):
+        text = html.escape(attr)
+        if attr in primary_keys:
+            attr_label = f"<B>{text} (PK)</B>"
+        elif attr in foreign_keys:
+            attr_label = f"<I>{text} (FK)</I>"
+        else:
+            attr_label = text
+        label += f'<TR><TD PORT="{html.escape(attr, quote=True)}" ALIGN="LEFT"><FONT POINT-SIZE="14">{attr_label}</FONT></TD></TR>'
+    return label + "</TABLE>>"
+
+
+def build_er_digraph(keymap: Dict, style: Optional[Dict] = None, fmt: str = "png"):
+    style = er_style(style)
+    dot = Digraph(comment="ER Diagram")
+    dot.attr(
+        rankdir=style["rankdir"],
+        splines=style["splines"],
+        nodesep=style["nodesep"],
+        ranksep=style["ranksep"],
+    )
+    if fmt == "png":
+        dot.attr("graph", dpi=style["dpi"])
+    dot.attr("node", shape="plaintext", fontname="Helvetica", fontsize="20")
 
-        # Build HTML-like label for the table node with increased size
-        label = f"""<
-        <TABLE BORDER="0" CELLBORDER="1" CELLSPACING="10" CELLPADDING="18" COLOR="{table_border_color}" STYLE="ROUNDED">
-            <TR>
-                <TD BGCOLOR="{table_border_color}" ALIGN="CENTER" WIDTH="320" HEIGHT="20">
-                    <FONT COLOR="white" POINT-SIZE="20"><B>{table_name}</B></FONT>
-                </TD>
-            </TR>
-        """
-
-        for attr in attributes:
-            if attr in primary_keys:
-                attr_label = f"<B>{attr} (PK)</B>"
-            elif attr in foreign_keys:
-                attr_label = f"<I>{attr} (FK)</I>"
-            else:
-                attr_label = attr
-            # Add attribute row with PORT named as attribute for edges
-            label += f'<TR><TD PORT="{attr}" ALIGN="LEFT"><FONT POINT-SIZE="14">{attr_label}</FONT></TD></TR>'
-
-        label += "</TABLE>>"
-        dot.node(table_name, label=label)
-
-    # Draw FK edges: from FK attribute port in current table
-    # to PK attribute port in referenced table
     for table_name, key_info in keymap.items():
-        foreign_keys = key_info.get("foreign_keys", {})
-
-        for fk_attr, ref_info in foreign_keys.items():
-            ref_table = ref_info.get("ref_table")
-            ref_column = ref_info.get("ref_column")
-
-            if ref_table in keymap:
-                pk_attrs = set(keymap[ref_table].get("primary_keys", []))
-                target_port = (
-                    ref_column
-                    if ref_column in pk_attrs
-                    else (list(pk_attrs)[0] if pk_attrs else "")
-                )
-                if target_port:
-                    dot.edge(
-                        f"{table_name}:{fk_attr}",
-                        f"{ref_table}:{target_port}",
-                        color=table_border_color,
-                        fontsize="10",
-                        arrowhead="normal",
-                    )
-                else:
-                    dot.edge(
-                        table_name, ref_table, color=table_border_color, fontsize="10"
-                    )
-
-    # Render to temporary file in PROCESSED_FOLDER
-    temp_filepath = os.path.join(PROCESSED_FOLDER, f"{base_name}_temp")
-    dot.render(filename=temp_filepath, cleanup=False)  # creates temp_filepath + ".png"
-
-    png_path = temp_filepath + ".png"
-    with open(png_path, "rb") as img_file:
-        image_bytes = img_file.read()
-
-    # Clean up temporary files
-    for ext in [".png", ".gv"]:
-        try:
-            os.remove(temp_filepath + ext)
-        except OSError:
-            pass
-
-    return image_bytes
+        dot.node(table_name, label=_table_label(table_name, key_info))
+
+    # FK edges go from the FK attribute's port to the referenced PK's port
+    for table_name, fk_attr, ref_table, ref_column in _fk_edges(keymap):
+        if ref_column:
+            dot.edge(
+                f"{table_name}:{fk_attr}",
+                f"{ref_table}:{ref_column}",
+                color=TABLE_BORDER_COLOR,
+                fontsize="10",
+                arrowhead="normal",
+            )
+        else:
+            dot.edge(table_name, ref_table, color=TABLE_BORDER_COLOR, fontsize="10")
+    return dot
+
+
+def generate_er_diagram_from_keymap(
+    keymap: Dict, fmt: str = "png", style: Optional[Dict] = None
+) -> bytes:
+    """
+    Render the ER diagram of keymap as PNG, SVG or JSON bytes. Graphviz
+    output is piped from `dot` in memory; no files are written.
+    """
+    if fmt not in ER_FORMATS:
+        raise ValueError(
+            f"Unknown ER diagram format '{fmt}', expected png, svg or json"
+        )
+    if fmt == "json":
+        return json.dumps(er_graph(keymap)).encode("utf-8")
+    return build_er_digraph(keymap, style, fmt).pipe(format=fmt)
+
+
+def render_key(keymap: Dict, fmt: str = "png", style: Optional[Dict] = None) -> str:
+    """
+    Hash identifying a rendering: the keymap, the format and the style options
+    that format uses.
+    """
+    options = er_style(style)
+    if fmt != "png":
+        options.pop("dpi")
+    if fmt == "json":
+        options = {}
+    return json_hash({"keymap": keymap, "format": fmt, "style": options})
+
+
+class RenderCache:
+    """
+    Process-local LRU of rendered diagrams (bytes) by render_key, evicted
+    once the total size exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= len(old)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+render_cache = RenderCache(ER_RENDER_CACHE_MB * 1024 * 1024)
+REGISTRY.add_collector(cache_collector("er_render", render_cache.stats))
+
+
+def _cached(key: str, build: Callable[[], bytes]) -> Tuple[str, bytes]:
+    data = render_cache.get(key)
+    if data is None:
+        data = build()
+        render_cache.put(key, data)
+    return key, data
+
+
+def render_diagram(
+    keymap: Dict, fmt: str = "png", style: Optional[Dict] = None
+) -> Tuple[str, bytes]:
+    """
+    Cached generate_er_diagram_from_keymap. Returns the render key (usable
+    as an ETag) and the diagram bytes.
+    """
+    return _cached(
+        render_key(keymap, fmt, style),
+        lambda: generate_er_diagram_from_keymap(keymap, fmt, style),
+    )
+
+
+def build_overview_digraph(
+    overview: Dict, style: Optional[Dict] = None, fmt: str = "png"
+):
+    """
+    One box per subject area listing its first tables; edges are labelled
+    with the number of foreign keys between two areas.
+    """
+    style = er_style(style)
+    dot = Digraph(comment="ER Overview")
+    dot.attr(
+        rankdir=style["rankdir"],
+        splines=style["splines"],
+        nodesep=style["nodesep"],
+        ranksep=style["ranksep"],
+    )
+    if fmt == "png":
+        dot.attr("graph", dpi=style["dpi"])
+    dot.attr(
+        "node",
+        shape="box",
+        style="rounded,filled",
+        color=TABLE_BORDER_COLOR,
+        fillcolor="#eef1f3",
+        fontname="Helvetica",
+        fontsize="14",
+    )
+
+    for node in overview["nodes"]:
+        tables = node["tables"]
+        shown = tables[:OVERVIEW_TABLES_SHOWN]
+        if len(tables) > len(shown):
+            shown.append("...")
+        label = f"{node['id']} ({len(tables)} tables)\n\n" + "\n".join(shown)
+        dot.node(node["id"], label=label)
+    for edge in overview["edges"]:
+        dot.edge(
+            edge["source"],
+            edge["target"],
+            label=str(edge["foreign_keys"]),
+            color=TABLE_BORDER_COLOR,
+            fontsize="10",
+        )
+    return dot
+
+
+def render_overview(
+    keymap: Dict,
+    fmt: str = "png",
+    style: Optional[Dict] = None,
+    max_size: int = ER_CLUSTER_SIZE,
+) -> Tuple[str, bytes]:
+    """
+    Cached diagram (or JSON graph) of the schema's subject areas.
+    """
+    key = json_hash({"overview": render_key(keymap, fmt, style), "max_size": max_size})
+
+    def build():
+        overview = overview_graph(keymap, cluster_tables(keymap, max_size))
+        if fmt == "json":
+            return json.dumps(overview).encode("utf-8")
+        return build_overview_digraph(overview, style, fmt).pipe(format=fmt)
+
+    return _cached(key, build)
+
+
+def area_keymap(keymap: Dict, area: str, max_size: int = ER_CLUSTER_SIZE) -> Dict:
+    """
+    The keymap of one subject area ("area1", "area2", ...). Raises KeyError
+    for an unknown area.
+    """
+    clusters = cluster_tables(keymap, max_size)
+    index = area[4:] if area.startswith("area") else ""
+    if not index.isdigit() or not 1 <= int(index) <= len(clusters):
+        raise KeyError(area)
+    return sub_keymap(keymap, clusters[int(index) - 1])
+
+
+def render_area(
+    keymap: Dict,
+    area: str,
+    fmt: str = "png",
+    style: Optional[Dict] = None,
+    max_size: int = ER_CLUSTER_SIZE,
+) -> Tuple[str, bytes]:
+    """
+    Cached diagram of one subject area. Foreign keys to other areas are left
+    out; the overview shows them.
+    """
+    return render_diagram(area_keymap(keymap, area, max_size), fmt, style)
+
+
+def render_neighborhood(
+    keymap: Dict,
+    table: str,
+    depth: int = 1,
+    fmt: str = "png",
+    style: Optional[Dict] = None,
+) -> Tuple[str, bytes]:
+    """
+    Cached diagram of table and the tables within depth FK hops of it.
+    Raises KeyError for an unknown table.
+    """
+    return render_diagram(neighborhood(keymap, table, depth), fmt, style)
+
+
+def render_pages(
+    keymap: Dict,
+    fmt: str = "png",
+    style: Optional[Dict] = None,
+    max_size: int = ER_CLUSTER_SIZE,
+    workers: int = ER_RENDER_WORKERS,
+) -> Dict[str, bytes]:
+    """
+    The overview and every subject area of a large schema, laid out
+    separately; each layout is its own dot process, run in parallel.
+    Returns {"overview": ..., "area1": ..., ...}.
+    """
+    clusters = cluster_tables(keymap, max_size)
+    jobs = {"overview": lambda: render_overview(keymap, fmt, style, max_size)}
+    for i, tables in enumerate(clusters):
+        area_map = sub_keymap(keymap, tables)
+        jobs[f"area{i + 1}"] = lambda m=area_map: render_diagram(m, fmt, style)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {name: executor.submit(job) for name, job in jobs.items()}
+        return {name: future.result()[1] for name, future in futures.items()}
@@ -1,35 +1,89 @@
+import copy
+import math
+import time
+import logging
 import pandas as pd
-from typing import List, Set, Tuple, Dict, FrozenSet
+from typing import Callable, List, Optional, Set, Tuple, Dict, FrozenSet
 from collections import defaultdict
 from itertools import combinations
 from cleanModify import normalize_columns
+from metrics import FD_CANDIDATES, FD_SKETCH_PRUNED, GROUPBYS, CLOSURE_CALLS
+from sketches import ColumnSketches
 
+logger = logging.getLogger(__name__)
 
 # Type alias for a Functional Dependency
 FD = Tuple[FrozenSet[str], FrozenSet[str]]
 
 
+def _determines(
+    df: pd.DataFrame,
+    lhs_attrs: Tuple[str, ...],
+    col_b: str,
+    sketches: Optional[ColumnSketches],
+) -> bool:
+    """
+    Whether lhs_attrs -> col_b holds in df (False for an empty frame).
+    """
+    FD_CANDIDATES.inc()
+    if sketches is not None and not sketches.may_determine(lhs_attrs, col_b):
+        FD_SKETCH_PRUNED.inc()
+        return False
+    grouped = df.groupby(list(lhs_attrs), dropna=False)[col_b].nunique(dropna=False)
+    GROUPBYS.inc(module="fd_modified")
+    return not grouped.empty and bool((grouped == 1).all())
+
+
+def _above_threshold(
+    df: pd.DataFrame,
+    col: str,
+    threshold: int,
+    sketches: Optional[ColumnSketches],
+) -> bool:
+    if sketches is not None:
+        if sketches.clearly_above([col], threshold):
+            return True
+        if sketches.clearly_below([col], threshold):
+            return False
+    return df[col].nunique(dropna=False) > threshold
+
+
 def detect_functional_dependencies(
     df: pd.DataFrame,
     max_comb_size: int = 3,
     rhs_cardinality_threshold: int = 100,
     verbose: bool = True,
+    progress: Optional[Callable[..., None]] = None,
+    on_fd: Optional[Callable[[FD], None]] = None,
+    use_sketches: bool = False,
 ) -> List[FD]:
     """
     Detect FDs by checking if combinations of columns (up to max_comb_size) determine others.
     Skips high-cardinality RHS if threshold is exceeded.
+    progress, if given, is called after every candidate LHS with the current RHS
+    column, lattice level and counters; an exception raised by it aborts the search.
+    on_fd, if given, receives each FD as soon as it is found.
+    With use_sketches, HyperLogLog estimates rule out candidates X -> A where
+    X u A clearly has more distinct values than X before the exact groupby,
+    and replace nunique for the RHS threshold unless the estimate is close.
+    That is faster but approximate: sketch errors have no hard bound, so a
+    rare false prune drops a real FD. Off by default.
     """
 
     df.columns = normalize_columns(df.columns)
 
     fds: List[FD] = []
     columns = df.columns.tolist()
+    candidates_checked = 0
+    sketches = ColumnSketches(df) if use_sketches else None
 
-    for col_b in columns:
+    for columns_done, col_b in enumerate(columns):
         # Skip high-cardinality RHS
-        if df[col_b].nunique(dropna=False) > rhs_cardinality_threshold:
+        if _above_threshold(df, col_b, rhs_cardinality_threshold, sketches):
             if verbose:
-                print(f"Skipping RHS column due to high cardinality: {col_b}")
+                logger.debug(
+                    "Skipping high-cardinality RHS column", extra={"column": col_b}
+                )
             continue
 
         found_fd = False
@@ -38,33 +92,223 @@ def detect_functional_dependencies(
                 if col_b in lhs_attrs:
                     continue  # Skip trivial or invalid combinations
 
-                grouped = df.groupby(list(lhs_attrs), dropna=False)[col_b].nunique(
-                    dropna=False
-                )
-
-                if grouped.empty:
-                    continue
+                candidates_checked += 1
+                holds = _determines(df, lhs_attrs, col_b, sketches)
+                if progress is not None:
+                    progress(
+                        column=col_b,
+                        columns_done=columns_done,
+                        columns_total=len(columns),
+                        level=size,
+                        candidates_checked=candidates_checked,
+                        fds_found=len(fds),
+                    )
 
-                if all(grouped == 1):
+                if holds:
                     fds.append((frozenset(lhs_attrs), frozenset([col_b])))
                     found_fd = True
+                    if on_fd is not None:
+                        on_fd(fds[-1])
                     if verbose:
-                        print(f"FD found: {set(lhs_attrs)} -> {col_b}")
+                        logger.debug(
+                            "FD found", extra={"lhs": list(lhs_attrs), "rhs": col_b}
+                        )
                     break  # Minimal FD found
 
             if found_fd:
                 break
 
         if not found_fd and verbose:
-            print(f"No FD found for column: {col_b}")
+            logger.debug("No FD found", extra={"column": col_b})
 
+    if progress is not None:
+        progress(
+            columns_done=len(columns),
+            columns_total=len(columns),
+            candidates_checked=candidates_checked,
+            fds_found=len(fds),
+        )
     return fds
 
 
+def _lhs_order(
+    df: pd.DataFrame, combos: List[Tuple[str, ...]], sketches: Optional[ColumnSketches]
+) -> List[int]:
+    """
+    Indexes of combos, cheapest groupby first: by the product of the
+    columns' distinct counts (an upper bound on the number of groups), ties
+    in combination order.
+    """
+    distinct = {
+        col: (
+            sketches.distinct([col])
+            if sketches is not None
+            else df[col].nunique(dropna=False)
+        )
+        for col in df.columns
+    }
+
+    def cost(i: int):
+        product = 1.0
+        for col in combos[i]:
+            product *= max(distinct[col], 1.0)
+        return (product, i)
+
+    return sorted(range(len(combos)), key=cost)
+
+
+def discover_fds_anytime(
+    df: pd.DataFrame,
+    time_budget: Optional[float] = None,
+    state: Optional[Dict] = None,
+    max_comb_size: int = 3,
+    rhs_cardinality_threshold: int = 100,
+    progress: Optional[Callable[..., None]] = None,
+    on_fd: Optional[Callable[[FD], None]] = None,
+    use_sketches: bool = False,
+) -> Dict:
+    """
+    Budgeted, resumable detect_functional_dependencies with the same final
+    answer. The lattice is searched level by level for all RHS columns at
+    once, each level's LHS candidates cheapest first; per RHS the first
+    holding LHS in combination order is kept, as the exhaustive search does.
+
+    Once time_budget seconds have passed, returns what was found so far:
+    FDs of earlier levels are final, FDs of the current level hold but may
+    still be replaced by an LHS earlier in combination order. state (from
+    a previous result, JSON-serializable) resumes the search where it stopped.
+    on_fd receives each FD once it is final.
+    """
+    if time_budget is not None and not (math.isfinite(time_budget) and time_budget > 0):
+        raise ValueError("time_budget must be a positive number of seconds")
+    started = time.monotonic()
+    df.columns = normalize_columns(df.columns)
+    columns = df.columns.tolist()
+    params = {
+        "max_comb_size": max_comb_size,
+        "rhs_cardinality_threshold": rhs_cardinality_threshold,
+        "use_sketches": use_sketches,
+    }
+    sketches = ColumnSketches(df) if use_sketches else None
+
+    if state is None:
+        state = {
+            "columns": columns,
+            "params": params,
+            "level": 1,
+            "position": 0,
+            "checked_at_position": [],
+            "skipped": [
+                col
+                for col in columns
+                if _above_threshold(df, col, rhs_cardinality_threshold, sketches)
+            ],
+            "resolved": [],
+            "found": {},
+            "candidates_checked": 0,
+            "seconds": 0.0,
+        }
+    elif state.get("columns") != columns or state.get("params") != params:
+        raise ValueError("FD search state belongs to other data or parameters")
+    else:
+        state = copy.deepcopy(state)
+
+    resolved = set(state["resolved"]) | set(state["skipped"])
+    found = state["found"]  # rhs -> [combination index, lhs]
+    checked_now = 0
+
+    def out_of_time() -> bool:
+        # At least one candidate per call, so resuming always makes progress
+        return (
+            time_budget is not None
+            and checked_now > 0
+            and time.monotonic() - started >= time_budget
+        )
+
+    stopped = False
+    while state["level"] <= max_comb_size and not stopped:
+        level = state["level"]
+        active = [col for col in columns if col not in resolved]
+        if not active:
+            break
+        combos = list(combinations(columns, level))
+        order = _lhs_order(df, combos, sketches)
+
+        while state["position"] < len(order):
+            i = order[state["position"]]
+            lhs_attrs = combos[i]
+            done = set(state["checked_at_position"])
+            for col_b in active:
+                if col_b in lhs_attrs or col_b in done:
+                    continue
+                if col_b in found and found[col_b][0] < i:
+                    continue  # An earlier LHS of this level already holds
+                if out_of_time():
+                    stopped = True
+                    break
+                checked_now += 1
+                state["candidates_checked"] += 1
+                if _determines(df, lhs_attrs, col_b, sketches):
+                    found[col_b] = [i, list(lhs_attrs)]
+                state["checked_at_position"].append(col_b)
+                if progress is not None:
+                    progress(
+                        column=col_b,
+                        columns_done=len(resolved),
+                        columns_total=len(columns),
+                        level=level,
+                        candidates_checked=state["candidates_checked"],
+                        fds_found=len(found),
+                    )
+            if stopped:
+                break
+            state["position"] += 1
+            state["checked_at_position"] = []
+        if stopped:
+            break
+
+        # Level done: its FDs are minimal and final; without one, the last
+        # level also settles a column
+        for col_b in active:
+            if col_b in found or level == max_comb_size:
+                resolved.add(col_b)
+                state["resolved"].append(col_b)
+                if col_b in found and on_fd is not None:
+                    on_fd((frozenset(found[col_b][1]), frozenset([col_b])))
+        state["level"] += 1
+        state["position"] = 0
+
+    complete = not stopped
+    state["seconds"] = round(state["seconds"] + time.monotonic() - started, 3)
+    if progress is not None and complete:
+        progress(
+            columns_done=len(columns),
+            columns_total=len(columns),
+            candidates_checked=state["candidates_checked"],
+            fds_found=len(found),
+        )
+    return {
+        "fds": [
+            (frozenset(found[col][1]), frozenset([col]))
+            for col in columns
+            if col in found
+        ],
+        "complete": complete,
+        # Share of RHS columns whose outcome (FD or none) is final
+        "completeness": round(len(resolved) / len(columns), 4) if columns else 1.0,
+        "final_fds": sum(1 for col in found if col in resolved),
+        "level": min(state["level"], max_comb_size),
+        "candidates_checked": state["candidates_checked"],
+        "seconds": state["seconds"],
+        "state": state,
+    }
+
+
 def closure(attributes: Set[str], fds: List[FD]) -> Set[str]:
     """
     Compute attribute closure for a given set of attributes using provided FDs.
     """
+    CLOSURE_CALLS.inc(module="fd_modified")
     result = set(attributes)
     while True:
         added = False
@@ -0,0 +1,303 @@
+import os
+import time
+import sqlite3
+import tempfile
+import statistics
+from typing import Callable, Dict, List, Optional, Tuple
+import pandas as pd
+
+from sql_export import export_sqlite, quote_identifier
+
+# Timed runs of every query; the median is reported
+ADVISOR_REPEAT = int(os.environ.get("ADVISOR_REPEAT", "5"))
+# A join that stays this many times slower than scanning the same rows
+# pre-joined, even with indexes, is reported as worth keeping merged
+MERGE_SLOWDOWN = float(os.environ.get("ADVISOR_MERGE_SLOWDOWN", "3.0"))
+
+# Name of the cleaned (unnormalized) table in the scratch database
+ORIGINAL_TABLE = "__original"
+
+
+def _columns_sql(alias: str, columns: List[str]) -> List[str]:
+    return [f"{alias}.{quote_identifier(c)}" for c in columns]
+
+
+def _join_condition(left: str, columns, right: str, ref_columns) -> str:
+    return " AND ".join(
+        f"{a} = {b}"
+        for a, b in zip(_columns_sql(left, columns), _columns_sql(right, ref_columns))
+    )
+
+
+def foreign_key_groups(keymap: Dict, table: str) -> List[Tuple[List, str, List]]:
+    """
+    (columns, ref_table, ref_columns) per referenced table, from every
+    foreign key column of the keymap. Unlike the DDL constraints of
+    sql_export, groups that cover only part of the referenced primary key
+    are kept: the reconstruction joins still use them.
+    """
+    by_table: Dict[str, Dict[str, str]] = {}
+    for column, ref in keymap[table].get("foreign_keys", {}).items():
+        ref_table = ref.get("ref_table")
+        if ref_table in keymap and ref_table != table:
+            by_table.setdefault(ref_table, {})[ref.get("ref_column")] = column
+
+    groups = []
+    for ref_table, columns_by_ref in by_table.items():
+        ref_pk = keymap[ref_table].get("primary_keys", [])
+        # Primary key order first, so a full key matches its constraint
+        ref_columns = [c for c in ref_pk if c in columns_by_ref]
+        ref_columns += [c for c in columns_by_ref if c not in ref_pk]
+        groups.append(
+            ([columns_by_ref[c] for c in ref_columns], ref_table, ref_columns)
+        )
+    return groups
+
+
+def propose_indexes(keymap: Dict) -> List[Dict]:
+    """
+    One index per referenced table on the referencing columns, whether or
+    not they cover its whole primary key. The referenced primary key is
+    already indexed by SQLite, and referencing columns that are a prefix of
+    their table's primary key are covered by it.
+    """
+    indexes = []
+    for table, info in keymap.items():
+        primary_keys = info.get("primary_keys", [])
+        for columns, ref_table, ref_columns in foreign_key_groups(keymap, table):
+            if primary_keys[: len(columns)] == columns:
+                continue
+            ref_pk = keymap[ref_table].get("primary_keys", [])
+            name = f"ix_{table}_{'_'.join(columns)}"
+            indexes.append(
+                {
+                    "name": name,
+                    "table": table,
+                    "columns": columns,
+                    "references": {
+                        "table": ref_table,
+                        "columns": ref_columns,
+                        "partial": set(ref_columns) != set(ref_pk),
+                    },
+                    "sql": (
+                        f"CREATE INDEX {quote_identifier(name)} ON "
+                        f"{quote_identifier(table)} "
+                        f"({', '.join(quote_identifier(c) for c in columns)})"
+                    ),
+                }
+            )
+    return indexes
+
+
+def _reconstruction_query(keymap: Dict, root: str) -> Dict:
+    """
+    Natural join of the tables, starting from root and adding one table at
+    a time that shares columns with those already joined: the join that
+    rebuilds the original relation from a lossless decomposition.
+    """
+    columns = {table: info.get("attributes", []) for table, info in keymap.items()}
+    alias = {root: "t0"}
+    owner = {column: "t0" for column in columns[root]}
+    joins = []
+    remaining = [table for table in keymap if table != root]
+    while True:
+        table = next((t for t in remaining if owner.keys() & set(columns[t])), None)
+        if table is None:
+            break
+        remaining.remove(table)
+        alias[table] = f"t{len(alias)}"
+        condition = " AND ".join(
+            f"{owner[c]}.{quote_identifier(c)} = {alias[table]}.{quote_identifier(c)}"
+            for c in columns[table]
+            if c in owner
+        )
+        joins.append(f"JOIN {quote_identifier(table)} AS {alias[table]} ON {condition}")
+        for column in columns[table]:
+            owner.setdefault(column, alias[table])
+
+    select = ", ".join(f"{a}.{quote_identifier(c)}" for c, a in owner.items())
+    sql = " ".join([f"SELECT {select} FROM {quote_identifier(root)} AS t0", *joins])
+    return {
+        "name": "reconstruct",
+        "kind": "reconstruction",
+        "tables": list(alias),
+        "tables_not_joined": remaining,
+        "sql": sql,
+        "params": [],
+    }
+
+
+def reconstruction_queries(keymap: Dict, row_counts: Dict[str, int]) -> List[Dict]:
+    """
+    Per foreign key group (see foreign_key_groups), a join of the two
+    tables and a lookup of the referencing rows of one key value; and one join of all tables, from the
+    largest one (which holds a key of the relation), back to the original
+    relation.
+    """
+    queries = []
+    for table in keymap:
+        for columns, ref_table, ref_columns in foreign_key_groups(keymap, table):
+            label = f"{table}->{ref_table}"
+            queries.append(
+                {
+                    "name": f"join {label}",
+                    "kind": "join",
+                    "tables": [table, ref_table],
+                    "sql": (
+                        f"SELECT * FROM {quote_identifier(table)} AS a "
+                        f"JOIN {quote_identifier(ref_table)} AS b ON "
+                        f"{_join_condition('a', columns, 'b', ref_columns)}"
+                    ),
+                    "params": [],
+                }
+            )
+            queries.append(
+                {
+                    "name": f"lookup {label}",
+                    "kind": "lookup",
+                    "tables": [table, ref_table],
+                    "sql": (
+                        f"SELECT * FROM {quote_identifier(table)} WHERE "
+                        + " AND ".join(f"{quote_identifier(c)} = ?" for c in columns)
+                    ),
+                    # Filled with a referenced key value once the data is loaded
+                    "key_source": (table, columns),
+                }
+            )
+    if keymap:
+        root = max(keymap, key=lambda t: (row_counts.get(t, 0), t))
+        queries.append(_reconstruction_query(keymap, root))
+    return queries
+
+
+def _measure(conn, sql: str, params, repeat: int) -> Dict:
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    times, rows = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(conn.execute(sql, params).fetchall())
+        times.append(time.perf_counter() - start)
+    return {
+        "plan": plan,
+        "rows": rows,
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "min_ms": round(min(times) * 1000, 3),
+    }
+
+
+def _ratio(slow: float, fast: float) -> Optional[float]:
+    return round(slow / fast, 2) if fast else None
+
+
+def advise_indexes(
+    keymap: Dict,
+    load_table: Callable[[str], pd.DataFrame],
+    original: Optional[pd.DataFrame] = None,
+    repeat: int = ADVISOR_REPEAT,
+    progress: Optional[Callable[..., None]] = None,
+) -> Dict:
+    """
+    Load the tables (and the original relation, if given) into a scratch
+    SQLite database, run the reconstruction queries without and then with
+    the proposed indexes, and compare each join with a scan of the same
+    rows pre-joined. Returns the indexes, every query's plans and latencies,
+    and the joins worth keeping merged.
+    """
+    report = progress or (lambda **counters: None)
+    full_keymap = dict(keymap)
+    if original is not None:
+        full_keymap[ORIGINAL_TABLE] = {
+            "attributes": list(original.columns),
+            "primary_keys": [],
+            "foreign_keys": {},
+        }
+
+    def load(table: str) -> pd.DataFrame:
+        return original if table == ORIGINAL_TABLE else load_table(table)
+
+    indexes = propose_indexes(keymap)
+    with tempfile.TemporaryDirectory(prefix="index_advisor_") as scratch:
+        report(phase="load")
+        load_report = export_sqlite(
+            full_keymap, load, os.path.join(scratch, "advisor.sqlite")
+        )
+        row_counts = {t: r["rows"] for t, r in load_report["tables"].items()}
+        queries = reconstruction_queries(keymap, row_counts)
+
+        conn = sqlite3.connect(os.path.join(scratch, "advisor.sqlite"))
+        try:
+            for query in queries:
+                if "key_source" in query:
+                    table, columns = query.pop("key_source")
+                    quoted = [quote_identifier(c) for c in columns]
+                    sample = conn.execute(
+                        f"SELECT {', '.join(quoted)} FROM {quote_identifier(table)} "
+                        f"WHERE {' AND '.join(c + ' IS NOT NULL' for c in quoted)} "
+                        "LIMIT 1"
+                    ).fetchone()
+                    query["params"] = list(sample or [None] * len(columns))
+
+            conn.execute("ANALYZE")
+            for i, query in enumerate(queries):
+                report(
+                    phase="without_indexes", queries_done=i, queries_total=len(queries)
+                )
+                query["without_indexes"] = _measure(
+                    conn, query["sql"], query["params"], repeat
+                )
+
+            for index in indexes:
+                conn.execute(index["sql"])
+            conn.execute("ANALYZE")
+            for i, query in enumerate(queries):
+                report(phase="with_indexes", queries_done=i, queries_total=len(queries))
+                query["with_indexes"] = _measure(
+                    conn, query["sql"], query["params"], repeat
+                )
+                query["index_speedup"] = _ratio(
+                    query["without_indexes"]["median_ms"],
+                    query["with_indexes"]["median_ms"],
+                )
+
+            # The same rows pre-joined: what keeping the tables merged costs to read
+            merges = []
+            for i, query in enumerate(q for q in queries if q["kind"] != "lookup"):
+                report(phase="merged", queries_done=i)
+                if query["kind"] == "reconstruction" and original is not None:
+                    merged_sql = f"SELECT * FROM {quote_identifier(ORIGINAL_TABLE)}"
+                else:
+                    conn.execute(
+                        f"CREATE TEMP TABLE merged_{i} AS {query['sql']}",
+                        query["params"],
+                    )
+                    merged_sql = f"SELECT * FROM merged_{i}"
+                query["merged"] = _measure(conn, merged_sql, [], repeat)
+                slowdown = _ratio(
+                    query["with_indexes"]["median_ms"], query["merged"]["median_ms"]
+                )
+                query["join_slowdown"] = slowdown
+                merges.append(
+                    {
+                        "query": query["name"],
+                        "tables": query["tables"],
+                        "join_slowdown": slowdown,
+                        "keep_merged": slowdown is not None
+                        and slowdown >= MERGE_SLOWDOWN,
+                    }
+                )
+        finally:
+            conn.close()
+
+    return {
+        "indexes": indexes,
+        "queries": queries,
+        "merge_candidates": [m for m in merges if m["keep_merged"]],
+        "joins": merges,
+        "load": {
+            "rows": load_report["rows"],
+            "seconds": load_report["seconds"],
+            "rows_per_second": load_report["rows_per_second"],
+        },
+        "repeat": repeat,
+        "merge_slowdown_threshold": MERGE_SLOWDOWN,
+    }
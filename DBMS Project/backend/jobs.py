@@ -0,0 +1,184 @@
+import os
+import math
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+# Worker threads shared by all background jobs
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# Default and maximum run time of a job, in seconds
+JOB_TIMEOUT_SECONDS = float(os.environ.get("JOB_TIMEOUT_SECONDS", "1800"))
+JOB_MAX_TIMEOUT_SECONDS = float(os.environ.get("JOB_MAX_TIMEOUT_SECONDS", "7200"))
+# Finished jobs kept around for polling
+JOB_HISTORY = int(os.environ.get("JOB_HISTORY", "200"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+FINISHED = {SUCCEEDED, FAILED, CANCELLED, TIMED_OUT}
+
+
+class JobNotFound(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobTimedOut(JobCancelled):
+    pass
+
+
+class Job:
+    """
+    One submitted pipeline stage. The stage reports progress through report(),
+    which is also where cancellation and the time limit take effect, so both
+    are cooperative: a stage stops at its next progress report.
+    """
+
+    def __init__(self, stage: str, workspace_id: str, timeout: float):
+        self.id = uuid.uuid4().hex
+        self.stage = stage
+        self.workspace_id = workspace_id
+        self.timeout = timeout
+        self.status = QUEUED
+        self.progress: Dict = {}
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    def report(self, **counters):
+        """
+        Progress callback handed to the stage.
+        Raises JobCancelled or JobTimedOut to abort the stage.
+        """
+        self.progress.update(counters)
+        self.check()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled("Job cancelled")
+        if self.started_at is not None and time.time() - self.started_at > self.timeout:
+            raise JobTimedOut(f"Job exceeded its time limit of {self.timeout:g}s")
+
+    def info(self) -> Dict:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "job_id": self.id,
+            "stage": self.stage,
+            "workspace_id": self.workspace_id,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+            "timeout": self.timeout,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed": elapsed,
+        }
+
+
+class JobQueue:
+    """
+    Bounded pool running pipeline stages in the background.
+    Jobs beyond max_workers wait in the executor queue.
+    """
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="pipeline-job"
+        )
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        stage: str,
+        work: Callable[[Job], Dict],
+        workspace_id: str,
+        timeout: Optional[float] = None,
+    ) -> Job:
+        """
+        Queue work(job) and return the job right away. work returns the result
+        dict and should pass job.report to the stage as its progress callback.
+        Raises ValueError unless timeout is None or a positive finite number.
+        """
+        if timeout is None:
+            timeout = JOB_TIMEOUT_SECONDS
+        elif not (math.isfinite(timeout) and timeout > 0):
+            raise ValueError("timeout must be a positive number of seconds")
+        timeout = min(timeout, JOB_MAX_TIMEOUT_SECONDS)
+        job = Job(stage, workspace_id, timeout)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job, work)
+        return job
+
+    def _run(self, job: Job, work: Callable[[Job], Dict]):
+        if job._cancel.is_set():
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = work(job)
+            job.status = SUCCEEDED
+        except JobTimedOut as e:
+            job.status, job.error = TIMED_OUT, str(e)
+        except JobCancelled as e:
+            job.status, job.error = CANCELLED, str(e)
+        except Exception as e:
+            job.status, job.error = FAILED, str(e)
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFound(f"Job '{job_id}' not found")
+        return job
+
+    def cancel(self, job_id: str) -> Job:
+        """
+        Cancel a queued job immediately, or ask a running one to stop.
+        """
+        job = self.get(job_id)
+        if job.status in FINISHED:
+            return job
+        job._cancel.set()
+        if job.future is not None and job.future.cancel():
+            job.status = CANCELLED
+            job.finished_at = time.time()
+        return job
+
+    def list(self, workspace_id: Optional[str] = None) -> List[Job]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [
+            j for j in jobs if workspace_id is None or j.workspace_id == workspace_id
+        ]
+
+    def _prune(self):
+        finished = [j.id for j in self._jobs.values() if j.status in FINISHED]
+        for job_id in finished[: max(0, len(finished) - JOB_HISTORY)]:
+            del self._jobs[job_id]
+
+
+job_queue = JobQueue(JOB_WORKERS)
@@ -1,7 +1,9 @@
-from typing import List, Set, Tuple, FrozenSet, Dict
+from typing import Callable, List, Optional, Set, Tuple, FrozenSet, Dict
 from itertools import combinations
 import pandas as pd
 
+from metrics import CLOSURE_CALLS, KEY_CANDIDATES
+
 # Type alias for Functional Dependency
 FD = Tuple[FrozenSet[str], FrozenSet[str]]
 
@@ -18,6 +20,7 @@ def closure(attrs: Set[str], fds: List[FD]) -> Set[str]:
     """
     Compute attribute closure of attrs under the set of FDs.
     """
+    CLOSURE_CALLS.inc(module="key_utils")
     result = set(attrs)
     changed = True
     while changed:
@@ -30,21 +33,36 @@ def closure(attrs: Set[str], fds: List[FD]) -> Set[str]:
 
 
 def find_candidate_keys(
-    attributes: List[str], fds: List[FD], max_comb_size: int = 5
+    attributes: List[str],
+    fds: List[FD],
+    max_comb_size: int = 5,
+    progress: Optional[Callable[..., None]] = None,
+    on_key: Optional[Callable[[Set[str]], None]] = None,
 ) -> List[Set[str]]:
     """
     Find candidate keys for the relation.
+    progress, if given, is called with the number of attribute sets checked;
+    on_key receives each candidate key as soon as it is found.
     """
     all_attrs = set(attributes)
     candidate_keys = []
 
-    for subset in powerset(attributes, max_comb_size):
+    for checked, subset in enumerate(powerset(attributes, max_comb_size), start=1):
+        if progress is not None:
+            progress(
+                level=len(subset),
+                candidates_checked=checked,
+                keys_found=len(candidate_keys),
+            )
+        KEY_CANDIDATES.inc()
         closure_set = closure(subset, fds)
         if closure_set == all_attrs:
             if not any(
                 existing_key.issubset(subset) for existing_key in candidate_keys
             ):
                 candidate_keys.append(set(subset))
+                if on_key is not None:
+                    on_key(candidate_keys[-1])
     return candidate_keys
 
 
@@ -104,12 +122,20 @@ def detect_keys(
     df: pd.DataFrame,
     fds: List[FD],
     max_comb_size: int = 5,
+    progress: Optional[Callable[..., None]] = None,
+    on_key: Optional[Callable[[Set[str]], None]] = None,
 ) -> Dict[str, object]:
     """
     Detect candidate keys, primary key, and superkeys for a given DataFrame and FDs.
     """
     attributes = list(df.columns)
-    candidate_keys = find_candidate_keys(attributes, fds, max_comb_size=max_comb_size)
+    candidate_keys = find_candidate_keys(
+        attributes,
+        fds,
+        max_comb_size=max_comb_size,
+        progress=progress,
+        on_key=on_key,
+    )
     primary_key = find_primary_keys(candidate_keys)
     superkeys = find_superkeys(candidate_keys, attributes, max_comb_size=max_comb_size)
     return {
@@ -1,8 +1,11 @@
+import logging
 from typing import List, Set, Tuple, FrozenSet
 
 # Type alias for a Functional Dependency: (LHS, RHS)
 FD = Tuple[FrozenSet[str], FrozenSet[str]]
 
+logger = logging.getLogger(__name__)
+
 
 def is_lossless_decomposition(
     original_attrs: Set[str], decomposed_schemas: List[Set[str]], fds: List[FD]
@@ -19,7 +22,7 @@ def is_lossless_decomposition(
         bool: True if the decomposition is lossless, False otherwise.
     """
     if not original_attrs or not decomposed_schemas or not fds:
-        print("Lossless Check Error: Missing inputs (attributes/schemas/fds)")
+        logger.warning("Lossless check is missing attributes, schemas or FDs")
         return False
 
     # Initialize tableau: { attribute : set of symbols (a_i or b_i_attr) }
@@ -31,10 +34,13 @@ def is_lossless_decomposition(
             else:
                 tableau[attr].add(f"b{i}_{attr}")
 
-    # Debug: Initial tableau
-    print("\nInitial Tableau:")
-    for attr in tableau:
-        print(f"  {attr}: {tableau[attr]}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Initial tableau",
+            extra={
+                "tableau": {attr: sorted(symbols) for attr, symbols in tableau.items()}
+            },
+        )
 
     changed = True
     while changed:
@@ -47,7 +53,9 @@ def is_lossless_decomposition(
                 # Common values across all tableau rows for LHS attributes
                 common_rows = set.intersection(*[tableau[attr] for attr in lhs])
             except KeyError as e:
-                print(f"Attribute {e} in FD LHS not found in tableau")
+                logger.warning(
+                    "FD LHS attribute not found in tableau", extra={"attribute": str(e)}
+                )
                 continue
 
             for attr in rhs:
@@ -58,16 +66,19 @@ def is_lossless_decomposition(
                 if tableau[attr] != before:
                     changed = True
 
-    # Debug: Final tableau
-    print("\nFinal Tableau After Chase:")
-    for attr in tableau:
-        print(f"  {attr}: {tableau[attr]}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Final tableau after chase",
+            extra={
+                "tableau": {attr: sorted(symbols) for attr, symbols in tableau.items()}
+            },
+        )
 
     # Lossless if any a_i appears in all rows
     for i in range(len(decomposed_schemas)):
         if all(f"a{i}" in tableau[attr] for attr in original_attrs):
-            print(f"\nLossless decomposition confirmed via row a{i}.")
+            logger.info("Lossless decomposition confirmed", extra={"row": f"a{i}"})
             return True
 
-    print("\nLossless decomposition FAILED.")
+    logger.info("Decomposition is lossy")
     return False
@@ -0,0 +1,97 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Iterable, Optional
+
+MANIFEST_FILE = "manifest.json"
+_HASH_CHUNK = 1024 * 1024
+
+_manifest_lock = threading.Lock()
+
+
+def _manifest_path(folder: str) -> str:
+    return os.path.join(folder, MANIFEST_FILE)
+
+
+def _load(folder: str) -> Dict[str, Dict]:
+    try:
+        with open(_manifest_path(folder), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(folder: str, manifest: Dict[str, Dict]):
+    # Write to a temp file and rename, so readers never see a half-written manifest
+    tmp_path = _manifest_path(folder) + f".{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, _manifest_path(folder))
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def record_artifact(path: str) -> str:
+    """
+    Hash a freshly written artifact and store the hash in its folder's manifest.
+    Returns the hash.
+    """
+    folder, name = os.path.split(path)
+    stat = os.stat(path)
+    sha = file_hash(path)
+    with _manifest_lock:
+        manifest = _load(folder)
+        manifest[name] = {
+            "sha256": sha,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        _save(folder, manifest)
+    return sha
+
+
+def forget_artifact(path: str):
+    folder, name = os.path.split(path)
+    with _manifest_lock:
+        manifest = _load(folder)
+        if manifest.pop(name, None) is not None:
+            _save(folder, manifest)
+
+
+def artifact_hash(path: str) -> Optional[str]:
+    """
+    Content hash of an artifact from the manifest, or None if it does not exist.
+    Files changed behind the manifest's back (or written before it existed)
+    are hashed and recorded on first use.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    folder, name = os.path.split(path)
+    entry = _load(folder).get(name)
+    if (
+        entry
+        and entry["size"] == stat.st_size
+        and entry["mtime_ns"] == stat.st_mtime_ns
+    ):
+        return entry["sha256"]
+    return record_artifact(path)
+
+
+def combined_hash(paths: Iterable[str]) -> str:
+    """
+    One hash over several artifacts (names and contents), e.g. for a listing.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode("utf-8"))
+        digest.update((artifact_hash(path) or "").encode("ascii"))
+    return digest.hexdigest()
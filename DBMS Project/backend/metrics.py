@@ -0,0 +1,419 @@
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows; peak memory is not reported there
+    resource = None
+
+# Upper bounds (seconds) of the duration histogram buckets
+DURATION_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+    600.0,
+    1800.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+# Returns (name, type, help, [(labels, value), ...]) for each metric it exports
+Collector = Callable[[], List[Tuple[str, str, str, List[Tuple[Dict, float]]]]]
+
+
+def _label_text(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)] + (
+        [extra] if extra else []
+    )
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Labels = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Labels, object] = {}
+
+    def _key(self, labels: Dict) -> Labels:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing count, e.g. of candidates checked.
+    """
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_label_text(self.labelnames, key)} {_number(value)}"
+
+
+class Gauge(Counter):
+    """
+    Value that is set rather than accumulated, e.g. the last peak memory.
+    """
+
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values over fixed buckets, plus their sum and count.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self._values.items())
+        for key, (counts, total) in items:
+            for bound, count in zip(self.buckets, counts):
+                le = f'le="{_number(bound)}"'
+                yield (
+                    f"{self.name}_bucket"
+                    f"{_label_text(self.labelnames, key, le)} {count}"
+                )
+            labels = _label_text(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_number(total)}"
+            yield f"{self.name}_count{labels} {counts[-1]}"
+
+
+class Registry:
+    """
+    The metrics of this process. Collectors export values kept elsewhere
+    (e.g. cache statistics) when the registry is rendered.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        blocks = [metric.render() for metric in self._metrics]
+        # Several collectors may export the same metric (e.g. one per cache)
+        collected: Dict[str, Tuple[str, str, List[str]]] = {}
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                _, _, lines = collected.setdefault(name, (kind, help, []))
+                for labels, value in samples:
+                    names = tuple(labels)
+                    values = tuple(labels[n] for n in names)
+                    lines.append(f"{name}{_label_text(names, values)} {_number(value)}")
+        for name, (kind, help, lines) in collected.items():
+            blocks.append(
+                "\n".join([f"# HELP {name} {help}", f"# TYPE {name} {kind}"] + lines)
+            )
+        return "\n".join(blocks) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram("pipeline_stage_seconds", "Wall time of pipeline stages", ("stage",))
+)
+STAGE_CPU_SECONDS = REGISTRY.register(
+    Counter(
+        "pipeline_stage_cpu_seconds_total",
+        "CPU time of the thread running each pipeline stage",
+        ("stage",),
+    )
+)
+STAGE_PEAK_MEMORY = REGISTRY.register(
+    Gauge(
+        "pipeline_stage_peak_memory_bytes",
+        "Peak resident memory of the process during the last run of each stage",
+        ("stage",),
+    )
+)
+STAGE_RUNS = REGISTRY.register(
+    Counter("pipeline_stage_runs_total", "Pipeline stage runs", ("stage", "status"))
+)
+
+HTTP_SECONDS = REGISTRY.register(
+    Histogram(
+        "http_request_seconds",
+        "Wall time of HTTP requests (until the response is returned)",
+        ("method", "endpoint", "status"),
+    )
+)
+HTTP_CPU_SECONDS = REGISTRY.register(
+    Counter(
+        "http_request_cpu_seconds_total",
+        "CPU time of the thread serving each endpoint",
+        ("method", "endpoint"),
+    )
+)
+HTTP_PEAK_MEMORY = REGISTRY.register(
+    Gauge(
+        "http_request_peak_memory_bytes",
+        "Peak resident memory of the process during the last request to each endpoint",
+        ("method", "endpoint"),
+    )
+)
+
+FD_CANDIDATES = REGISTRY.register(
+    Counter("fd_candidates_checked_total", "Candidate LHS sets checked by FD detection")
+)
+FD_SKETCH_PRUNED = REGISTRY.register(
+    Counter(
+        "fd_candidates_pruned_total",
+        "FD candidates ruled out by distinct-count sketches without a groupby",
+    )
+)
+GROUPBYS = REGISTRY.register(
+    Counter("groupby_operations_total", "DataFrame groupbys executed", ("module",))
+)
+CLOSURE_CALLS = REGISTRY.register(
+    Counter("closure_calls_total", "Attribute closure computations", ("module",))
+)
+KEY_CANDIDATES = REGISTRY.register(
+    Counter(
+        "key_candidates_checked_total",
+        "Attribute sets checked by candidate key search",
+    )
+)
+
+
+# --- Peak memory ---
+#
+# On Linux the process's resident high-water mark (VmHWM) can be reset through
+# /proc/self/clear_refs, so each measurement reports the peak since it started.
+# Measurements that overlap (concurrent requests, a stage inside a request)
+# share the mark: it is only reset when no other measurement is running.
+
+_active = 0
+_active_lock = threading.Lock()
+
+
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def start_measure() -> Dict:
+    """
+    Start measuring wall time, CPU time (of this thread) and peak process
+    memory. Pass the returned state to stop_measure, on the same thread.
+    """
+    global _active
+    with _active_lock:
+        if _active == 0:
+            _reset_peak_rss()
+        _active += 1
+    return {"wall": time.perf_counter(), "cpu": time.thread_time()}
+
+
+def stop_measure(started: Dict) -> Dict:
+    global _active
+    result = {
+        "wall_seconds": time.perf_counter() - started["wall"],
+        "cpu_seconds": time.thread_time() - started["cpu"],
+        "peak_memory_bytes": peak_rss_bytes(),
+    }
+    with _active_lock:
+        _active -= 1
+    return result
+
+
+@contextmanager
+def measure():
+    """
+    start_measure/stop_measure around a block. The yielded dict is filled in
+    when the block exits.
+    """
+    result = {}
+    started = start_measure()
+    try:
+        yield result
+    finally:
+        result.update(stop_measure(started))
+
+
+@contextmanager
+def track_stage(stage: str):
+    """
+    Record wall time, CPU time, peak memory and outcome of a pipeline stage.
+    Usable as a context manager (yields the measurement) or a decorator.
+    """
+    status = "succeeded"
+    try:
+        with measure() as result:
+            yield result
+    except BaseException:
+        status = "failed"
+        raise
+    finally:
+        STAGE_SECONDS.observe(result["wall_seconds"], stage=stage)
+        STAGE_CPU_SECONDS.inc(result["cpu_seconds"], stage=stage)
+        if result["peak_memory_bytes"] is not None:
+            STAGE_PEAK_MEMORY.set(result["peak_memory_bytes"], stage=stage)
+        STAGE_RUNS.inc(stage=stage, status=status)
+
+
+def record_request(method: str, endpoint: str, status: int, result: Dict):
+    HTTP_SECONDS.observe(
+        result["wall_seconds"], method=method, endpoint=endpoint, status=status
+    )
+    HTTP_CPU_SECONDS.inc(result["cpu_seconds"], method=method, endpoint=endpoint)
+    if result["peak_memory_bytes"] is not None:
+        HTTP_PEAK_MEMORY.set(
+            result["peak_memory_bytes"], method=method, endpoint=endpoint
+        )
+
+
+def cache_collector(name: str, stats: Callable[[], Dict]) -> Collector:
+    """
+    Collector exporting the hit/miss counters and size of a cache from its
+    stats() dict.
+    """
+
+    def collect():
+        current = stats()
+        labels = {"cache": name}
+        return [
+            ("cache_hits_total", "counter", "Cache hits", [(labels, current["hits"])]),
+            (
+                "cache_misses_total",
+                "counter",
+                "Cache misses",
+                [(labels, current["misses"])],
+            ),
+            (
+                "cache_bytes",
+                "gauge",
+                "Cache size in bytes",
+                [(labels, current["bytes"])],
+            ),
+        ]
+
+    return collect
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+_process_start = time.time()
+
+
+def _process_collector():
+    samples = [
+        ("process_start_time_seconds", "gauge", "Process start time", _process_start),
+        (
+            "process_cpu_seconds_total",
+            "counter",
+            "CPU time of the whole process",
+            time.process_time(),
+        ),
+    ]
+    peak = peak_rss_bytes()
+    if peak is not None:
+        samples.append(
+            (
+                "process_peak_resident_memory_bytes",
+                "gauge",
+                "Resident memory high-water mark (since the last reset)",
+                peak,
+            )
+        )
+    return [
+        (name, kind, help, [({"pid": os.getpid()}, value)])
+        for name, kind, help, value in samples
+    ]
+
+
+REGISTRY.add_collector(_process_collector)
@@ -0,0 +1,237 @@
+import io
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Header or query parameter that turns profiling on for one request
+PROFILE_HEADER = "X-Profile"
+PROFILE_PARAM = "profile"
+# Seconds between stack samples for the collapsed-stack (flamegraph) output
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get("PROFILE_SAMPLE_INTERVAL", "0.005"))
+# Profiles kept per workspace; older ones are deleted
+PROFILE_HISTORY = int(os.environ.get("PROFILE_HISTORY", "50"))
+
+PROFILE_FILES = {
+    "pstats": ".pstats",
+    "collapsed": ".collapsed",
+}
+_META_SUFFIX = ".json"
+_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+# cProfile on Python 3.12+ is built on sys.monitoring, which allows one
+# profiler per process and records every thread, so one request at a time
+_profile_lock = threading.Lock()
+PSTATS_SCOPE = "process" if sys.version_info >= (3, 12) else "thread"
+
+
+class ProfileNotFound(Exception):
+    pass
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def is_requested(headers, args) -> bool:
+    """
+    True if the request asks to be profiled (X-Profile: 1 or ?profile=1).
+    """
+    value = headers.get(PROFILE_HEADER) or args.get(PROFILE_PARAM) or ""
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+class StackSampler:
+    """
+    Samples the call stack of one thread every `interval` seconds from a
+    background thread and counts identical stacks, in the collapsed format
+    flamegraph.pl and speedscope read ("outer;inner;leaf count").
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        filename = os.path.basename(code.co_filename)
+        return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(self._frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+def _path(folder: str, profile_id: str, suffix: str) -> str:
+    if not _ID_PATTERN.match(profile_id):
+        raise ProfileNotFound(f"Invalid profile ID: {profile_id}")
+    return os.path.join(folder, profile_id + suffix)
+
+
+@contextmanager
+def profile_request(folder: str, endpoint: str, method: str):
+    """
+    Profile the block with cProfile (deterministic, for pstats) and a stack
+    sampler (for the collapsed stacks) and save both to folder. The yielded
+    dict holds the new profile's ID. Raises ProfilerBusy, before running the
+    block, while another request is being profiled.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("Another request is being profiled, retry later")
+    try:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", endpoint).strip("_") or "root"
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{uuid.uuid4().hex[:6]}"
+        sampler = StackSampler(threading.get_ident())
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            profiler.enable()
+            try:
+                yield {"id": profile_id}
+            finally:
+                profiler.disable()
+        finally:
+            sampler.stop()
+        elapsed = time.perf_counter() - start
+
+        os.makedirs(folder, exist_ok=True)
+        profiler.dump_stats(_path(folder, profile_id, PROFILE_FILES["pstats"]))
+        with open(
+            _path(folder, profile_id, PROFILE_FILES["collapsed"]), "w", encoding="utf-8"
+        ) as f:
+            f.write(sampler.collapsed())
+        meta = {
+            "id": profile_id,
+            "endpoint": endpoint,
+            "method": method,
+            "created_at": time.time(),
+            "elapsed": round(elapsed, 4),
+            "samples": sum(sampler.stacks.values()),
+            "sample_interval": sampler.interval,
+            # On 3.12+ pstats include whatever other threads ran meanwhile;
+            # the collapsed stacks only ever sample the request's thread
+            "pstats_scope": PSTATS_SCOPE,
+            "stacks_scope": "thread",
+        }
+        with open(_path(folder, profile_id, _META_SUFFIX), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        _prune(folder)
+    finally:
+        _profile_lock.release()
+
+
+def list_profiles(folder: str) -> List[Dict]:
+    """
+    Saved profiles of a folder, newest first.
+    """
+    if not os.path.isdir(folder):
+        return []
+    profiles = []
+    for name in os.listdir(folder):
+        if not name.endswith(_META_SUFFIX):
+            continue
+        try:
+            with open(os.path.join(folder, name), "r", encoding="utf-8") as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(profiles, key=lambda p: p["created_at"], reverse=True)
+
+
+def profile_file(folder: str, profile_id: str, kind: str) -> str:
+    """
+    Path of a saved profile's pstats or collapsed-stack file.
+    """
+    if kind not in PROFILE_FILES:
+        raise ValueError(
+            f"Unknown profile format '{kind}', expected pstats or collapsed"
+        )
+    path = _path(folder, profile_id, PROFILE_FILES[kind])
+    if not os.path.exists(path):
+        raise ProfileNotFound(f"Profile '{profile_id}' not found")
+    return path
+
+
+def profile_summary(
+    folder: str, profile_id: str, limit: int = 30, sort: str = "cumulative"
+) -> Dict:
+    """
+    The top functions of a saved profile by cumulative (or total) time.
+    """
+    if sort not in ("cumulative", "tottime", "ncalls"):
+        raise ValueError("sort must be cumulative, tottime or ncalls")
+    stats = pstats.Stats(
+        profile_file(folder, profile_id, "pstats"), stream=io.StringIO()
+    )
+    rows = []
+    for (filename, line, func), stat in stats.stats.items():
+        cc, ncalls, tottime, cumtime = stat[:4]
+        rows.append(
+            {
+                "function": f"{func} ({os.path.basename(filename)}:{line})",
+                "ncalls": ncalls,
+                "primitive_calls": cc,
+                "tottime": round(tottime, 6),
+                "cumtime": round(cumtime, 6),
+            }
+        )
+    key = {"cumulative": "cumtime", "tottime": "tottime", "ncalls": "ncalls"}[sort]
+    rows.sort(key=lambda r: r[key], reverse=True)
+    return {
+        "id": profile_id,
+        # "process": the functions include other threads' work, not only this
+        # request's
+        "scope": PSTATS_SCOPE,
+        "total_time": round(stats.total_tt, 6),
+        "functions": rows[:limit],
+    }
+
+
+def delete_profile(folder: str, profile_id: str):
+    found = False
+    for suffix in list(PROFILE_FILES.values()) + [_META_SUFFIX]:
+        path = _path(folder, profile_id, suffix)
+        if os.path.exists(path):
+            os.remove(path)
+            found = True
+    if not found:
+        raise ProfileNotFound(f"Profile '{profile_id}' not found")
+
+
+def _prune(folder: str, keep: Optional[int] = None):
+    keep = PROFILE_HISTORY if keep is None else keep
+    for meta in list_profiles(folder)[keep:]:
+        try:
+            delete_profile(folder, meta["id"])
+        except (OSError, ProfileNotFound):
+            pass
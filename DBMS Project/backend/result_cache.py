@@ -0,0 +1,260 @@
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+from typing import Dict, List, Optional
+import pandas as pd
+
+from manifest import record_artifact
+from metrics import REGISTRY, cache_collector
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULT_CACHE_DIR = os.environ.get(
+    "RESULT_CACHE_DIR", os.path.join(BASE_DIR, "result_cache")
+)
+# Disk budget for cached stage outputs, in MB (0 disables the cache)
+RESULT_CACHE_MB = int(os.environ.get("RESULT_CACHE_MB", "1024"))
+# Bump when a stage's output format or algorithm changes
+CACHE_VERSION = 1
+# Seconds a scan of the cache directory is reused for stats() (and /metrics)
+RESULT_CACHE_STATS_TTL = float(os.environ.get("RESULT_CACHE_STATS_TTL", "30"))
+
+_ENTRY_FILE = "entry.json"
+# What key() produces; anything else (e.g. "..") must never become a path
+_KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+class InvalidCacheKey(ValueError):
+    pass
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """
+    Content hash of a DataFrame: column names, dtypes and every value.
+    """
+    digest = hashlib.sha256()
+    header = [[str(c) for c in df.columns], [str(t) for t in df.dtypes]]
+    digest.update(json.dumps(header).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def json_hash(value) -> str:
+    """
+    Hash of a JSON-serializable value (dict keys sorted).
+    """
+    text = json.dumps(value, sort_keys=True, default=sorted)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent cache of stage outputs on disk, keyed by a hash of the input
+    data plus the stage parameters. Each entry is a directory holding the
+    output files and the stage's result dict. Least recently used entries
+    are evicted once the total size exceeds max_bytes.
+    """
+
+    def __init__(
+        self, root: str, max_bytes: int, stats_ttl: float = RESULT_CACHE_STATS_TTL
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.stats_ttl = stats_ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._usage: Optional[Dict] = None
+        self._usage_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def key(self, stage: str, data_hash: str, params: Dict) -> str:
+        return json_hash(
+            {
+                "stage": stage,
+                "data": data_hash,
+                "params": params,
+                "version": CACHE_VERSION,
+            }
+        )
+
+    def _entry_dir(self, key: str) -> str:
+        if not isinstance(key, str) or not _KEY_PATTERN.fullmatch(key):
+            raise InvalidCacheKey(f"Invalid cache key '{key}'")
+        return os.path.join(self.root, key[:2], key)
+
+    def fetch(self, key: str, folder: str) -> Optional[Dict]:
+        """
+        On a hit, copy the cached output files into folder and return the
+        stored result; None on a miss.
+        """
+        if not self.enabled:
+            return None
+        try:
+            entry_dir = self._entry_dir(key)
+            with open(os.path.join(entry_dir, _ENTRY_FILE), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            for name in entry["files"]:
+                target = os.path.join(folder, name)
+                shutil.copyfile(os.path.join(entry_dir, name), target)
+                record_artifact(target)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # The entry file's mtime is the last access time used for eviction
+        os.utime(os.path.join(entry_dir, _ENTRY_FILE))
+        with self._lock:
+            self.hits += 1
+        return entry["result"]
+
+    def store(self, key: str, stage: str, result: Dict, paths: List[str]):
+        """
+        Save the output files and result of a stage run under key.
+        """
+        if not self.enabled:
+            return
+        entry_dir = self._entry_dir(key)
+        if os.path.isdir(entry_dir):
+            return
+
+        # Build the entry in a temp dir and rename it, so readers never see half of it
+        tmp_dir = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        try:
+            size = 0
+            for path in paths:
+                shutil.copyfile(path, os.path.join(tmp_dir, os.path.basename(path)))
+                size += os.path.getsize(path)
+            entry = {
+                "key": key,
+                "stage": stage,
+                "files": [os.path.basename(p) for p in paths],
+                "result": result,
+                "size": size,
+                "created_at": time.time(),
+            }
+            with open(os.path.join(tmp_dir, _ENTRY_FILE), "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        self._forget_usage()
+        self.evict()
+
+    def entries(self) -> List[Dict]:
+        """
+        All entries (without their results), most recently used first.
+        """
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if prefix.startswith(".") or not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                entry_path = os.path.join(prefix_dir, key, _ENTRY_FILE)
+                try:
+                    with open(entry_path, "r", encoding="utf-8") as f:
+                        entry = json.load(f)
+                    entry["last_used"] = os.path.getmtime(entry_path)
+                except (OSError, ValueError):
+                    continue
+                if not _KEY_PATTERN.fullmatch(str(entry.get("key"))):
+                    continue
+                entry.pop("result", None)
+                entries.append(entry)
+        return sorted(entries, key=lambda e: e["last_used"], reverse=True)
+
+    def evict(self) -> List[str]:
+        """
+        Delete least recently used entries until the cache fits in max_bytes.
+        """
+        entries = self.entries()
+        total = sum(e["size"] for e in entries)
+        evicted = []
+        while entries and total > self.max_bytes:
+            entry = entries.pop()
+            shutil.rmtree(self._entry_dir(entry["key"]), ignore_errors=True)
+            total -= entry["size"]
+            evicted.append(entry["key"])
+        if evicted:
+            self._forget_usage()
+        return evicted
+
+    def purge(self, key: Optional[str] = None) -> int:
+        """
+        Delete one entry, or every entry when key is None. Returns how many.
+        Raises InvalidCacheKey for a key key() cannot have produced.
+        """
+        if key is not None:
+            entry_dir = self._entry_dir(key)
+            if not os.path.isdir(entry_dir):
+                return 0
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            self._forget_usage()
+            return 1
+        count = len(self.entries())
+        shutil.rmtree(self.root, ignore_errors=True)
+        self._forget_usage()
+        return count
+
+    def _forget_usage(self):
+        with self._lock:
+            self._usage = None
+
+    def usage(self) -> Dict:
+        """
+        Entry count, bytes and entries per stage. The directory scan behind
+        them is reused for stats_ttl seconds, so scraping /metrics does not
+        stat every cached file; store, evict and purge in this process
+        refresh it right away.
+        """
+        with self._lock:
+            if (
+                self._usage is not None
+                and time.monotonic() - self._usage_at < self.stats_ttl
+            ):
+                return self._usage
+
+        entries = self.entries()
+        by_stage: Dict[str, int] = {}
+        for entry in entries:
+            by_stage[entry["stage"]] = by_stage.get(entry["stage"], 0) + 1
+        usage = {
+            "entries": len(entries),
+            "bytes": sum(e["size"] for e in entries),
+            "entries_by_stage": by_stage,
+        }
+        with self._lock:
+            self._usage, self._usage_at = usage, time.monotonic()
+        return usage
+
+    def stats(self) -> Dict:
+        usage = self.usage()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": usage["entries"],
+            "bytes": usage["bytes"],
+            "max_bytes": self.max_bytes,
+            "entries_by_stage": dict(usage["entries_by_stage"]),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+result_cache = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_MB * 1024 * 1024)
+REGISTRY.add_collector(cache_collector("result", result_cache.stats))
@@ -0,0 +1,124 @@
+# Production entry point: python serve.py --threads 8
+#
+# With gunicorn (Linux/macOS) the app and all pipeline modules are imported once
+# in the master process before the workers are forked, so workers share them
+# copy-on-write. Without gunicorn it falls back to waitress if installed, else
+# to the threaded Werkzeug server, in a single process.
+#
+# Job records, /metrics counters, the dataset cache and SSE streams are kept in
+# the worker process that created them. With several workers a job polled on
+# another worker is a 404 and /metrics shows one worker's numbers, and nothing
+# here routes a client back to the same worker. So the default is one worker
+# that scales with threads; use --workers N only behind a sticky load balancer
+# or when jobs and metrics are not needed.
+
+import os
+import time
+import logging
+import argparse
+import multiprocessing
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # gunicorn is optional and not available on Windows
+    BaseApplication = None
+
+# One process: job state and metrics are per process (see above)
+DEFAULT_WORKERS = int(os.environ.get("SERVER_WORKERS", "1"))
+DEFAULT_THREADS = int(
+    os.environ.get("SERVER_THREADS", str(min(8, 2 * multiprocessing.cpu_count())))
+)
+DEFAULT_TIMEOUT = int(os.environ.get("SERVER_TIMEOUT", "300"))
+
+logger = logging.getLogger("serve")
+
+
+def load_app(preload: bool = True):
+    """
+    Import the Flask app and, if preload is set, every pipeline module.
+    Returns the app and the import timings in seconds.
+    """
+    start = time.perf_counter()
+    import app as app_module
+
+    timings = {"import_app": time.perf_counter() - start}
+    if preload:
+        start = time.perf_counter()
+        app_module.preload_pipeline_modules()
+        timings["preload_pipeline"] = time.perf_counter() - start
+    return app_module.app, timings
+
+
+if BaseApplication is not None:
+
+    class PreloadedApplication(BaseApplication):
+        """
+        Gunicorn application serving an already imported WSGI app.
+        """
+
+        def __init__(self, wsgi_app, options):
+            self.wsgi_app = wsgi_app
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.wsgi_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the backend in production mode")
+    parser.add_argument("--host", default=os.environ.get("SERVER_HOST", "0.0.0.0"))
+    parser.add_argument(
+        "--port", type=int, default=int(os.environ.get("SERVER_PORT", "5000"))
+    )
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS)
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT)
+    parser.add_argument(
+        "--no-preload",
+        action="store_true",
+        help="Import pipeline modules lazily in each worker instead",
+    )
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        logger.warning(
+            "Several workers: jobs, metrics and streams are per worker, so job "
+            "polling and /metrics need sticky routing",
+            extra={"workers": args.workers},
+        )
+    wsgi_app, timings = load_app(preload=not args.no_preload)
+    logger.info("Loaded app", extra={"timings": timings})
+
+    if BaseApplication is not None:
+        PreloadedApplication(
+            wsgi_app,
+            {
+                "bind": f"{args.host}:{args.port}",
+                "workers": args.workers,
+                "threads": args.threads,
+                "timeout": args.timeout,
+                "worker_class": "gthread",
+                # The app is imported above, before gunicorn forks the workers
+                "preload_app": True,
+            },
+        ).run()
+        return
+
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+
+    if serve is not None:
+        serve(wsgi_app, host=args.host, port=args.port, threads=args.threads)
+    else:
+        wsgi_app.run(host=args.host, port=args.port, threaded=True, debug=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import os
+import math
+from typing import Dict, FrozenSet, Iterable, Set
+import numpy as np
+import pandas as pd
+
+# HyperLogLog precision: 2**p registers, relative error about 1.04 / sqrt(2**p)
+SKETCH_PRECISION = int(os.environ.get("SKETCH_PRECISION", "12"))
+# A candidate X -> A is pruned only when |X u A| exceeds |X| by this many
+# standard errors of the difference of the two estimates
+SKETCH_PRUNE_SIGMAS = 5.0
+# Extra absolute slack for small counts, where one register collision is
+# already a large relative difference
+SKETCH_PRUNE_SLACK = 2.0
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(hashes: np.ndarray) -> np.ndarray:
+    """
+    splitmix64 finalizer: spreads every input bit over all 64 output bits.
+    """
+    z = (hashes ^ (hashes >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch of 64-bit hashes in 2**precision one-byte registers.
+    """
+
+    def __init__(self, precision: int = SKETCH_PRECISION):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add_hashes(self, hashes: np.ndarray) -> "HyperLogLog":
+        """
+        Add an array of uint64 hashes: the top bits pick the register, the
+        position of the first set bit of the low 32 bits is the rank.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        low = (hashes & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        _, bit_length = np.frexp(low)  # 0 for a zero value
+        rank = (33 - bit_length).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return float(estimate)
+
+
+class ColumnSketches:
+    """
+    Distinct-count estimates for any set of columns of a DataFrame. Every
+    column is hashed once; the hash of a column set is combined from its
+    columns' hashes, so new sets need no further pass over the data.
+    Estimates are memoised by column set.
+    """
+
+    def __init__(self, df: pd.DataFrame, precision: int = SKETCH_PRECISION):
+        self.rows = len(df)
+        self.precision = precision
+        self._hashes = {
+            col: _mix(pd.util.hash_pandas_object(df[col], index=False).to_numpy())
+            for col in df.columns
+        }
+        self._counts: Dict[FrozenSet[str], float] = {}
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(1 << self.precision)
+
+    def set_hashes(self, columns: Iterable[str]) -> np.ndarray:
+        columns = sorted(columns)
+        combined = self._hashes[columns[0]]
+        for col in columns[1:]:
+            combined = _mix(combined * _GOLDEN + self._hashes[col])
+        return combined
+
+    def sketch(self, columns: Iterable[str]) -> HyperLogLog:
+        return HyperLogLog(self.precision).add_hashes(self.set_hashes(columns))
+
+    def distinct(self, columns: Iterable[str]) -> float:
+        """
+        Estimated number of distinct value combinations of columns.
+        """
+        key = frozenset(columns)
+        if key not in self._counts:
+            if not key or not self.rows:
+                count = float(min(self.rows, 1))
+            else:
+                count = min(self.sketch(key).count(), float(self.rows))
+            self._counts[key] = count
+        return self._counts[key]
+
+    def clearly_above(self, columns: Iterable[str], threshold: float) -> bool:
+        """
+        True when the estimate exceeds threshold by more than the error bound.
+        """
+        margin = SKETCH_PRUNE_SIGMAS * self.relative_error
+        return self.distinct(columns) > threshold * (1 + margin)
+
+    def clearly_below(self, columns: Iterable[str], threshold: float) -> bool:
+        margin = SKETCH_PRUNE_SIGMAS * self.relative_error
+        return self.distinct(columns) < threshold * (1 - margin)
+
+    def may_determine(self, lhs: Iterable[str], rhs: str) -> bool:
+        """
+        False when X -> A cannot hold: X u A has clearly more distinct values
+        than X. (X -> A holds exactly when the two counts are equal.)
+        """
+        lhs = frozenset(lhs)
+        # Two independent estimates: the error of their difference is sqrt(2) larger
+        margin = SKETCH_PRUNE_SIGMAS * math.sqrt(2) * self.relative_error
+        bound = self.distinct(lhs) * (1 + margin) + SKETCH_PRUNE_SLACK
+        return self.distinct(lhs | {rhs}) <= bound
+
+
+def estimate_tables(
+    df: pd.DataFrame,
+    schemas: Dict[str, Set[str]],
+    sketches: ColumnSketches = None,
+) -> Dict:
+    """
+    Predict the rows and in-memory size of each projection df[schema]
+    .drop_duplicates() and the saving against df, without projecting.
+    Sizes use each column's average bytes per value in df.
+    """
+    sketches = sketches or ColumnSketches(df)
+    rows = len(df)
+    column_bytes = df.memory_usage(index=False, deep=True)
+    per_value = {
+        col: (float(column_bytes[col]) / rows if rows else 0.0) for col in df.columns
+    }
+    original_bytes = float(column_bytes.sum())
+
+    tables = {}
+    for name, schema in schemas.items():
+        estimated_rows = round(sketches.distinct(schema))
+        tables[name] = {
+            "columns": sorted(schema),
+            "estimated_rows": estimated_rows,
+            "estimated_bytes": round(
+                estimated_rows * sum(per_value[col] for col in schema)
+            ),
+        }
+    total_bytes = sum(t["estimated_bytes"] for t in tables.values())
+    return {
+        "original": {
+            "rows": rows,
+            "columns": len(df.columns),
+            "bytes": round(original_bytes),
+        },
+        "tables": tables,
+        "estimated_bytes": total_bytes,
+        "estimated_saving": (
+            round(1 - total_bytes / original_bytes, 4) if original_bytes else 0.0
+        ),
+        "relative_error": round(sketches.relative_error, 4),
+    }
@@ -0,0 +1,217 @@
+import os
+import time
+import sqlite3
+import itertools
+from typing import Callable, Dict, List, Tuple
+import pandas as pd
+
+SQL_DIALECTS = ("sqlite", "postgresql")
+
+# Rows per executemany call while loading SQLite
+SQLITE_BATCH_ROWS = int(os.environ.get("SQLITE_BATCH_ROWS", "5000"))
+
+# The database is built in a scratch file and renamed when complete, so a
+# crash mid-load loses nothing and the rollback journal can be skipped
+SQLITE_LOAD_PRAGMAS = (
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA foreign_keys = OFF",
+)
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def column_type(dtype, dialect: str = "sqlite") -> str:
+    """
+    SQL type of a pandas dtype in the given dialect.
+    """
+    postgres = dialect == "postgresql"
+    if pd.api.types.is_bool_dtype(dtype):
+        return "BOOLEAN" if postgres else "INTEGER"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "BIGINT" if postgres else "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "DOUBLE PRECISION" if postgres else "REAL"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "TIMESTAMP" if postgres else "TEXT"
+    return "TEXT"
+
+
+def foreign_key_constraints(keymap: Dict, table: str) -> List[Tuple[List, str, List]]:
+    """
+    (columns, ref_table, ref_columns) per referenced table. The keymap
+    lists foreign keys per column; columns referencing the same table are
+    one constraint, kept only if they cover its whole primary key (a
+    foreign key must reference a unique column set).
+    """
+    by_table: Dict[str, Dict[str, str]] = {}
+    for column, ref in keymap[table].get("foreign_keys", {}).items():
+        ref_table = ref.get("ref_table")
+        if ref_table in keymap and ref_table != table:
+            by_table.setdefault(ref_table, {})[ref.get("ref_column")] = column
+
+    constraints = []
+    for ref_table, columns_by_ref in by_table.items():
+        ref_pk = keymap[ref_table].get("primary_keys", [])
+        if ref_pk and set(columns_by_ref) == set(ref_pk):
+            constraints.append(
+                ([columns_by_ref[c] for c in ref_pk], ref_table, list(ref_pk))
+            )
+    return constraints
+
+
+def _columns_sql(columns: List[str]) -> str:
+    return ", ".join(quote_identifier(c) for c in columns)
+
+
+def table_ddl(keymap: Dict, table: str, dtypes: Dict, dialect: str = "sqlite") -> str:
+    """
+    CREATE TABLE for one keymap table. Foreign keys are inline for SQLite;
+    for PostgreSQL they are added by schema_ddl afterwards.
+    """
+    info = keymap[table]
+    primary_keys = info.get("primary_keys", [])
+    lines = []
+    for column in info.get("attributes", []):
+        line = (
+            f"    {quote_identifier(column)} {column_type(dtypes.get(column), dialect)}"
+        )
+        # SQLite keeps NULLs in (non-INTEGER) primary keys, which the detected
+        # keys may contain; PostgreSQL requires them NOT NULL
+        if column in primary_keys and dialect == "postgresql":
+            line += " NOT NULL"
+        lines.append(line)
+    if primary_keys:
+        lines.append(f"    PRIMARY KEY ({_columns_sql(primary_keys)})")
+    if dialect == "sqlite":
+        for columns, ref_table, ref_columns in foreign_key_constraints(keymap, table):
+            lines.append(
+                f"    FOREIGN KEY ({_columns_sql(columns)}) REFERENCES "
+                f"{quote_identifier(ref_table)} ({_columns_sql(ref_columns)})"
+            )
+    body = ",\n".join(lines)
+    return f"CREATE TABLE {quote_identifier(table)} (\n{body}\n);"
+
+
+def schema_ddl(keymap: Dict, dtypes: Dict[str, Dict], dialect: str = "sqlite") -> str:
+    """
+    DDL for every keymap table. dtypes maps table -> column -> pandas dtype
+    (missing columns become TEXT). PostgreSQL foreign keys are ALTER TABLE
+    statements after all CREATE TABLEs, so table order and FK cycles do not
+    matter.
+    """
+    if dialect not in SQL_DIALECTS:
+        raise ValueError(
+            f"Unknown SQL dialect '{dialect}', expected sqlite or postgresql"
+        )
+    statements = [
+        table_ddl(keymap, table, dtypes.get(table, {}), dialect) for table in keymap
+    ]
+    if dialect == "postgresql":
+        for table in keymap:
+            for i, (columns, ref_table, ref_columns) in enumerate(
+                foreign_key_constraints(keymap, table), 1
+            ):
+                constraint = quote_identifier(f"fk_{table}_{i}")
+                statements.append(
+                    f"ALTER TABLE {quote_identifier(table)} ADD CONSTRAINT "
+                    f"{constraint} FOREIGN KEY ({_columns_sql(columns)}) "
+                    f"REFERENCES {quote_identifier(ref_table)} "
+                    f"({_columns_sql(ref_columns)});"
+                )
+    return "\n\n".join(statements) + "\n"
+
+
+def _rows(df: pd.DataFrame):
+    """
+    The rows of df as tuples of Python values sqlite3 accepts (None for
+    missing values, ISO strings for timestamps).
+    """
+    columns = []
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            series = series.map(lambda v: v.isoformat(), na_action="ignore")
+        values = series.astype(object)
+        columns.append(values.where(series.notna(), None).tolist())
+    return zip(*columns)
+
+
+def export_sqlite(
+    keymap: Dict,
+    load_table: Callable[[str], pd.DataFrame],
+    db_path: str,
+    batch_size: int = SQLITE_BATCH_ROWS,
+) -> Dict:
+    """
+    Create db_path with the keymap's DDL and bulk-load every table:
+    batched executemany in a single transaction with journaling off, then a
+    foreign key check. Returns the rows, seconds and rows per second of
+    each table and of the whole load.
+    """
+    tables = {table: load_table(table) for table in keymap}
+    dtypes = {table: dict(df.dtypes) for table, df in tables.items()}
+    ddl = schema_ddl(keymap, dtypes, "sqlite")
+
+    scratch = db_path + ".tmp"
+    if os.path.exists(scratch):
+        os.remove(scratch)
+    start = time.perf_counter()
+    conn = sqlite3.connect(scratch, isolation_level=None)
+    try:
+        for pragma in SQLITE_LOAD_PRAGMAS:
+            conn.execute(pragma)
+        conn.executescript(ddl)
+
+        report_tables = {}
+        conn.execute("BEGIN")
+        for table, df in tables.items():
+            columns = keymap[table].get("attributes", list(df.columns))
+            insert = (
+                f"INSERT INTO {quote_identifier(table)} ({_columns_sql(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})"
+            )
+            table_start = time.perf_counter()
+            rows = _rows(df[columns])
+            while True:
+                batch = list(itertools.islice(rows, batch_size))
+                if not batch:
+                    break
+                conn.executemany(insert, batch)
+            seconds = time.perf_counter() - table_start
+            primary_keys = keymap[table].get("primary_keys", [])
+            report_tables[table] = {
+                "rows": len(df),
+                # Rows PostgreSQL would reject
+                "null_primary_keys": (
+                    int(df[primary_keys].isna().any(axis=1).sum())
+                    if primary_keys
+                    else 0
+                ),
+                "seconds": round(seconds, 4),
+                "rows_per_second": round(len(df) / seconds) if seconds else None,
+            }
+        conn.execute("COMMIT")
+
+        violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+    finally:
+        conn.close()
+    os.replace(scratch, db_path)
+    seconds = time.perf_counter() - start
+
+    total_rows = sum(t["rows"] for t in report_tables.values())
+    return {
+        "database": os.path.basename(db_path),
+        "bytes": os.path.getsize(db_path),
+        "rows": total_rows,
+        "seconds": round(seconds, 4),
+        "rows_per_second": round(total_rows / seconds) if seconds else None,
+        "batch_size": batch_size,
+        "tables": report_tables,
+        "foreign_key_violations": len(violations),
+    }
@@ -0,0 +1,917 @@
+import os
+import re
+import json
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional, Tuple, FrozenSet
+
+from convert_to_csv import convert_to_csv, read_converted_csv, load_dataset
+from cleanModify import clean_dataset, join_column_values
+from fd_modified import (
+    detect_functional_dependencies,
+    discover_fds_anytime,
+    minimize_fds,
+    project_fds_on_schema,
+)
+from Normalize_1_2_3NF import (
+    full_normalization,
+    normalize_to_1nf,
+    normalize_to_2nf,
+    merge_normalized_tables,
+    predict_3nf_schemas,
+)
+from key_utils import get_table_keys, detect_keys, find_candidate_keys
+from lossless_check import is_lossless_decomposition
+from dependency_preservation import is_dependency_preserved, get_lost_dependencies
+from er_diagram import ER_FORMATS, render_diagram, render_key, render_pages
+from er_clusters import ER_MAX_TABLES
+from artifact_store import write_table, read_columns, list_tables, to_storable
+from dataset_cache import load_table, load_encoded, load_fds, load_hash, encode_columns
+from manifest import record_artifact, forget_artifact
+from metrics import track_stage
+from result_cache import result_cache, frame_hash, json_hash
+from sketches import estimate_tables
+from sql_export import export_sqlite, schema_ddl
+from index_advisor import advise_indexes
+
+FD = Tuple[FrozenSet[str], FrozenSet[str]]
+
+# Progress callback: called with keyword counters, may raise to abort the stage
+Progress = Optional[Callable[..., None]]
+# Discovery callback: called as emit(kind, data) for each FD, key or table found
+Emit = Optional[Callable[[str, Dict], None]]
+
+# Stage parameters; they are part of the result cache key
+FD_PARAMS = {
+    "max_comb_size": 3,
+    "rhs_cardinality_threshold": 100,
+    # Sketch pruning is approximate (see fd_modified); FD_SKETCHES=1 opts in
+    "use_sketches": os.environ.get("FD_SKETCHES", "0") == "1",
+}
+KEY_PARAMS = {"max_comb_size": 5}
+NORMALIZE_PARAMS = {"max_comb_size": 4}
+
+# Saved state of an FD search stopped by its time budget, resumed by the next run
+FD_SEARCH_STATE = "fd_search_state.json"
+
+
+class StageError(Exception):
+    """
+    Expected failure of a pipeline stage (missing input etc.), reported to the
+    client with the given HTTP status instead of 500.
+    """
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _no_progress(**counters):
+    pass
+
+
+def _no_emit(kind: str, data: Dict):
+    pass
+
+
+def _cleaned_table(folder: str, purpose: str) -> str:
+    files = [f for f in list_tables(folder) if f.startswith("cleaned_")]
+    if not files:
+        raise StageError(f"No cleaned CSV file found for {purpose}")
+    return files[0]
+
+
+def _row_dtype(df: pd.DataFrame):
+    """
+    Common dtype of a row of df, or None when rows are plain objects.
+    Only NumPy dtypes are upcast. Nullable (extension) columns are read as
+    they are, so Int64 values stay integral ("1"), where df.apply(axis=1)
+    upcast them to Float64 ("1.0") if the frame also held floats.
+    """
+    dtypes = list(df.dtypes)
+    if dtypes and all(
+        isinstance(t, np.dtype)
+        and pd.api.types.is_numeric_dtype(t)
+        and not pd.api.types.is_bool_dtype(t)
+        for t in dtypes
+    ):
+        return np.result_type(*dtypes)
+    return None
+
+
+def merge_numbered_columns(df: pd.DataFrame, join_delimiter: str = ",") -> pd.DataFrame:
+    """
+    Merge columns that have the same base name plus a numeric suffix (like .1, _2) into a single column.
+    If the merged column ends up all empty/NaN, remove it.
+
+    Parameters:
+    - df: input DataFrame
+    - join_delimiter: string to join multiple values in a row (default ',')
+
+    Returns:
+    - DataFrame with merged columns
+    """
+    pattern = re.compile(r"^(.*?)(?:\.|_)(\d+)$")
+    grouped_cols = {}
+
+    # Group columns by their base name (without numeric suffix)
+    for col in df.columns:
+        m = pattern.match(col)
+        if m:
+            base = m.group(1).strip()
+            grouped_cols.setdefault(base, []).append(col)
+
+    # Merge columns for each group that has more than 1 column
+    for base, cols in grouped_cols.items():
+        if len(cols) <= 1:
+            continue  # no merge needed
+
+        base_col_name = base.replace(" ", "_")
+
+        # Row values are read the way df.apply(axis=1) would see them: an
+        # all-numeric frame yields rows upcast to a common numeric dtype
+        row_dtype = _row_dtype(df)
+        df[base_col_name] = join_column_values(
+            [df[c] if row_dtype is None else df[c].astype(row_dtype) for c in cols],
+            join_delimiter,
+            lambda values: [str(val).strip() for val in values],
+        )
+
+        # Check if merged column is all empty (empty string or NaN)
+        if (df[base_col_name] == "").all():
+            df.drop(columns=[base_col_name], inplace=True)
+
+        # Drop the original numbered columns regardless
+        df.drop(columns=cols, inplace=True)
+
+    return df
+
+
+def get_foreign_keys(current_table, current_columns, all_primary_keys):
+    foreign_keys = {}
+    curr_cols_lower = {col.lower(): col for col in current_columns}
+
+    for other_table, pk_list in all_primary_keys.items():
+        if other_table == current_table or not pk_list:
+            continue
+        pk_set = set(pk_list)
+        # Only proceed if all PK attrs of other_table are present in current_columns
+        if not pk_set.issubset(set(current_columns)):
+            continue
+
+        for pk_attr in pk_list:
+            pk_lower = pk_attr.lower()
+            for col_lower, col_original in curr_cols_lower.items():
+                if (
+                    col_lower == pk_lower
+                    or col_lower.endswith(pk_lower)
+                    or pk_lower in col_lower
+                    or (col_lower.endswith("_id") and pk_lower in col_lower)
+                ):
+                    foreign_keys[col_original] = {
+                        "ref_table": other_table,
+                        "ref_column": pk_attr,
+                    }
+    return foreign_keys
+
+
+def _table_event(name: str, normal_form: str, df: pd.DataFrame, keys=None) -> Dict:
+    event = {
+        "name": name,
+        "normal_form": normal_form,
+        "columns": list(df.columns),
+        "rows": len(df),
+    }
+    if keys is not None:
+        event["primary_keys"] = keys["primary_keys"]
+        event["foreign_keys"] = keys["foreign_keys"]
+    return event
+
+
+def _fds_digest(fds: List[FD]) -> str:
+    return json_hash(sorted([sorted(lhs), sorted(rhs)] for lhs, rhs in fds))
+
+
+def detect_and_save_fds(
+    folder: str,
+    data_hash: str,
+    load_encoded_df: Callable[[], pd.DataFrame],
+    progress: Progress = None,
+    emit: Emit = None,
+) -> List[FD]:
+    """
+    Detect the FDs of the cleaned data (loaded as integer codes only when
+    needed) and save them, or take them from the result cache.
+    """
+    emit = emit or _no_emit
+    cache_key = result_cache.key("fd_detection", data_hash, FD_PARAMS)
+    fd_path = os.path.join(folder, "detected_fds.json")
+
+    if result_cache.fetch(cache_key, folder) is not None:
+        fds = load_fds(fd_path)
+        for lhs, rhs in fds:
+            emit("fd", {"lhs": list(lhs), "rhs": list(rhs)})
+        return fds
+
+    fds = detect_functional_dependencies(
+        load_encoded_df(),
+        **FD_PARAMS,
+        progress=progress,
+        on_fd=lambda fd: emit("fd", {"lhs": list(fd[0]), "rhs": list(fd[1])}),
+    )
+    save_fds(folder, fds)
+    result_cache.store(cache_key, "fd_detection", {}, [fd_path])
+    return fds
+
+
+def detect_fds_within_budget(
+    folder: str,
+    data_hash: str,
+    load_encoded_df: Callable[[], pd.DataFrame],
+    time_budget: Optional[float],
+    restart: bool = False,
+    progress: Progress = None,
+    emit: Emit = None,
+) -> Dict:
+    """
+    Anytime FD detection: search for at most time_budget seconds, resuming
+    a search an earlier call stopped (unless restart), and save the FDs found
+    so far. The state of an unfinished search is kept in FD_SEARCH_STATE;
+    a finished one goes to the result cache like detect_and_save_fds.
+    """
+    emit = emit or _no_emit
+    cache_key = result_cache.key("fd_detection", data_hash, FD_PARAMS)
+    state_path = os.path.join(folder, FD_SEARCH_STATE)
+
+    if result_cache.fetch(cache_key, folder) is not None:
+        fds = load_fds(os.path.join(folder, "detected_fds.json"))
+        for lhs, rhs in fds:
+            emit("fd", {"lhs": list(lhs), "rhs": list(rhs)})
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return {"fds": len(fds), "complete": True, "completeness": 1.0}
+
+    saved = None
+    if not restart and os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        # A search over older data or with other parameters starts over
+        if saved.get("key") != cache_key:
+            saved = None
+
+    result = discover_fds_anytime(
+        load_encoded_df(),
+        time_budget=time_budget,
+        state=saved["state"] if saved else None,
+        **FD_PARAMS,
+        progress=progress,
+        on_fd=lambda fd: emit("fd", {"lhs": list(fd[0]), "rhs": list(fd[1])}),
+    )
+    fd_path = save_fds(folder, result["fds"])
+    if result["complete"]:
+        result_cache.store(cache_key, "fd_detection", {}, [fd_path])
+        if os.path.exists(state_path):
+            os.remove(state_path)
+    else:
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump({"key": cache_key, "state": result["state"]}, f)
+
+    summary = {k: v for k, v in result.items() if k != "state"}
+    summary["fds"] = len(result["fds"])
+    return summary
+
+
+def detect_and_save_keys(
+    folder: str,
+    data_hash: str,
+    load_df: Callable[[], pd.DataFrame],
+    fds: List[FD],
+    progress: Progress = None,
+    emit: Emit = None,
+) -> Dict:
+    """
+    Detect candidate keys, primary key and superkeys and save the candidate
+    keys, or take them from the result cache.
+    """
+    emit = emit or _no_emit
+    cache_key = result_cache.key(
+        "key_detection", data_hash, {**KEY_PARAMS, "fds": _fds_digest(fds)}
+    )
+
+    cached = result_cache.fetch(cache_key, folder)
+    if cached is not None:
+        for key in cached["keys"]["candidate_keys"]:
+            emit("candidate_key", {"key": key})
+        return cached["keys"]
+
+    keys = detect_keys(
+        load_df(),
+        fds,
+        max_comb_size=KEY_PARAMS["max_comb_size"],
+        progress=progress,
+        on_key=lambda key: emit("candidate_key", {"key": sorted(key)}),
+    )
+    keys_path = save_candidate_keys(folder, keys)
+    result_cache.store(cache_key, "key_detection", {"keys": keys}, [keys_path])
+    return keys
+
+
+def save_fds(folder: str, fds: List[FD]) -> str:
+    fd_file_path = os.path.join(folder, "detected_fds.json")
+    with open(fd_file_path, "w", encoding="utf-8") as f:
+        json.dump([{"lhs": list(lhs), "rhs": list(rhs)} for lhs, rhs in fds], f)
+    record_artifact(fd_file_path)
+    return fd_file_path
+
+
+def save_candidate_keys(folder: str, keys: Dict) -> str:
+    keys_path = os.path.join(folder, "candidate_keys.json")
+    with open(keys_path, "w", encoding="utf-8") as f:
+        json.dump(keys["candidate_keys"], f)
+    record_artifact(keys_path)
+    return keys_path
+
+
+@track_stage("convert")
+def run_convert(workspace, progress: Progress = None) -> Dict:
+    """
+    Convert the first uploaded file of the workspace to CSV.
+    """
+    files = os.listdir(workspace.upload_folder)
+    if not files:
+        raise StageError("No uploaded files found")
+
+    file_path = os.path.join(workspace.upload_folder, files[0])
+    convert_to_csv(file_path, output_folder=workspace.processed_folder)
+
+    return {"message": "File converted to CSV"}
+
+
+@track_stage("clean")
+def run_clean(workspace, progress: Progress = None) -> Dict:
+    """
+    Clean the converted CSV, merge numbered columns and store the cleaned table.
+    """
+    files = [
+        f
+        for f in os.listdir(workspace.processed_folder)
+        if f.endswith("_converted.csv")
+    ]
+    if not files:
+        raise StageError("No CSV files found to clean")
+
+    df = read_converted_csv(os.path.join(workspace.processed_folder, files[0]))
+    cleaned_df = clean_dataset(df)
+
+    # **Merge numbered columns here**
+    cleaned_df = merge_numbered_columns(cleaned_df)
+
+    cleaned_name = f"cleaned_{os.path.splitext(files[0])[0]}"
+    write_table(cleaned_df, workspace.processed_folder, cleaned_name)
+
+    return {"message": "Data cleaned, merged numbered columns, and saved"}
+
+
+@track_stage("fd_detection")
+def run_fd_detection(
+    workspace,
+    progress: Progress = None,
+    emit: Emit = None,
+    time_budget: Optional[float] = None,
+    restart: bool = False,
+) -> Dict:
+    """
+    Detect FDs on the cleaned table and save them to detected_fds.json.
+    With a time_budget (seconds), the search stops when it runs out, saves
+    the FDs found so far and reports how complete they are; the next call
+    resumes it.
+    """
+    folder = workspace.processed_folder
+    filename = _cleaned_table(folder, "FD detection")
+
+    if time_budget is not None:
+        search = detect_fds_within_budget(
+            folder,
+            load_hash(folder, filename),
+            lambda: load_encoded(folder, filename),
+            time_budget,
+            restart,
+            progress,
+            emit,
+        )
+        message = (
+            "Functional Dependencies detected"
+            if search["complete"]
+            else "Functional Dependencies partially detected; run again to resume"
+        )
+        return {"message": message, "search": search}
+
+    # FDs only depend on which values are equal, so the integer codes suffice
+    detect_and_save_fds(
+        folder,
+        load_hash(folder, filename),
+        lambda: load_encoded(folder, filename),
+        progress,
+        emit,
+    )
+
+    return {"message": "Functional Dependencies detected"}
+
+
+@track_stage("key_detection")
+def run_key_detection(workspace, progress: Progress = None, emit: Emit = None) -> Dict:
+    """
+    Detect candidate keys, primary key and superkeys of the cleaned table.
+    """
+    folder = workspace.processed_folder
+    filename = _cleaned_table(folder, "key detection")
+
+    raw_fds = load_fds(os.path.join(folder, "detected_fds.json"))
+
+    keys = detect_and_save_keys(
+        folder,
+        load_hash(folder, filename),
+        lambda: load_table(folder, filename),
+        raw_fds,
+        progress,
+        emit,
+    )
+
+    return {"message": "Keys detected", "keys": keys}
+
+
+@track_stage("normalization")
+def run_normalization(workspace, progress: Progress = None, emit: Emit = None) -> Dict:
+    """
+    Normalize the cleaned table to 1NF, 2NF and 3NF, store every table and
+    save the keymap (primary, candidate and foreign keys) of the 3NF tables.
+    """
+    folder = workspace.processed_folder
+    filename = _cleaned_table(folder, "normalization")
+
+    fd_path = os.path.join(folder, "detected_fds.json")
+    if not os.path.exists(fd_path):
+        raise StageError("Detected FDs not found")
+    raw_fds = load_fds(fd_path)
+
+    keymap = normalize_and_save(
+        folder,
+        load_hash(folder, filename),
+        lambda: load_table(folder, filename),
+        raw_fds,
+        progress,
+        emit,
+    )
+
+    return {
+        "message": "Normalization (1NF, 2NF, 3NF) done; keys detected and saved",
+        "3nf_tables": list(keymap.keys()),
+    }
+
+
+def estimate_normalization(workspace, progress: Progress = None) -> Dict:
+    """
+    Predict the 3NF tables, their row counts and sizes, and the storage
+    saving from distinct-count sketches of the cleaned table, without
+    projecting it.
+    """
+    folder = workspace.processed_folder
+    filename = _cleaned_table(folder, "normalization estimate")
+
+    fd_path = os.path.join(folder, "detected_fds.json")
+    if not os.path.exists(fd_path):
+        raise StageError("Detected FDs not found")
+    raw_fds = load_fds(fd_path)
+
+    df = load_table(folder, filename)
+    candidate_keys = find_candidate_keys(
+        list(df.columns),
+        raw_fds,
+        max_comb_size=NORMALIZE_PARAMS["max_comb_size"],
+        progress=progress,
+    )
+    if not candidate_keys:
+        raise StageError("No candidate keys found")
+    schemas = predict_3nf_schemas(df.columns, raw_fds, candidate_keys)
+    return estimate_tables(df, schemas)
+
+
+def normalize_and_save(
+    folder: str,
+    data_hash: str,
+    load_cleaned_df: Callable[[], pd.DataFrame],
+    raw_fds: List[FD],
+    progress: Progress = None,
+    emit: Emit = None,
+) -> Dict:
+    """
+    Normalize the cleaned data to 1NF, 2NF and 3NF, write every table and the
+    keymap (primary, candidate and foreign keys of the 3NF tables) to folder,
+    or copy them from the result cache. Returns the keymap.
+    """
+    emit = emit or _no_emit
+    cache_key = result_cache.key(
+        "normalization",
+        data_hash,
+        {**NORMALIZE_PARAMS, "fds": _fds_digest(raw_fds)},
+    )
+
+    if result_cache.fetch(cache_key, folder) is not None:
+        with open(os.path.join(folder, "keymap.json"), "r", encoding="utf-8") as f:
+            keymap = json.load(f)
+        for table_name, info in keymap.items():
+            emit(
+                "table",
+                {
+                    "name": table_name,
+                    "normal_form": "3NF",
+                    "columns": info["attributes"],
+                    "primary_keys": info["primary_keys"],
+                    "foreign_keys": info["foreign_keys"],
+                },
+            )
+        return keymap
+
+    keymap, paths = _normalize_tables(
+        folder, load_cleaned_df(), raw_fds, progress, emit
+    )
+    result_cache.store(cache_key, "normalization", {}, paths)
+    return keymap
+
+
+def _normalize_tables(
+    folder: str,
+    cleaned_df: pd.DataFrame,
+    raw_fds: List[FD],
+    progress: Progress,
+    emit: Emit,
+) -> Tuple[Dict, List[str]]:
+    report = progress or _no_progress
+    paths = []
+
+    report(phase="candidate_keys")
+    attributes = list(cleaned_df.columns)
+    candidate_keys = find_candidate_keys(
+        attributes,
+        raw_fds,
+        max_comb_size=NORMALIZE_PARAMS["max_comb_size"],
+        progress=progress,
+    )
+    if not candidate_keys:
+        raise StageError("No candidate keys found")
+
+    # 1NF normalization
+    report(phase="1NF")
+    df_1nf = normalize_to_1nf(cleaned_df)
+    paths.append(write_table(df_1nf, folder, "1NF_table"))
+    emit("table", _table_event("1NF_table", "1NF", df_1nf))
+
+    minimized_fds = minimize_fds(raw_fds)
+    # 2NF normalization
+    report(phase="2NF")
+    tables_2nf, remaining_fds_2nf, _ = normalize_to_2nf(
+        df_1nf, minimized_fds, candidate_keys
+    )
+    for i, tbl in enumerate(tables_2nf, start=1):
+        paths.append(write_table(tbl, folder, f"2NF_table{i}"))
+        emit("table", _table_event(f"2NF_table{i}", "2NF", tbl))
+
+    report(phase="3NF")
+    norm_result = full_normalization(cleaned_df, raw_fds, candidate_keys)
+    original_3nf_tables = norm_result["3NF_tables"]
+
+    tables_to_merge = [(name, df) for name, df in original_3nf_tables.items()]
+    merged_tables = merge_normalized_tables(tables_to_merge)
+
+    existing_primary_keys = {}
+    keymap = {}
+
+    # First pass: Detect primary keys (and others), but skip foreign keys for now
+    report(phase="table_keys", tables_total=len(merged_tables))
+    for table_name, table_df in merged_tables.items():
+        attrs = set(table_df.columns)
+        projected_fds = project_fds_on_schema(raw_fds, attrs)
+        keys_info = get_table_keys(table_df, projected_fds, {}, table_name)
+        existing_primary_keys[table_name] = keys_info["primary_keys"]
+        keymap[table_name] = {
+            "primary_keys": keys_info["primary_keys"],
+            "candidate_keys": keys_info["candidate_keys"],
+            "superkeys": keys_info["superkeys"],
+            "foreign_keys": {},  # empty for now
+            "attributes": list(attrs),
+        }
+        report(tables_done=len(keymap))
+
+    # Second pass: Detect foreign keys now that all PKs are known
+    for table_name, info in keymap.items():
+        info["foreign_keys"] = get_foreign_keys(
+            table_name, info["attributes"], existing_primary_keys
+        )
+
+    # Save each normalized table
+    for table_name, table_df in merged_tables.items():
+        paths.append(write_table(table_df, folder, table_name))
+        emit("table", _table_event(table_name, "3NF", table_df, keymap[table_name]))
+
+    # Save the keymap with updated foreign keys
+    keymap_path = os.path.join(folder, "keymap.json")
+    with open(keymap_path, "w", encoding="utf-8") as f:
+        json.dump(keymap, f, indent=2)
+    record_artifact(keymap_path)
+    paths.append(keymap_path)
+
+    return keymap, paths
+
+
+@track_stage("er_diagram")
+def run_er_diagram(workspace, progress: Progress = None) -> Dict:
+    """
+    Render the ER diagram of the saved keymap to ER_Diagram.png.
+    """
+    keymap_path = os.path.join(workspace.processed_folder, "keymap.json")
+    if not os.path.exists(keymap_path):
+        raise StageError("Keymap JSON file not found")
+
+    with open(keymap_path, "r", encoding="utf-8") as f:
+        keymap = json.load(f)
+
+    render_er_diagram(workspace.processed_folder, keymap)
+
+    return {"message": "ER Diagram generated successfully"}
+
+
+def render_er_diagram(
+    folder: str, keymap: Dict, fmt: str = "png", style: Optional[Dict] = None
+) -> str:
+    """
+    Render the ER diagram of keymap to ER_Diagram.<fmt> in folder, or copy it
+    from the result cache when the same keymap was rendered with the same
+    format and style before. Schemas of more than ER_MAX_TABLES tables get
+    the subject-area overview as ER_Diagram.<fmt> and one
+    ER_Diagram_area<N>.<fmt> per area.
+    """
+    if fmt not in ER_FORMATS:
+        raise StageError(f"Unknown ER diagram format '{fmt}'")
+    er_path = os.path.join(folder, f"ER_Diagram.{fmt}")
+    paged = len(keymap) > ER_MAX_TABLES
+    cache_key = result_cache.key(
+        "er_diagram", render_key(keymap, fmt, style), {"paged": paged}
+    )
+    # Area pages of an earlier, larger schema would otherwise linger
+    for name in os.listdir(folder):
+        if re.fullmatch(rf"ER_Diagram_area\d+\.{fmt}", name):
+            os.remove(os.path.join(folder, name))
+            forget_artifact(os.path.join(folder, name))
+    if result_cache.fetch(cache_key, folder) is not None:
+        return er_path
+
+    if paged:
+        pages = render_pages(keymap, fmt, style)
+    else:
+        pages = {"overview": render_diagram(keymap, fmt, style)[1]}
+    paths = []
+    for name, data in pages.items():
+        suffix = "" if name == "overview" else f"_{name}"
+        path = os.path.join(folder, f"ER_Diagram{suffix}.{fmt}")
+        with open(path, "wb") as f:
+            f.write(data)
+        record_artifact(path)
+        paths.append(path)
+    result_cache.store(cache_key, "er_diagram", {}, paths)
+    return er_path
+
+
+SQLITE_EXPORT = "normalized.sqlite"
+
+
+def _load_keymap(folder: str) -> Dict:
+    keymap_path = os.path.join(folder, "keymap.json")
+    if not os.path.exists(keymap_path):
+        raise StageError("Keymap JSON file not found")
+    with open(keymap_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@track_stage("sql_export")
+def run_sql_export(workspace, progress: Progress = None) -> Dict:
+    """
+    Bulk-load the 3NF tables into normalized.sqlite with primary and foreign
+    keys from the keymap, and save the load report to sqlite_export.json.
+    """
+    folder = workspace.processed_folder
+    keymap = _load_keymap(folder)
+
+    db_path = os.path.join(folder, SQLITE_EXPORT)
+    report = export_sqlite(keymap, lambda table: load_table(folder, table), db_path)
+    record_artifact(db_path)
+
+    report_path = os.path.join(folder, "sqlite_export.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    record_artifact(report_path)
+
+    return {"message": "Normalized tables exported to SQLite", **report}
+
+
+def normalized_schema_ddl(workspace, dialect: str = "sqlite") -> str:
+    """
+    CREATE TABLE statements with primary and foreign keys for the 3NF
+    tables, in SQLite or PostgreSQL syntax.
+    """
+    folder = workspace.processed_folder
+    keymap = _load_keymap(folder)
+    dtypes = {}
+    for table in keymap:
+        try:
+            dtypes[table] = dict(load_table(folder, table).dtypes)
+        except FileNotFoundError:
+            dtypes[table] = {}  # Columns default to TEXT
+    return schema_ddl(keymap, dtypes, dialect)
+
+
+@track_stage("index_advisor")
+def run_index_advisor(workspace, progress: Progress = None, emit: Emit = None) -> Dict:
+    """
+    Propose an index per foreign key of the 3NF tables and benchmark the
+    joins that reconstruct the cleaned table in SQLite, with and without
+    them. The report is saved to index_advice.json.
+    """
+    folder = workspace.processed_folder
+    keymap = _load_keymap(folder)
+    filename = _cleaned_table(folder, "index advisor")
+
+    report = advise_indexes(
+        keymap,
+        lambda table: load_table(folder, table),
+        original=load_table(folder, filename),
+        progress=progress,
+    )
+    report_path = os.path.join(folder, "index_advice.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    record_artifact(report_path)
+
+    return {"message": "Index advice saved", **report}
+
+
+@track_stage("lossless_check")
+def run_lossless_check(workspace, progress: Progress = None) -> Dict:
+    """
+    Check that the normalized tables are a lossless decomposition of the
+    cleaned table under the detected FDs.
+    """
+    filename = _cleaned_table(workspace.processed_folder, "Lossless Check")
+
+    original_attrs = set(read_columns(workspace.processed_folder, filename))
+
+    decomposed_schemas = []
+    for f in list_tables(workspace.processed_folder):
+        if (
+            "_keys" not in f
+            and "_cleaned" not in f
+            and "_converted" not in f
+            and "_1NF" not in f
+            and "_2NF" not in f
+        ):
+            decomposed_schemas.append(set(read_columns(workspace.processed_folder, f)))
+
+    if not decomposed_schemas:
+        raise StageError("No normalized tables found for Lossless Check")
+
+    fds_path = os.path.join(workspace.processed_folder, "detected_fds.json")
+    if not os.path.exists(fds_path):
+        raise StageError("Functional Dependencies not found")
+
+    raw_fds = load_fds(fds_path)
+
+    is_lossless = is_lossless_decomposition(original_attrs, decomposed_schemas, raw_fds)
+
+    message = "Lossless Decomposition: PASSED"
+    return {"message": message}
+
+
+def run_pipeline(
+    file_path: str,
+    output_folder: str,
+    checkpoints: bool = False,
+    er_diagram: bool = True,
+    progress: Progress = None,
+    emit: Emit = None,
+) -> Dict:
+    """
+    Run convert -> clean -> FDs -> keys -> normalize -> lossless and
+    dependency preservation checks -> ER diagram on one in-memory DataFrame.
+    Only the final artifacts (FDs, keys, normalized tables, keymap, ER image)
+    are written to output_folder; with checkpoints the converted CSV and
+    cleaned table are stored too, so the step-by-step endpoints can pick up
+    from there.
+    Returns per-stage timings in seconds along with the results.
+    """
+    report = progress or _no_progress
+    timings = {}
+
+    @contextmanager
+    def timed(stage: str):
+        report(stage=stage)
+        with track_stage(stage) as measured:
+            yield
+        timings[stage] = round(measured["wall_seconds"], 4)
+
+    os.makedirs(output_folder, exist_ok=True)
+
+    with timed("convert"):
+        if checkpoints:
+            df = read_converted_csv(convert_to_csv(file_path, output_folder))
+        else:
+            df = load_dataset(file_path)
+
+    with timed("clean"):
+        # to_storable gives the cleaned table the types a stored copy would have
+        cleaned_df = to_storable(merge_numbered_columns(clean_dataset(df)))
+        if checkpoints:
+            stem = os.path.splitext(os.path.basename(file_path))[0]
+            write_table(cleaned_df, output_folder, f"cleaned_{stem}_converted")
+
+    data_hash = frame_hash(cleaned_df)
+
+    with timed("fd_detection"):
+        # FDs only depend on which values are equal, so the integer codes suffice
+        fds = detect_and_save_fds(
+            output_folder,
+            data_hash,
+            lambda: encode_columns(cleaned_df),
+            progress,
+            emit,
+        )
+
+    with timed("key_detection"):
+        keys = detect_and_save_keys(
+            output_folder, data_hash, lambda: cleaned_df, fds, progress, emit
+        )
+
+    with timed("normalization"):
+        keymap = normalize_and_save(
+            output_folder, data_hash, lambda: cleaned_df, fds, progress, emit
+        )
+
+    schemas = [set(info["attributes"]) for info in keymap.values()]
+    with timed("lossless_check"):
+        is_lossless = is_lossless_decomposition(set(cleaned_df.columns), schemas, fds)
+
+    with timed("dependency_preservation"):
+        minimized_fds = minimize_fds(fds)
+        is_preserved = is_dependency_preserved(minimized_fds, schemas)
+        lost_fds = [] if is_preserved else get_lost_dependencies(minimized_fds, schemas)
+
+    if er_diagram:
+        with timed("er_diagram"):
+            render_er_diagram(output_folder, keymap)
+
+    timings["total"] = round(sum(timings.values()), 4)
+    return {
+        "message": "Pipeline finished",
+        "timings": timings,
+        "fds": len(fds),
+        "keys": keys,
+        "3nf_tables": list(keymap.keys()),
+        "lossless": bool(is_lossless),
+        "dependency_preserved": bool(is_preserved),
+        "lost_dependencies": [
+            {"lhs": sorted(lhs), "rhs": sorted(rhs)} for lhs, rhs in lost_fds
+        ],
+    }
+
+
+def run_full_pipeline(
+    workspace,
+    progress: Progress = None,
+    emit: Emit = None,
+    checkpoints: bool = False,
+    er_diagram: bool = True,
+) -> Dict:
+    """
+    run_pipeline on the first uploaded file of the workspace.
+    """
+    files = os.listdir(workspace.upload_folder)
+    if not files:
+        raise StageError("No uploaded files found")
+
+    return run_pipeline(
+        os.path.join(workspace.upload_folder, files[0]),
+        workspace.processed_folder,
+        checkpoints=checkpoints,
+        er_diagram=er_diagram,
+        progress=progress,
+        emit=emit,
+    )
+
+
+# Stages that can run as background jobs or be streamed, by their endpoint name
+JOB_STAGES = {
+    "fd_modified": run_fd_detection,
+    "key_detection": run_key_detection,
+    "normalize_table": run_normalization,
+    "pipeline": run_full_pipeline,
+    "index_advisor": run_index_advisor,
+}
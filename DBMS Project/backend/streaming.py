@@ -0,0 +1,83 @@
+import json
+import time
+import queue
+from typing import Dict, Iterator, List, Tuple
+
+from stages import JOB_STAGES
+from jobs import job_queue, FINISHED, SUCCEEDED
+
+# Stages streamed when the client does not choose
+DEFAULT_STAGES = ("fd_modified", "key_detection", "normalize_table")
+# Seconds between progress events while a stage is running
+STREAM_PROGRESS_INTERVAL = 1.0
+# How often the stream checks whether the job has finished
+_POLL_SECONDS = 0.25
+
+
+def stage_events(
+    workspace,
+    stage_names: List[str],
+    progress_interval: float = STREAM_PROGRESS_INTERVAL,
+    timeout: float = None,
+) -> Iterator[Tuple[str, Dict]]:
+    """
+    Run the given stages in order as one background job and yield
+    (event, data) pairs as results are discovered:
+    stage (started/done), fd, candidate_key, table, progress and finally
+    done or error. Closing the generator early cancels the job.
+    """
+    events: "queue.Queue[Tuple[str, Dict]]" = queue.Queue()
+    current = {"stage": None}
+
+    def emit(kind: str, data: Dict):
+        events.put((kind, data))
+
+    def work(job):
+        with workspace.lock():
+            results = {}
+            for name in stage_names:
+                job.check()
+                current["stage"] = name
+                job.progress.clear()
+                emit("stage", {"stage": name, "status": "started"})
+                results[name] = JOB_STAGES[name](
+                    workspace, progress=job.report, emit=emit
+                )
+                emit("stage", {"stage": name, "status": "done", **results[name]})
+            return results
+
+    job = job_queue.submit("+".join(stage_names), work, workspace.id, timeout=timeout)
+    last_progress = time.monotonic()
+    try:
+        yield "job", {"job_id": job.id}
+        while True:
+            try:
+                yield events.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if job.status in FINISHED:
+                    break
+
+            now = time.monotonic()
+            if now - last_progress >= progress_interval and job.progress:
+                last_progress = now
+                yield "progress", {"stage": current["stage"], **job.progress}
+
+        if job.status == SUCCEEDED:
+            yield "done", {"job_id": job.id, "elapsed": job.info()["elapsed"]}
+        else:
+            yield "error", {
+                "job_id": job.id,
+                "status": job.status,
+                "message": job.error,
+            }
+    finally:
+        # Client went away (or the stream ended): stop the job if still running
+        job_queue.cancel(job.id)
+
+
+def format_sse(kind: str, data: Dict) -> str:
+    return f"event: {kind}\ndata: {json.dumps(data)}\n\n"
+
+
+def format_ndjson(kind: str, data: Dict) -> str:
+    return json.dumps({"event": kind, "data": data}) + "\n"
@@ -0,0 +1,260 @@
+import json
+import base64
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from artifact_store import table_path
+from dataset_cache import dataset_cache, load_table
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow IPC output is optional
+    pa = None
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 10_000
+
+FILTER_OPS = ("eq", "ne", "lt", "le", "gt", "ge", "contains", "isnull", "notnull")
+
+
+class QueryError(ValueError):
+    pass
+
+
+def parse_sort(sort: Optional[str]) -> List[Tuple[str, bool]]:
+    """
+    "a,-b" -> [("a", True), ("b", False)]: sort by a ascending, then b descending.
+    """
+    keys = []
+    for part in (sort or "").split(","):
+        part = part.strip()
+        if part:
+            keys.append((part.lstrip("-+"), not part.startswith("-")))
+    return keys
+
+
+def parse_filters(filters: List[str]) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    Each filter is "column:op:value" (value omitted for isnull/notnull).
+    """
+    parsed = []
+    for item in filters:
+        parts = item.split(":", 2)
+        if len(parts) < 2 or parts[1] not in FILTER_OPS:
+            raise QueryError(
+                f"Invalid filter '{item}', expected column:op:value with op in "
+                f"{', '.join(FILTER_OPS)}"
+            )
+        parsed.append((parts[0], parts[1], parts[2] if len(parts) == 3 else None))
+    return parsed
+
+
+def encode_cursor(state: Dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state).encode("utf-8")).decode("ascii")
+
+
+def _is_str_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
+# Fields of a cursor made by query_table, with a check for each value
+_CURSOR_FIELDS = {
+    "offset": lambda v: isinstance(v, int) and not isinstance(v, bool) and v >= 0,
+    "limit": lambda v: isinstance(v, int) and not isinstance(v, bool) and v > 0,
+    "columns": lambda v: v is None or _is_str_list(v),
+    "sort": lambda v: v is None or isinstance(v, str),
+    "filters": _is_str_list,
+}
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """
+    The query state of a cursor from encode_cursor. Raises QueryError for
+    anything else, including valid base64 JSON of the wrong shape.
+    """
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except ValueError:
+        raise QueryError("Invalid cursor")
+    if (
+        not isinstance(state, dict)
+        or set(state) != set(_CURSOR_FIELDS)
+        or not all(check(state[field]) for field, check in _CURSOR_FIELDS.items())
+    ):
+        raise QueryError("Invalid cursor")
+    return state
+
+
+def _typed_value(series: pd.Series, value: str):
+    """
+    Convert a filter value from the query string to the column's type.
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return value.lower() in ("1", "true", "yes")
+    if pd.api.types.is_numeric_dtype(series):
+        try:
+            return pd.to_numeric(value)
+        except ValueError:
+            raise QueryError(f"Filter value '{value}' is not a number")
+    return value
+
+
+def _filter_mask(df: pd.DataFrame, filters) -> np.ndarray:
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in filters:
+        col = df[column]
+        if op == "isnull":
+            mask &= col.isna().to_numpy()
+            continue
+        if op == "notnull":
+            mask &= col.notna().to_numpy()
+            continue
+        if value is None:
+            raise QueryError(f"Filter on '{column}' with op '{op}' needs a value")
+        if op == "contains":
+            hit = col.astype(str).str.contains(value, case=False, regex=False)
+        else:
+            typed = _typed_value(col, value)
+            if op == "eq":
+                hit = col == typed
+            elif op == "ne":
+                hit = col != typed
+            elif op == "lt":
+                hit = col < typed
+            elif op == "le":
+                hit = col <= typed
+            elif op == "gt":
+                hit = col > typed
+            else:
+                hit = col >= typed
+        mask &= hit.fillna(False).to_numpy(dtype=bool)
+    return mask
+
+
+def _row_positions(df: pd.DataFrame, sort_keys, filters) -> np.ndarray:
+    """
+    Positions of the rows that pass the filters, in sort order.
+    """
+    positions = np.arange(len(df))
+    if filters:
+        positions = positions[_filter_mask(df, filters)]
+    if sort_keys:
+        view = df.iloc[positions].reset_index(drop=True)
+        try:
+            order = view.sort_values(
+                by=[c for c, _ in sort_keys],
+                ascending=[asc for _, asc in sort_keys],
+                kind="stable",
+                na_position="last",
+            ).index.to_numpy()
+        except TypeError as e:
+            raise QueryError(f"Cannot sort: {e}")
+        positions = positions[order]
+    return positions
+
+
+def query_table(
+    folder: str,
+    name: str,
+    columns: Optional[List[str]] = None,
+    offset: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+    sort: Optional[str] = None,
+    filters: Optional[List[str]] = None,
+) -> Dict:
+    """
+    One page of a stored table. The table is served from the in-memory
+    dataset cache; the filtered and sorted row order is cached as well, so
+    paging through a view only slices an index array.
+    Returns the page DataFrame, the total number of matching rows and the
+    cursor for the next page (None on the last page).
+    """
+    path = table_path(folder, name)
+    if path is None:
+        raise FileNotFoundError(f"Table '{name}' not found")
+
+    df = load_table(folder, name)
+    sort_keys = parse_sort(sort)
+    parsed_filters = parse_filters(filters or [])
+
+    unknown = [
+        c
+        for c in (columns or [])
+        + [c for c, _ in sort_keys]
+        + [c for c, _, _ in parsed_filters]
+        if c not in df.columns
+    ]
+    if unknown:
+        raise QueryError(f"Unknown column(s): {', '.join(sorted(set(unknown)))}")
+
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    offset = max(0, int(offset))
+
+    if sort_keys or parsed_filters:
+        kind = "rows:" + json.dumps([sort_keys, parsed_filters])
+        positions = dataset_cache.get(
+            path, kind, lambda: _row_positions(df, sort_keys, parsed_filters)
+        )
+        page = df.iloc[positions[offset : offset + limit]]
+        total = len(positions)
+    else:
+        page = df.iloc[offset : offset + limit]
+        total = len(df)
+
+    if columns:
+        page = page[columns]
+
+    next_cursor = None
+    if offset + limit < total:
+        next_cursor = encode_cursor(
+            {
+                "offset": offset + limit,
+                "limit": limit,
+                "columns": columns,
+                "sort": sort,
+                "filters": filters or [],
+            }
+        )
+
+    return {
+        "page": page.reset_index(drop=True),
+        "offset": offset,
+        "limit": limit,
+        "total": total,
+        "next_cursor": next_cursor,
+    }
+
+
+def page_records(page: pd.DataFrame) -> List[List]:
+    """
+    Rows of a page as JSON-safe lists (missing values become None).
+    """
+    return json.loads(
+        page.to_json(orient="values", date_format="iso", double_precision=15)
+    )
+
+
+def page_ndjson(page: pd.DataFrame):
+    """
+    Yield the rows of a page as newline-delimited JSON objects.
+    """
+    for start in range(0, len(page), 1000):
+        chunk = page.iloc[start : start + 1000]
+        text = chunk.to_json(
+            orient="records", lines=True, date_format="iso", double_precision=15
+        )
+        yield text if text.endswith("\n") else text + "\n"
+
+
+def page_arrow(page: pd.DataFrame) -> bytes:
+    """
+    A page encoded as an Arrow IPC stream.
+    """
+    if pa is None:
+        raise QueryError("Arrow output requires pyarrow")
+    table = pa.Table.from_pandas(page, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
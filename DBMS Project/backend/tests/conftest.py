@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Keep the result cache and workspaces of the tests out of the real ones.
+# Set before any backend module is imported, since they are read at import.
+SCRATCH_DIR = tempfile.mkdtemp(prefix="backend_tests_")
+os.environ.setdefault(
+    "RESULT_CACHE_DIR", os.path.join(SCRATCH_DIR, "data", "result_cache")
+)
+os.environ.setdefault("WORKSPACES_ROOT", os.path.join(SCRATCH_DIR, "workspaces"))
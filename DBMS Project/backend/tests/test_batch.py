@@ -0,0 +1,58 @@
+import os
+
+from batch import aggregate_report, find_datasets
+from stages import run_pipeline
+
+SAMPLE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "uploads",
+    "sampleInformation.xlsx",
+)
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("a,b\n1,2\n")
+
+
+def test_find_datasets_skips_output_dir_and_result_files(tmp_path):
+    inputs = tmp_path / "extracts"
+    output = inputs / "batch_output"
+    for name in ("drugs.csv", "orders.json", "drugs.schema.json", "keymap.json"):
+        _touch(str(inputs / name))
+    for name in ("drugs/converted.csv", "drugs/detected_fds.json", "report.json"):
+        _touch(str(output / name))
+
+    found = find_datasets([str(inputs)], exclude=[str(output)])
+
+    assert [os.path.basename(p) for p in found] == ["drugs.csv", "orders.json"]
+
+
+def test_find_datasets_without_exclusions_keeps_other_json(tmp_path):
+    _touch(str(tmp_path / "nested" / "records.json"))
+
+    assert find_datasets([str(tmp_path)]) == [str(tmp_path / "nested" / "records.json")]
+
+
+def test_pipeline_result_records_dependency_preservation(tmp_path):
+    result = run_pipeline(SAMPLE, str(tmp_path), er_diagram=False)
+
+    assert "dependency_preservation" in result["timings"]
+    assert isinstance(result["dependency_preserved"], bool)
+    assert (result["lost_dependencies"] == []) == result["dependency_preserved"]
+
+
+def test_report_counts_check_outcomes():
+    results = [
+        {"status": "succeeded", "lossless": True, "dependency_preserved": True},
+        {"status": "succeeded", "lossless": True, "dependency_preserved": False},
+        {"status": "timed_out"},
+    ]
+
+    report = aggregate_report(results, 1.0)
+
+    assert report["checks"] == {
+        "lossless": {"passed": 2, "failed": 0},
+        "dependency_preserved": {"passed": 1, "failed": 1},
+    }
@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+from app import app
+from fd_modified import discover_fds_anytime
+
+
+@pytest.mark.parametrize("budget", ["nan", "NaN", "inf", "-inf", 0, -1, "soon"])
+def test_fd_endpoint_rejects_bad_budgets(budget):
+    client = app.test_client()
+    workspace_id = client.post("/api/workspaces").get_json()["workspace_id"]
+    response = client.post(
+        "/api/fd_modified",
+        json={"time_budget": budget},
+        headers={"X-Workspace-Id": workspace_id},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("budget", [float("nan"), float("inf"), 0.0])
+def test_anytime_search_rejects_bad_budgets(budget):
+    with pytest.raises(ValueError):
+        discover_fds_anytime(pd.DataFrame({"a": [1], "b": [1]}), time_budget=budget)
@@ -0,0 +1,53 @@
+import os
+import shutil
+
+import pytest
+
+from benchmarks.synthetic import generate_relation
+from dataset_cache import encode_columns, load_encoded
+from fd_modified import detect_functional_dependencies, discover_fds_anytime
+from stages import _cleaned_table, run_clean, run_convert
+from workspace import create_workspace
+
+SAMPLE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "uploads",
+    "sampleInformation.xlsx",
+)
+
+
+def _fds(df, use_sketches):
+    return detect_functional_dependencies(
+        df.copy(), verbose=False, use_sketches=use_sketches
+    )
+
+
+@pytest.fixture(scope="module")
+def sample_codes():
+    workspace = create_workspace()
+    shutil.copy(SAMPLE, workspace.upload_folder)
+    run_convert(workspace)
+    run_clean(workspace)
+    folder = workspace.processed_folder
+    return load_encoded(folder, _cleaned_table(folder, "FD detection"))
+
+
+def test_sketches_are_off_by_default(sample_codes):
+    assert detect_functional_dependencies(sample_codes.copy(), verbose=False) == (
+        _fds(sample_codes, use_sketches=False)
+    )
+
+
+def test_sample_fds_match_with_and_without_sketches(sample_codes):
+    exact = _fds(sample_codes, use_sketches=False)
+    assert exact
+    assert _fds(sample_codes, use_sketches=True) == exact
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_synthetic_fds_match_with_and_without_sketches(seed):
+    df, _ = generate_relation(rows=3000, fd_count=4, free_columns=2, seed=seed)
+    codes = encode_columns(df)
+    exact = _fds(codes, use_sketches=False)
+    assert _fds(codes, use_sketches=True) == exact
+    assert discover_fds_anytime(codes.copy(), use_sketches=True)["fds"] == exact
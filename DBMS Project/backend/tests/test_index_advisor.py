@@ -0,0 +1,60 @@
+import pandas as pd
+
+from index_advisor import advise_indexes, propose_indexes
+
+# lines.order_id references only half of the composite primary key of orders
+KEYMAP = {
+    "orders": {
+        "attributes": ["order_id", "customer_id", "placed"],
+        "primary_keys": ["order_id", "customer_id"],
+        "foreign_keys": {},
+    },
+    "lines": {
+        "attributes": ["line_id", "order_id", "qty"],
+        "primary_keys": ["line_id"],
+        "foreign_keys": {"order_id": {"ref_table": "orders", "ref_column": "order_id"}},
+    },
+}
+
+TABLES = {
+    "orders": pd.DataFrame(
+        {"order_id": ["o1", "o2"], "customer_id": ["c1", "c2"], "placed": ["x", "y"]}
+    ),
+    "lines": pd.DataFrame(
+        {
+            "line_id": ["l1", "l2", "l3"],
+            "order_id": ["o1", "o1", "o2"],
+            "qty": [1, 2, 3],
+        }
+    ),
+}
+
+
+def test_partial_foreign_key_gets_an_index():
+    (index,) = propose_indexes(KEYMAP)
+
+    assert index["table"] == "lines"
+    assert index["columns"] == ["order_id"]
+    assert index["references"] == {
+        "table": "orders",
+        "columns": ["order_id"],
+        "partial": True,
+    }
+
+
+def test_foreign_key_covered_by_primary_key_prefix_is_skipped():
+    keymap = {
+        **KEYMAP,
+        "lines": {**KEYMAP["lines"], "primary_keys": ["order_id", "line_id"]},
+    }
+
+    assert propose_indexes(keymap) == []
+
+
+def test_partial_foreign_key_join_is_benchmarked():
+    report = advise_indexes(KEYMAP, TABLES.__getitem__, repeat=1)
+
+    names = {query["name"] for query in report["queries"]}
+    assert {"join lines->orders", "lookup lines->orders"} <= names
+    join = next(q for q in report["queries"] if q["name"] == "join lines->orders")
+    assert join["with_indexes"]["rows"] == 3
@@ -0,0 +1,24 @@
+import pytest
+
+from app import app
+from jobs import JobQueue
+
+
+@pytest.mark.parametrize("timeout", ["nan", "NaN", "inf", "-inf", 0, -5, "-5", "soon"])
+def test_job_endpoint_rejects_bad_timeouts(timeout):
+    client = app.test_client()
+    workspace_id = client.post("/api/workspaces").get_json()["workspace_id"]
+    response = client.post(
+        "/api/jobs",
+        json={"stage": "key_detection", "timeout": timeout},
+        headers={"X-Workspace-Id": workspace_id},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("timeout", [float("nan"), float("inf"), 0.0, -5.0])
+def test_job_queue_rejects_bad_timeouts(timeout):
+    queue = JobQueue(max_workers=1)
+    with pytest.raises(ValueError):
+        queue.submit("key_detection", lambda job: {}, "default", timeout=timeout)
+    assert queue.list() == []
@@ -0,0 +1,18 @@
+import logging
+
+from lossless_check import is_lossless_decomposition
+
+FDS = [(frozenset({"a"}), frozenset({"b"}))]
+SCHEMAS = [{"a", "b"}, {"a", "c"}]
+
+
+def test_tableau_is_logged_only_at_debug(caplog):
+    with caplog.at_level(logging.INFO, logger="lossless_check"):
+        assert is_lossless_decomposition({"a", "b", "c"}, SCHEMAS, FDS)
+    assert not [r for r in caplog.records if hasattr(r, "tableau")]
+
+    caplog.clear()
+    with caplog.at_level(logging.DEBUG, logger="lossless_check"):
+        assert is_lossless_decomposition({"a", "b", "c"}, SCHEMAS, FDS)
+    tableaus = [r.tableau for r in caplog.records if hasattr(r, "tableau")]
+    assert tableaus[-1]["b"] == ["a0", "a1", "b1_b"]
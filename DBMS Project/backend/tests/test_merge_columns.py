@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from benchmarks.bench_merge import (
+    make_frame,
+    rowwise_flatten_repeating_columns,
+    rowwise_merge_numbered_columns,
+)
+from cleanModify import flatten_repeating_columns
+from stages import merge_numbered_columns
+
+
+def _columns(df):
+    return {col: list(df[col]) for col in df.columns}
+
+
+@pytest.mark.parametrize(
+    "frame",
+    [
+        make_frame(500, 4),
+        pd.DataFrame({"a_1": [1, 2, 3], "a_2": [1.5, None, 3.0]}),
+        pd.DataFrame({"a_1": [1, 2, 3], "a_2": [True, False, True]}),
+        pd.DataFrame({"a_1": [1, None, "x"], "a_2": [1.0, "y", None]}),
+    ],
+)
+def test_merge_numbered_columns_matches_rowwise(frame):
+    assert _columns(merge_numbered_columns(frame.copy())) == _columns(
+        rowwise_merge_numbered_columns(frame.copy())
+    )
+
+
+def test_flatten_repeating_columns_matches_rowwise():
+    frame = make_frame(500, 4)
+    assert _columns(flatten_repeating_columns(frame.copy())) == _columns(
+        rowwise_flatten_repeating_columns(frame.copy())
+    )
+
+
+def test_nullable_integers_stay_integral_next_to_floats():
+    frame = pd.DataFrame(
+        {
+            "a_1": pd.array([1, 2, None], dtype="Int64"),
+            "a_2": pd.array([5, None, 3], dtype="Int64"),
+            "b": [0.5, 1.0, 2.0],
+        }
+    )
+    assert list(merge_numbered_columns(frame)["a"]) == ["1,5", "2", "3"]
@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+
+import profiling
+from app import app
+
+
+def _workspace_headers(client):
+    workspace_id = client.post("/api/workspaces").get_json()["workspace_id"]
+    return {"X-Workspace-Id": workspace_id}
+
+
+def test_profiled_request_while_another_is_profiled_is_409():
+    client = app.test_client()
+    headers = _workspace_headers(client)
+    with profiling._profile_lock:
+        response = client.get("/api/profiles?profile=1", headers=headers)
+    assert response.status_code == 409
+
+    response = client.get("/api/profiles?profile=1", headers=headers)
+    assert response.status_code == 200
+    assert "X-Profile-Id" in response.headers
+
+
+def test_sampler_stops_and_lock_is_released_when_enable_fails(tmp_path, monkeypatch):
+    def enable(self):
+        raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(profiling.cProfile.Profile, "enable", enable)
+    threads_before = set(threading.enumerate())
+    with pytest.raises(ValueError):
+        with profiling.profile_request(str(tmp_path), "/api/x", "GET"):
+            pass
+    assert set(threading.enumerate()) <= threads_before
+    assert not profiling._profile_lock.locked()
+
+
+def test_profile_records_its_scope():
+    client = app.test_client()
+    headers = _workspace_headers(client)
+    profile_id = client.get("/api/profiles?profile=1", headers=headers).headers[
+        "X-Profile-Id"
+    ]
+    summary = client.get(f"/api/profiles/{profile_id}", headers=headers).get_json()
+    assert summary["scope"] == profiling.PSTATS_SCOPE
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from app import app
+from result_cache import InvalidCacheKey, ResultCache, result_cache
+
+
+@pytest.fixture
+def sentinel():
+    # A folder next to the cache root that a traversal would delete
+    path = os.path.join(os.path.dirname(result_cache.root), "keep")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@pytest.mark.parametrize("key", ["..", "%2e%2e", "%2E%2E"])
+def test_delete_rejects_traversal_keys(key, sentinel):
+    os.makedirs(result_cache.root, exist_ok=True)
+    response = app.test_client().delete(f"/api/result_cache/{key}")
+    assert response.status_code == 400
+    assert os.path.isdir(sentinel)
+    assert os.path.isdir(result_cache.root)
+
+
+@pytest.mark.parametrize("key", ["..", "../..", "ab", "A" * 64, "0" * 63 + "/"])
+def test_invalid_keys_never_become_paths(key, sentinel):
+    with pytest.raises(InvalidCacheKey):
+        result_cache.purge(key)
+    assert result_cache.fetch(key, sentinel) is None
+    assert os.path.isdir(sentinel)
+
+
+def test_unknown_valid_key_is_not_found():
+    response = app.test_client().delete("/api/result_cache/" + "0" * 64)
+    assert response.status_code == 404
+
+
+def test_stats_reuse_the_directory_scan_until_the_cache_changes(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / "cache"), 1024 * 1024, stats_ttl=3600)
+    scans = []
+    entries = cache.entries
+    monkeypatch.setattr(cache, "entries", lambda: scans.append(1) or entries())
+
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["entries"] == 0
+    assert len(scans) == 1
+
+    output = tmp_path / "fds.json"
+    output.write_text("[]")
+    key = cache.key("fd_detection", "data", {})
+    cache.store(key, "fd_detection", {}, [str(output)])
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"]) == (1, 2)
+    assert stats["entries_by_stage"] == {"fd_detection": 1}
+
+    cache.purge(key)
+    assert cache.stats()["entries"] == 0
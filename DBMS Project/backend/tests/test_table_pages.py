@@ -0,0 +1,37 @@
+import base64
+import json
+
+import pytest
+
+from table_pages import QueryError, decode_cursor, encode_cursor
+
+STATE = {"offset": 500, "limit": 500, "columns": None, "sort": "a", "filters": []}
+
+
+def _encode(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii")
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(STATE)) == STATE
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "WzFd",  # [1]
+        "not base64!",
+        _encode("text"),
+        _encode(None),
+        _encode({}),
+        _encode({**STATE, "offset": -1}),
+        _encode({**STATE, "limit": "500"}),
+        _encode({**STATE, "offset": True}),
+        _encode({**STATE, "filters": "a:eq:1"}),
+        _encode({**STATE, "columns": [1]}),
+        _encode({**STATE, "extra": 1}),
+    ],
+)
+def test_malformed_cursors_are_query_errors(cursor):
+    with pytest.raises(QueryError):
+        decode_cursor(cursor)
@@ -0,0 +1,248 @@
+import os
+import re
+import logging
+import time
+import uuid
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locks only
+    fcntl = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKSPACES_ROOT = os.environ.get(
+    "WORKSPACES_ROOT", os.path.join(BASE_DIR, "workspaces")
+)
+
+logger = logging.getLogger(__name__)
+
+# The default workspace keeps using the original uploads/ and processed/ folders
+DEFAULT_WORKSPACE_ID = "default"
+DEFAULT_UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
+DEFAULT_PROCESSED_FOLDER = os.path.join(BASE_DIR, "processed")
+
+# Cleaner settings: total disk quota for all workspaces, idle expiry, and scan interval
+WORKSPACE_QUOTA_MB = int(os.environ.get("WORKSPACE_QUOTA_MB", "2048"))
+WORKSPACE_TTL_HOURS = float(os.environ.get("WORKSPACE_TTL_HOURS", "24"))
+CLEANER_INTERVAL_SECONDS = int(os.environ.get("WORKSPACE_CLEANER_INTERVAL", "300"))
+
+_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_LAST_USED_FILE = ".last_used"
+_LOCK_FILE = ".lock"
+
+# Used instead of flock where fcntl is unavailable
+_thread_locks: Dict[str, threading.RLock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+class WorkspaceNotFound(Exception):
+    pass
+
+
+class Workspace:
+    """
+    Isolated upload/processed folders for one dataset pipeline.
+    """
+
+    def __init__(
+        self, workspace_id: str, root: str, upload_folder: str, processed_folder: str
+    ):
+        self.id = workspace_id
+        self.root = root
+        self.upload_folder = upload_folder
+        self.processed_folder = processed_folder
+
+    @property
+    def profile_folder(self) -> str:
+        return os.path.join(self.root, "profiles")
+
+    @property
+    def is_default(self) -> bool:
+        return self.id == DEFAULT_WORKSPACE_ID
+
+    def touch(self):
+        """
+        Record that the workspace was just used (read by the cleaner).
+        """
+        with open(os.path.join(self.root, _LAST_USED_FILE), "w") as f:
+            f.write(str(time.time()))
+
+    def last_used(self) -> float:
+        path = os.path.join(self.root, _LAST_USED_FILE)
+        return os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+    def disk_usage(self) -> int:
+        total = 0
+        for folder in (self.upload_folder, self.processed_folder):
+            for dirpath, _, filenames in os.walk(folder):
+                for name in filenames:
+                    try:
+                        total += os.path.getsize(os.path.join(dirpath, name))
+                    except OSError:
+                        pass
+        return total
+
+    @contextmanager
+    def lock(self, shared: bool = False, blocking: bool = True):
+        """
+        File lock on the workspace. Writers take it exclusively, readers shared,
+        so nobody reads an artifact while another request rewrites it.
+        Raises BlockingIOError when blocking is False and the lock is taken.
+        """
+        if fcntl is None:
+            with _thread_locks_guard:
+                rlock = _thread_locks.setdefault(self.id, threading.RLock())
+            if not rlock.acquire(blocking=blocking):
+                raise BlockingIOError(f"Workspace '{self.id}' is busy")
+            try:
+                yield self
+            finally:
+                rlock.release()
+            return
+
+        mode = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            mode |= fcntl.LOCK_NB
+        with open(os.path.join(self.root, _LOCK_FILE), "a") as f:
+            fcntl.flock(f.fileno(), mode)
+            try:
+                yield self
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def info(self) -> Dict:
+        return {
+            "workspace_id": self.id,
+            "uploads": sorted(os.listdir(self.upload_folder)),
+            "artifacts": sorted(
+                f for f in os.listdir(self.processed_folder) if not f.startswith(".")
+            ),
+            "disk_usage": self.disk_usage(),
+            "last_used": self.last_used(),
+        }
+
+
+def _workspace_dir(workspace_id: str) -> str:
+    return os.path.join(WORKSPACES_ROOT, workspace_id)
+
+
+def _open(workspace_id: str) -> Workspace:
+    if workspace_id == DEFAULT_WORKSPACE_ID:
+        os.makedirs(DEFAULT_UPLOAD_FOLDER, exist_ok=True)
+        os.makedirs(DEFAULT_PROCESSED_FOLDER, exist_ok=True)
+        return Workspace(
+            workspace_id,
+            DEFAULT_PROCESSED_FOLDER,
+            DEFAULT_UPLOAD_FOLDER,
+            DEFAULT_PROCESSED_FOLDER,
+        )
+    root = _workspace_dir(workspace_id)
+    return Workspace(
+        workspace_id,
+        root,
+        os.path.join(root, "uploads"),
+        os.path.join(root, "processed"),
+    )
+
+
+def create_workspace() -> Workspace:
+    """
+    Create a new empty workspace with a random ID.
+    """
+    workspace = _open(uuid.uuid4().hex)
+    os.makedirs(workspace.upload_folder)
+    os.makedirs(workspace.processed_folder)
+    workspace.touch()
+    return workspace
+
+
+def get_workspace(workspace_id: Optional[str]) -> Workspace:
+    """
+    Look up an existing workspace; a missing ID means the default workspace.
+    """
+    workspace_id = workspace_id or DEFAULT_WORKSPACE_ID
+    if not _ID_PATTERN.match(workspace_id):
+        raise WorkspaceNotFound(f"Invalid workspace ID: {workspace_id}")
+
+    workspace = _open(workspace_id)
+    if not os.path.isdir(workspace.processed_folder):
+        raise WorkspaceNotFound(f"Workspace '{workspace_id}' not found")
+    return workspace
+
+
+def delete_workspace(workspace_id: str):
+    workspace = get_workspace(workspace_id)
+    if workspace.is_default:
+        raise ValueError("The default workspace cannot be deleted")
+    with workspace.lock():
+        shutil.rmtree(workspace.root, ignore_errors=True)
+
+
+def list_workspaces() -> List[Workspace]:
+    if not os.path.isdir(WORKSPACES_ROOT):
+        return []
+    return [
+        _open(name)
+        for name in sorted(os.listdir(WORKSPACES_ROOT))
+        if _ID_PATTERN.match(name)
+        and name != DEFAULT_WORKSPACE_ID
+        and os.path.isdir(_workspace_dir(name))
+    ]
+
+
+def clean_workspaces(
+    quota_bytes: int = WORKSPACE_QUOTA_MB * 1024 * 1024,
+    ttl_seconds: float = WORKSPACE_TTL_HOURS * 3600,
+) -> List[str]:
+    """
+    Delete workspaces idle for longer than ttl_seconds, then the least recently
+    used ones until the total disk usage fits in quota_bytes. Workspaces that
+    are locked by a running request are skipped. Returns the deleted IDs.
+    """
+    now = time.time()
+    workspaces = sorted(list_workspaces(), key=lambda w: w.last_used())
+    usage = {w.id: w.disk_usage() for w in workspaces}
+    total = sum(usage.values())
+
+    deleted = []
+    for workspace in workspaces:
+        expired = now - workspace.last_used() > ttl_seconds
+        if not expired and total <= quota_bytes:
+            continue
+        try:
+            with workspace.lock(blocking=False):
+                shutil.rmtree(workspace.root, ignore_errors=True)
+        except BlockingIOError:
+            continue
+        total -= usage[workspace.id]
+        deleted.append(workspace.id)
+    return deleted
+
+
+_cleaner_started = False
+_cleaner_guard = threading.Lock()
+
+
+def start_cleaner(interval_seconds: int = CLEANER_INTERVAL_SECONDS):
+    """
+    Run clean_workspaces periodically on a daemon thread (once per process).
+    """
+    global _cleaner_started
+    with _cleaner_guard:
+        if _cleaner_started:
+            return
+        _cleaner_started = True
+
+    def run():
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                clean_workspaces()
+            except Exception:
+                logger.exception("Workspace cleaner failed")
+
+    threading.Thread(target=run, name="workspace-cleaner", daemon=True).start()